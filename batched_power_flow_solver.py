@@ -0,0 +1,210 @@
+"""A module containing a Newton-Raphson power flow solver for many scenarios of the same network.
+
+Solving many small power flows one at a time spends most of its time in the interpreter rather than in arithmetic. The
+BatchedPowerFlowSolver instead carries a (scenarios x buses) voltage array and executes each Newton-Raphson step for all
+scenarios at once: the mismatches and Jacobians are computed as stacked arrays and the stacked linear systems are solved
+with a single call to numpy.linalg.solve. Scenarios that have converged, or whose Jacobian is singular, are masked out
+of subsequent steps.
+
+The scenarios share the admittance matrix and bus types of the network, and differ in their loads, generation, and
+voltages. The Jacobians are stored as a dense (scenarios x size x size) array, so the solver is intended for small and
+medium systems.
+
+    solver = BatchedPowerFlowSolver(system, active_power_consumed=loads)
+    converged = solver.solve()
+    voltages = solver.voltages
+"""
+
+import numpy
+import power_flow_solver
+
+DEFAULT_MAX_ITERATIONS = 20
+
+
+class BatchedPowerFlowSolver:
+    """A Newton-Raphson power flow solver for a batch of scenarios that share a network."""
+
+    def __init__(self, system, active_power_consumed=None, reactive_power_consumed=None, active_power_generated=None,
+                 swing_bus_number=power_flow_solver.DEFAULT_SWING_BUS_NUMBER,
+                 max_active_power_error=power_flow_solver.DEFAULT_MAX_ACTIVE_POWER_ERROR,
+                 max_reactive_power_error=power_flow_solver.DEFAULT_MAX_REACTIVE_POWER_ERROR):
+        """Initializes the batched power flow solver.
+
+        The load and generation arguments are arrays of shape (scenarios, buses), or any shape that broadcasts to it.
+        Arguments that are not specified are taken from the system. Each scenario starts from the system voltages.
+
+        Bus types are determined from the system as in PowerFlowSolver, so every scenario must keep the loads and
+        generators of the system in place, although their values may differ.
+
+        Args:
+            system: The power system defining the network shared by all scenarios.
+            active_power_consumed: The active power consumed at each bus in each scenario.
+            reactive_power_consumed: The reactive power consumed at each bus in each scenario.
+            active_power_generated: The active power generated at each bus in each scenario.
+            swing_bus_number: The bus designated as the swing bus.
+            max_active_power_error: The maximum allowed active power mismatch.
+            max_reactive_power_error: The maximum allowed reactive power mismatch.
+        """
+        bus_data = system.bus_data
+        p_load, q_load, p_generated = numpy.broadcast_arrays(*(
+            numpy.atleast_2d(bus_data_value if value is None else value) for value, bus_data_value in (
+                (active_power_consumed, bus_data.active_power_consumed),
+                (reactive_power_consumed, bus_data.reactive_power_consumed),
+                (active_power_generated, bus_data.active_power_generated))))
+
+        self._max_active_power_error = max_active_power_error
+        self._max_reactive_power_error = max_reactive_power_error
+        self._admittance_matrix = system.admittance_matrix()
+        self._active_power_specified = p_generated - p_load
+        self._reactive_power_specified = -q_load
+        self._voltages = numpy.tile(bus_data.voltage, (len(p_load), 1))
+
+        bus_types = power_flow_solver.classify_buses(bus_data, swing_bus_number)
+        self._pv_pq_indices = numpy.flatnonzero(bus_types != power_flow_solver.BusType.SWING.value)
+        self._pq_indices = numpy.flatnonzero(bus_types == power_flow_solver.BusType.PQ.value)
+
+        self._iterations = numpy.zeros(len(p_load), dtype=int)
+        self._failed = numpy.zeros(len(p_load), dtype=bool)
+        self._converged = numpy.zeros(len(p_load), dtype=bool)
+        self._active_power_errors = numpy.zeros(self._voltages.shape)
+        self._reactive_power_errors = numpy.zeros(self._voltages.shape)
+        self._compute_errors(numpy.arange(len(p_load)))
+
+    @property
+    def voltages(self):
+        """Returns the (scenarios x buses) array of estimated bus voltages."""
+        return self._voltages
+
+    @property
+    def converged(self):
+        """Returns a mask of the scenarios that have converged."""
+        return self._converged.copy()
+
+    @property
+    def failed(self):
+        """Returns a mask of the scenarios that were abandoned because their Jacobian was singular."""
+        return self._failed.copy()
+
+    @property
+    def iterations(self):
+        """Returns the number of steps executed for each scenario."""
+        return self._iterations.copy()
+
+    @property
+    def active_power_errors(self):
+        """Returns the (scenarios x buses) array of active power mismatches."""
+        return self._active_power_errors
+
+    @property
+    def reactive_power_errors(self):
+        """Returns the (scenarios x buses) array of reactive power mismatches."""
+        return self._reactive_power_errors
+
+    def has_converged(self):
+        """Checks if every scenario has converged to a solution."""
+        return bool(numpy.all(self._converged))
+
+    def step(self):
+        """Executes a Newton-Raphson step for every scenario that has neither converged nor failed."""
+        active = numpy.flatnonzero(~self._converged & ~self._failed)
+        if not len(active):
+            return
+
+        voltages = self._voltages[active]
+        corrections = self._solve(active, self._jacobians(voltages), self._mismatches(active))
+
+        pv_pq = self._pv_pq_indices
+        magnitudes = numpy.abs(voltages)
+        angles = numpy.angle(voltages)
+        angles[:, pv_pq] += corrections[:, :len(pv_pq)]
+        magnitudes[:, self._pq_indices] += corrections[:, len(pv_pq):]
+        voltages[:, pv_pq] = magnitudes[:, pv_pq] * numpy.exp(1j * angles[:, pv_pq])
+        self._voltages[active] = voltages
+        self._iterations[active] += 1
+        self._compute_errors(active)
+
+    def solve(self, max_iterations=DEFAULT_MAX_ITERATIONS):
+        """Steps until every scenario has converged or failed, or the iteration limit is reached.
+
+        Args:
+            max_iterations: The maximum number of steps.
+
+        Returns:
+            A mask of the scenarios that have converged.
+        """
+        for _ in range(max_iterations):
+            if numpy.all(self._converged | self._failed):
+                break
+            self.step()
+        return self.converged
+
+    def _compute_errors(self, scenarios):
+        """Computes the power mismatches and convergence of a set of scenarios.
+
+        Args:
+            scenarios: The indices of the scenarios.
+        """
+        voltages = self._voltages[scenarios]
+        injections = voltages * numpy.conj(voltages @ self._admittance_matrix.T)
+        self._active_power_errors[scenarios] = self._active_power_specified[scenarios] - injections.real
+        self._reactive_power_errors[scenarios] = self._reactive_power_specified[scenarios] - injections.imag
+
+        dp = numpy.abs(self._active_power_errors[scenarios][:, self._pv_pq_indices])
+        dq = numpy.abs(self._reactive_power_errors[scenarios][:, self._pq_indices])
+        self._converged[scenarios] = (numpy.all(dp <= self._max_active_power_error, axis=1) &
+                                      numpy.all(dq <= self._max_reactive_power_error, axis=1))
+        self._failed[scenarios] |= ~numpy.all(numpy.isfinite(voltages), axis=1)
+
+    def _mismatches(self, scenarios):
+        """Returns the stacked active power mismatches at PV and PQ buses and reactive power mismatches at PQ buses."""
+        return numpy.concatenate([self._active_power_errors[scenarios][:, self._pv_pq_indices],
+                                  self._reactive_power_errors[scenarios][:, self._pq_indices]], axis=1)
+
+    def _jacobians(self, voltages):
+        """Computes the stacked Jacobians for a (scenarios x buses) array of voltages.
+
+        The blocks are computed from the products V_k * conj(Y_kj) * conj(V_j) as in PowerFlowSolver.
+        """
+        products = voltages[:, :, numpy.newaxis] * numpy.conj(self._admittance_matrix)
+        products *= numpy.conj(voltages)[:, numpy.newaxis, :]
+        injections = products.sum(axis=2)
+        magnitudes = numpy.abs(voltages)
+        p_diag = _stacked_diag(injections.real)
+        q_diag = _stacked_diag(injections.imag)
+
+        j11 = products.imag - q_diag
+        j12 = products.real / magnitudes[:, numpy.newaxis, :] + p_diag / magnitudes[:, :, numpy.newaxis]
+        j21 = p_diag - products.real
+        j22 = products.imag / magnitudes[:, numpy.newaxis, :] + q_diag / magnitudes[:, :, numpy.newaxis]
+
+        pv_pq = self._pv_pq_indices
+        pq = self._pq_indices
+        return numpy.concatenate([
+            numpy.concatenate([j11[:, pv_pq][:, :, pv_pq], j12[:, pv_pq][:, :, pq]], axis=2),
+            numpy.concatenate([j21[:, pq][:, :, pv_pq], j22[:, pq][:, :, pq]], axis=2),
+        ], axis=1)
+
+    def _solve(self, scenarios, jacobians, mismatches):
+        """Solves the stacked linear systems for the voltage corrections of a set of scenarios.
+
+        If any Jacobian is singular, the systems are solved one at a time and the scenarios with a singular Jacobian
+        are marked as failed and left unchanged.
+        """
+        try:
+            return numpy.linalg.solve(jacobians, mismatches[:, :, numpy.newaxis])[:, :, 0]
+        except numpy.linalg.LinAlgError:
+            corrections = numpy.zeros(mismatches.shape)
+            for k, scenario in enumerate(scenarios):
+                try:
+                    corrections[k] = numpy.linalg.solve(jacobians[k], mismatches[k])
+                except numpy.linalg.LinAlgError:
+                    self._failed[scenario] = True
+            return corrections
+
+
+def _stacked_diag(values):
+    """Builds a stack of diagonal matrices from a (scenarios x size) array."""
+    result = numpy.zeros(values.shape + values.shape[-1:], dtype=values.dtype)
+    indices = numpy.arange(values.shape[-1])
+    result[:, indices, indices] = values
+    return result
@@ -0,0 +1,298 @@
+"""A program that benchmarks the power flow solver on synthetic networks of increasing size.
+
+For each size, a meshed network is generated with the SyntheticPowerSystemBuilder and the main phases of a
+Newton-Raphson solve are timed separately: building the admittance matrix, computing the power mismatches, building the
+Jacobian, factorizing and solving the Jacobian, and a full solve from a flat start. Each timing is the best of several
+repeats, so the results reflect the cost of each phase rather than noise from the rest of the machine.
+
+Each run is appended to a JSON history file. The comparison mode compares two runs of the history, identified by label
+or index, and flags the phases that became slower by more than a threshold, along with any size whose full solve no
+longer converges.
+
+    python benchmark.py --sizes 10 100 1000 --label before
+    python benchmark.py --sizes 10 100 1000 --label after
+    python benchmark.py --compare before after
+"""
+
+import argparse
+import dataclasses
+import datetime
+import json
+import numpy
+import os
+import platform
+import power_flow_solver
+import power_system
+import power_system_builder
+import tabulate
+import timeit
+
+# Benchmark constants.
+DEFAULT_SIZES = (10, 100, 1000, 5000, 20000)
+DEFAULT_REPEATS = 3
+DEFAULT_SEED = power_system_builder.DEFAULT_SYNTHETIC_SEED
+DEFAULT_HISTORY_FILE = 'benchmark_history.json'
+
+# Fill-reducing bus orderings. With no bus ordering, SuperLU orders the columns of each sparse matrix itself.
+NO_ORDERING = 'none'
+ORDERINGS = power_system.ORDERING_METHODS + (NO_ORDERING,)
+DEFAULT_ORDERING = power_flow_solver.DEFAULT_ORDERING
+
+# Comparison constants. Phases that take less than the minimum time in both runs are too noisy to compare.
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+DEFAULT_MIN_TIME = 1e-4
+
+# Power flow constants.
+DEFAULT_MAX_ACTIVE_POWER_ERROR = 1e-5
+DEFAULT_MAX_REACTIVE_POWER_ERROR = 1e-5
+
+# Benchmarked phases.
+ADMITTANCE_MATRIX = 'admittance_matrix'
+MISMATCHES = 'mismatches'
+JACOBIAN = 'jacobian'
+LINEAR_SOLVE = 'linear_solve'
+SOLVE = 'solve'
+PHASES = (ADMITTANCE_MATRIX, MISMATCHES, JACOBIAN, LINEAR_SOLVE, SOLVE)
+
+TABULATE_FLOAT_FMT = '.6f'
+
+
+@dataclasses.dataclass(frozen=True)
+class BenchmarkOptions:
+    """Options used to generate and solve each network."""
+    repeats: int = DEFAULT_REPEATS
+    seed: int = DEFAULT_SEED
+    sparse: bool = None
+    ordering: str = DEFAULT_ORDERING
+    max_active_power_error: float = DEFAULT_MAX_ACTIVE_POWER_ERROR
+    max_reactive_power_error: float = DEFAULT_MAX_REACTIVE_POWER_ERROR
+
+
+@dataclasses.dataclass(frozen=True)
+class Comparison:
+    """The timings of a phase in two runs. The ratio is the candidate time divided by the baseline time.
+
+    Converged is false if the full solve of the candidate did not converge, in which case its solve phase is always
+    flagged as a regression.
+    """
+    size: int
+    phase: str
+    baseline: float
+    candidate: float
+    ratio: float
+    regression: bool
+    converged: bool = True
+
+
+def benchmark_size(size, options=BenchmarkOptions()):
+    """Benchmarks the phases of a solve on a synthetic network.
+
+    Args:
+        size: The number of buses.
+        options: The benchmark options.
+
+    Returns:
+        A dict containing the number of buses and lines, the number of iterations of the full solve and whether it
+        converged, whether sparse storage was used, and the best time of each phase in seconds.
+    """
+    builder = power_system_builder.SyntheticPowerSystemBuilder(size, options.seed)
+    system = builder.build_system()
+    start_voltage = system.bus_data.voltage.copy()
+
+    ordering = None if options.ordering == NO_ORDERING else options.ordering
+
+    def create_solver():
+        system.bus_data.voltage[:] = start_voltage
+        return power_flow_solver.PowerFlowSolver(system, builder.swing_bus_number, options.max_active_power_error,
+                                                 options.max_reactive_power_error, options.sparse, ordering=ordering)
+
+    solver = create_solver()
+    jacobian = solver.jacobian()
+    summaries = []
+    converged = []
+
+    def solve():
+        try:
+            converged.append(create_solver().solve(callback=summaries.append))
+        except power_flow_solver.SOLVE_ERRORS:
+            # The power flow diverged or the Jacobian is singular. The time to fail is still recorded.
+            converged.append(False)
+
+    timings = {
+        ADMITTANCE_MATRIX: _best_time(lambda: system.admittance_matrix(sparse=solver.sparse), options.repeats),
+        MISMATCHES: _best_time(solver.update_buses, options.repeats),
+        JACOBIAN: _best_time(solver.jacobian, options.repeats),
+        LINEAR_SOLVE: _best_time(lambda: solver.factorize(jacobian).solve(solver.mismatches()), options.repeats),
+        SOLVE: _best_time(solve, options.repeats),
+    }
+    return {'buses': len(system.bus_data), 'lines': len(system.line_data),
+            'iterations': summaries[-1].iteration if summaries else 0, 'converged': all(converged),
+            'sparse': bool(solver.sparse), 'timings': timings}
+
+
+def run_benchmarks(sizes, options=BenchmarkOptions(), label=None):
+    """Benchmarks synthetic networks of each size.
+
+    Args:
+        sizes: The numbers of buses.
+        options: The benchmark options.
+        label: A label identifying the run in the history.
+
+    Returns:
+        A dict describing the run and containing the results of each size.
+    """
+    return {
+        'label': label,
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'options': dataclasses.asdict(options),
+        'results': {str(size): benchmark_size(size, options) for size in sizes},
+    }
+
+
+def read_history(filename):
+    """Reads the runs of a history file, or an empty list if it does not exist."""
+    if not os.path.exists(filename):
+        return []
+
+    with open(filename) as file:
+        return json.load(file)
+
+
+def append_history(filename, run):
+    """Appends a run to a history file."""
+    history = read_history(filename)
+    history.append(run)
+    with open(filename, 'w') as file:
+        json.dump(history, file, indent=2)
+
+
+def find_run(history, key):
+    """Finds a run in a history by label, or by index if no run has the label.
+
+    When several runs share a label, the latest is returned.
+
+    Raises:
+        KeyError: If no run matches the key.
+    """
+    for run in reversed(history):
+        if run['label'] == key:
+            return run
+
+    try:
+        return history[int(key)]
+    except (IndexError, ValueError):
+        raise KeyError('No benchmark run matches {}.'.format(key))
+
+
+def compare_runs(baseline, candidate, threshold=DEFAULT_REGRESSION_THRESHOLD, min_time=DEFAULT_MIN_TIME):
+    """Compares the timings of the sizes and phases present in both runs.
+
+    Args:
+        baseline: The baseline run.
+        candidate: The candidate run.
+        threshold: The fraction by which a phase must slow down to be flagged as a regression.
+        min_time: Phases faster than this in both runs, in seconds, are never flagged.
+
+    Returns:
+        A list of comparisons, ordered by size and phase.
+    """
+    comparisons = []
+    sizes = sorted(set(baseline['results']) & set(candidate['results']), key=int)
+    for size in sizes:
+        baseline_timings = baseline['results'][size]['timings']
+        candidate_timings = candidate['results'][size]['timings']
+        converged = candidate['results'][size].get('converged', True)
+        for phase in PHASES:
+            if phase not in baseline_timings or phase not in candidate_timings:
+                continue
+
+            before = baseline_timings[phase]
+            after = candidate_timings[phase]
+            ratio = after / before if before else numpy.inf
+            slower = ratio > 1 + threshold and max(before, after) >= min_time
+            regression = slower or (phase == SOLVE and not converged)
+            comparisons.append(Comparison(int(size), phase, before, after, ratio, regression, converged))
+
+    return comparisons
+
+
+def results_report(run):
+    """Reports the time of each phase for each size of a run."""
+    headers = ['Buses', 'Lines', 'Iterations', 'Converged', 'Sparse'] + ['{} (s)'.format(phase) for phase in PHASES]
+    table = []
+    for result in run['results'].values():
+        table.append([result['buses'], result['lines'], result['iterations'],
+                      'Yes' if result.get('converged', True) else 'No', 'Yes' if result['sparse'] else 'No'] +
+                     [result['timings'][phase] for phase in PHASES])
+
+    return tabulate.tabulate(table, headers=headers, floatfmt=TABULATE_FLOAT_FMT)
+
+
+def comparison_report(comparisons):
+    """Reports the timings of two runs side by side, flagging regressions."""
+    headers = ['Buses', 'Phase', 'Baseline (s)', 'Candidate (s)', 'Ratio', 'Converged', 'Regression']
+    table = [[comparison.size, comparison.phase, comparison.baseline, comparison.candidate, comparison.ratio,
+              'Yes' if comparison.converged else 'No', 'Yes' if comparison.regression else 'No']
+             for comparison in comparisons]
+    return tabulate.tabulate(table, headers=headers, floatfmt=TABULATE_FLOAT_FMT)
+
+
+def _best_time(function, repeats):
+    """Returns the best time of a function in seconds, over a number of repeats.
+
+    Each repeat calls the function enough times to take at least 0.2 seconds, so fast phases are timed accurately.
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeats, number)) / number
+
+
+def parse_arguments():
+    """Parses command line arguments.
+
+    Returns:
+        An object containing program arguments.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='The numbers of buses of the benchmarked networks.')
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS, help='The number of repeats of each timing.')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='The seed of the synthetic networks.')
+    parser.add_argument('--sparse', action='store_true', default=None,
+                        help='Use sparse storage for every size (default: for networks with 100 or more buses).')
+    parser.add_argument('--ordering', choices=ORDERINGS, default=DEFAULT_ORDERING,
+                        help='The fill-reducing bus ordering applied to sparse Jacobians before they are factorized.')
+    parser.add_argument('--label', help='A label identifying the run in the history.')
+    parser.add_argument('--history', default=DEFAULT_HISTORY_FILE,
+                        help='The JSON file to which the results of each run are appended.')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CANDIDATE'),
+                        help='Compare two runs of the history, identified by label or index, instead of benchmarking.')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help='The fraction by which a phase must slow down to be flagged as a regression.')
+    return parser.parse_args()
+
+
+def main():
+    """Benchmarks synthetic networks and records the results, or compares two recorded runs."""
+    args = parse_arguments()
+    if args.compare:
+        history = read_history(args.history)
+        baseline, candidate = (find_run(history, key) for key in args.compare)
+        comparisons = compare_runs(baseline, candidate, args.threshold)
+        print(comparison_report(comparisons))
+
+        regressions = sum(comparison.regression for comparison in comparisons)
+        if regressions:
+            raise SystemExit('{} regression(s) found.'.format(regressions))
+        return
+
+    run = run_benchmarks(args.sizes, BenchmarkOptions(args.repeats, args.seed, args.sparse, args.ordering), args.label)
+    append_history(args.history, run)
+    print(results_report(run))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""A module containing a cache of compiled power system cases.
+
+Parsing an input file, and an Excel workbook in particular, can take far longer than solving a small power flow. The
+first time a case is built, the CachedPowerSystemBuilder writes its bus and line data arrays to a directory of .npy
+files. Later builds of the same case memory-map the arrays instead of parsing the input again, so loading takes
+roughly constant time, and concurrent processes working on the same case share the pages of the cached arrays.
+
+The arrays are mapped copy-on-write, so a process may modify its power system, e.g. by solving it, without changing the
+cache or the systems of other processes. The fill-reducing bus orderings of the case are computed when it is cached and
+stored alongside its arrays, so solvers of a cached case skip the ordering stage.
+
+A cache entry is keyed by the absolute path, modification time, and size of the input files, along with the options of
+the builder, so editing an input file or changing the power base creates a new entry rather than reusing a stale one.
+
+    builder = CachedPowerSystemBuilder('cache', 'data/Data.xlsx')
+    system = builder.build_system()
+"""
+
+import hashlib
+import json
+import numpy
+import os
+import power_system
+import power_system_builder
+import shutil
+import tempfile
+
+# The version of the cache layout. Changing it invalidates every existing entry.
+CACHE_VERSION = 3
+METADATA_FILENAME = 'case.json'
+
+_BUS_FIELDS = ('number', 'active_power_consumed', 'reactive_power_consumed', 'active_power_generated', 'voltage',
+               'bus_type')
+_LINE_FIELDS = ('source', 'destination', 'distributed_impedance', 'shunt_admittance', 'max_power', 'in_service')
+
+
+class CachedPowerSystemBuilder(power_system_builder.PowerSystemBuilder):
+    """A power system builder that loads cases from a cache, building and caching them on a miss.
+
+    The builder accepts the same arguments as power_system_builder.create_builder. The underlying builder is only
+    created, and its input only parsed, if the case is not already cached.
+    """
+
+    def __init__(self, cache_directory, filename, start_voltage=power_system_builder.FLAT_START_VOLTAGE,
+                 power_base=power_system_builder.DEFAULT_POWER_BASE, **options):
+        """Initializes the power system builder.
+
+        Args:
+            cache_directory: The directory containing the cache. It is created if it does not exist.
+            filename: The input filename.
+            start_voltage: The start voltage for PQ buses.
+            power_base: The power base in MVA, if the input does not specify one.
+            options: Additional options passed to power_system_builder.create_builder.
+        """
+        self._cache_directory = cache_directory
+        self._filename = filename
+        self._start_voltage = start_voltage
+        self._power_base = power_base
+        self._options = options
+        self._path = os.path.join(cache_directory, case_key(filename, start_voltage, power_base, **options))
+        self._metadata = None
+
+    @property
+    def path(self):
+        """Returns the directory of the cache entry for the case."""
+        return self._path
+
+    @property
+    def power_base(self):
+        return self._load_metadata()['power_base']
+
+    @property
+    def swing_bus_number(self):
+        return self._load_metadata()['swing_bus_number']
+
+    def build_buses(self):
+        """Builds a list of buses in the system."""
+        return self.build_system().buses
+
+    def build_lines(self):
+        """Builds a list of lines in the system."""
+        return self.build_system().lines
+
+    def build_system(self):
+        """Loads the power system from the cache, building and caching it first if necessary."""
+        self._load_metadata()
+        bus_data = power_system.BusData(*(self._load_array('bus', name) for name in _BUS_FIELDS))
+        line_data = power_system.LineData(*(self._load_array('line', name) for name in _LINE_FIELDS))
+        bus_orderings = {method: self._load_array('ordering', method) for method in power_system.ORDERING_METHODS}
+        return power_system.PowerSystem.from_data(bus_data, line_data, bus_orderings)
+
+    def _load_array(self, prefix, name):
+        """Memory-maps a cached array copy-on-write."""
+        return numpy.load(os.path.join(self._path, '{}_{}.npy'.format(prefix, name)), mmap_mode='c')
+
+    def _load_metadata(self):
+        """Reads the metadata of the cache entry, building the entry first if it does not exist."""
+        if self._metadata is None:
+            if not os.path.exists(os.path.join(self._path, METADATA_FILENAME)):
+                self._write_entry()
+
+            with open(os.path.join(self._path, METADATA_FILENAME)) as file:
+                self._metadata = json.load(file)
+        return self._metadata
+
+    def _write_entry(self):
+        """Builds the case and writes it to a new cache entry.
+
+        The entry is written to a temporary directory that is then renamed, so other processes never observe a partially
+        written entry. If another process writes the same entry first, its entry is kept.
+        """
+        builder = power_system_builder.create_builder(self._filename, self._start_voltage, self._power_base,
+                                                      **self._options)
+        system = builder.build_system()
+
+        os.makedirs(self._cache_directory, exist_ok=True)
+        directory = tempfile.mkdtemp(dir=self._cache_directory)
+        try:
+            for prefix, data, fields in (('bus', system.bus_data, _BUS_FIELDS),
+                                         ('line', system.line_data, _LINE_FIELDS)):
+                for name in fields:
+                    numpy.save(os.path.join(directory, '{}_{}.npy'.format(prefix, name)), getattr(data, name))
+
+            for method in power_system.ORDERING_METHODS:
+                numpy.save(os.path.join(directory, 'ordering_{}.npy'.format(method)), system.bus_ordering(method))
+
+            with open(os.path.join(directory, METADATA_FILENAME), 'w') as file:
+                json.dump({'source': os.path.abspath(self._filename), 'power_base': builder.power_base,
+                           'swing_bus_number': builder.swing_bus_number}, file)
+
+            os.rename(directory, self._path)
+        except OSError:
+            if not os.path.exists(os.path.join(self._path, METADATA_FILENAME)):
+                raise
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def case_key(filename, start_voltage=power_system_builder.FLAT_START_VOLTAGE,
+             power_base=power_system_builder.DEFAULT_POWER_BASE, **options):
+    """Computes the key of the cache entry for a case.
+
+    Args:
+        filename: The input filename.
+        start_voltage: The start voltage for PQ buses.
+        power_base: The power base in MVA.
+        options: Additional builder options. Options that name a file, such as line_data_filename, are keyed by the
+            state of that file as well as its name.
+
+    Returns:
+        A hexadecimal digest identifying the case.
+    """
+    start_voltage = complex(start_voltage)
+    key = {
+        'version': CACHE_VERSION,
+        'input': _file_state(filename),
+        'start_voltage': [start_voltage.real, start_voltage.imag],
+        'power_base': power_base,
+        'options': {name: _file_state(value) if name.endswith('_filename') and value else value
+                    for name, value in sorted(options.items())},
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+def _file_state(filename):
+    """Returns the absolute path, modification time, and size of a file."""
+    stat = os.stat(filename)
+    return [os.path.abspath(filename), stat.st_mtime_ns, stat.st_size]
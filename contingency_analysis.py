@@ -0,0 +1,426 @@
+"""A program that runs an N-1 contingency analysis on a power system.
+
+The base case is read from an Excel file and solved once. Each single-line outage is then solved on a pool of worker
+processes, starting from the base case voltages. The base case arrays are placed in shared memory, so the workers attach
+to them rather than receiving a pickled copy of the system for each outage. The result is a single table of voltage and
+line rating violations, ranked from most to least severe. Outages that split the system into islands are solved one
+island at a time, and the buses of islands without a generator are reported as de-energized. Outages whose power flow
+diverges are abandoned as soon as divergence is detected, so they do not tie up a worker. When profiling is enabled,
+each worker profiles its outages and the statistics of every worker are added to the profile of the main process.
+
+    python contingency_analysis.py --input_workbook data/Data.xlsx
+"""
+
+import argparse
+import dataclasses
+import island_solver
+import multiprocessing
+import multiprocessing.shared_memory
+import numpy
+import power_flow_solver
+import power_system
+import power_system_builder
+import power_system_reporter
+import profiler
+import tabulate
+import typing
+
+# Input data constants.
+DEFAULT_INPUT_WORKBOOK = 'data/Data.xlsx'
+DEFAULT_BUS_DATA_WORKSHEET_NAME = 'Bus data'
+DEFAULT_LINE_DATA_WORKSHEET_NAME = 'Line data'
+
+# Power flow constants.
+DEFAULT_SWING_BUS_NUMBER = 1
+DEFAULT_POWER_BASE = 100
+DEFAULT_MAX_ACTIVE_POWER_ERROR = 0.1
+DEFAULT_MAX_REACTIVE_POWER_ERROR = 0.1
+DEFAULT_MIN_OPERATING_VOLTAGE = 0.95
+DEFAULT_MAX_OPERATING_VOLTAGE = 1.05
+DEFAULT_MAX_ITERATIONS = 20
+
+# The tolerance used when screening voltages against operating limits, so that generator buses regulated exactly at a
+# limit are not reported due to rounding errors in the solution of an outage.
+VOLTAGE_TOLERANCE = 1e-6
+
+# Violation types.
+NON_CONVERGENCE = 'Non-convergence'
+UNDER_VOLTAGE = 'Under-voltage'
+OVER_VOLTAGE = 'Over-voltage'
+LINE_OVERLOAD = 'Line overload'
+DE_ENERGIZED = 'De-energized'
+
+TABULATE_FLOAT_FMT = '.4f'
+
+# The line data fields, in the order expected by the LineData constructor.
+_LINE_FIELDS = ('source', 'destination', 'distributed_impedance', 'shunt_admittance', 'max_power', 'in_service')
+
+
+@dataclasses.dataclass(frozen=True)
+class ContingencyOptions:
+    """Options used to solve each contingency and detect violations. Power quantities are in per-unit."""
+    swing_bus_number: int = DEFAULT_SWING_BUS_NUMBER
+    max_active_power_error: float = DEFAULT_MAX_ACTIVE_POWER_ERROR / DEFAULT_POWER_BASE
+    max_reactive_power_error: float = DEFAULT_MAX_REACTIVE_POWER_ERROR / DEFAULT_POWER_BASE
+    min_operating_voltage: float = DEFAULT_MIN_OPERATING_VOLTAGE
+    max_operating_voltage: float = DEFAULT_MAX_OPERATING_VOLTAGE
+    max_iterations: int = DEFAULT_MAX_ITERATIONS
+    damping: str = None
+
+
+@dataclasses.dataclass(frozen=True)
+class Violation:
+    """A violation of an operating limit.
+
+    The severity is the amount by which the limit is exceeded, as a percentage of the limit. Non-convergence is
+    considered to be infinitely severe.
+    """
+    kind: str
+    element: str
+    value: float
+    limit: float
+    severity: float
+
+
+@dataclasses.dataclass(frozen=True)
+class ContingencyResult:
+    """The result of solving the power flow for a line outage."""
+    line_index: int
+    line_name: str
+    converged: bool
+    iterations: int
+    violations: typing.List[Violation]
+
+
+def solve(system, options):
+    """Solves the power flow for a system, starting from its current bus voltages.
+
+    If the system is split into islands, each island is solved separately. The system converges if every island that
+    has a generator converges; islands without a generator are de-energized. A power flow that diverges does not
+    converge, and stops at the iteration at which divergence is detected.
+
+    Args:
+        system: The power system to solve.
+        options: The contingency analysis options.
+
+    Returns:
+        A tuple containing whether the power flow converged and the number of iterations executed.
+    """
+    if len(system.islands()) > 1:
+        island_options = island_solver.IslandOptions(options.max_active_power_error, options.max_reactive_power_error,
+                                                     options.max_iterations, options.damping, max_workers=1)
+        results = island_solver.solve_islands(system, [options.swing_bus_number], island_options)
+        converged = all(result.status in (island_solver.SOLVED, island_solver.DE_ENERGIZED) for result in results)
+        return converged, max(result.iterations for result in results)
+
+    summaries = []
+    try:
+        solver = power_flow_solver.PowerFlowSolver(system, options.swing_bus_number, options.max_active_power_error,
+                                                   options.max_reactive_power_error, damping=options.damping)
+        converged = solver.solve(options.max_iterations, callback=summaries.append)
+    except power_flow_solver.SOLVE_ERRORS:
+        # The power flow diverged or the Jacobian is singular, e.g. because the outage caused a voltage collapse.
+        converged = False
+
+    iterations = summaries[-1].iteration if summaries else 0
+    return converged and bool(numpy.all(numpy.isfinite(system.bus_data.voltage))), iterations
+
+
+@profiler.profiled('find_violations')
+def find_violations(system, options, power_base, line_names=None):
+    """Finds bus voltage and line rating violations in a solved power system.
+
+    Buses without voltage are reported as de-energized rather than under-voltage. Voltages within VOLTAGE_TOLERANCE of
+    an operating limit are not reported.
+
+    Args:
+        system: The solved power system.
+        options: The contingency analysis options.
+        power_base: The power base in MVA.
+        line_names: The name of each line of the system, e.g. as named in the base case of an outage. If unspecified,
+            the lines are named by power_system_reporter.line_names, with circuit numbers.
+
+    Returns:
+        A list of violations.
+    """
+    violations = []
+    voltages = power_system_reporter.bus_voltages(system, options.min_operating_voltage, options.max_operating_voltage,
+                                                  VOLTAGE_TOLERANCE)
+    magnitudes = voltages.magnitude
+    de_energized = magnitudes == 0
+    for index in numpy.flatnonzero(de_energized):
+        violations.append(Violation(DE_ENERGIZED, 'Bus {}'.format(system.bus_data.number[index]), 0.0,
+                                    options.min_operating_voltage, 100.0))
+
+    for index in numpy.flatnonzero(voltages.under_voltage & ~de_energized):
+        limit = options.min_operating_voltage
+        violations.append(Violation(UNDER_VOLTAGE, 'Bus {}'.format(system.bus_data.number[index]),
+                                    magnitudes[index], limit, 100 * (limit - magnitudes[index]) / limit))
+
+    for index in numpy.flatnonzero(voltages.over_voltage):
+        limit = options.max_operating_voltage
+        violations.append(Violation(OVER_VOLTAGE, 'Bus {}'.format(system.bus_data.number[index]),
+                                    magnitudes[index], limit, 100 * (magnitudes[index] - limit) / limit))
+
+    flows = power_system_reporter.line_flows(system, power_base)
+    loading = flows.loading
+    overloaded = numpy.flatnonzero(flows.exceeds_rating)
+    if len(overloaded) and line_names is None:
+        line_names = power_system_reporter.line_names(system, circuits=True)
+    for index in overloaded:
+        limit = system.line_data.max_power[index]
+        violations.append(Violation(LINE_OVERLOAD, 'Line {}'.format(line_names[index]), loading[index], limit,
+                                    100 * (loading[index] - limit) / limit))
+
+    return violations
+
+
+class _SharedArrays:
+    """A set of named arrays copied into shared memory blocks."""
+
+    def __init__(self, arrays):
+        """Copies arrays into newly created shared memory blocks.
+
+        Args:
+            arrays: A dict mapping a name to an array.
+        """
+        self._blocks = []
+        self.spec = {}
+        for name, array in arrays.items():
+            block = multiprocessing.shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            numpy.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+            self._blocks.append(block)
+            self.spec[name] = (block.name, array.shape, array.dtype.str)
+
+    def close(self):
+        """Releases the shared memory blocks."""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+
+
+def _attach(spec):
+    """Attaches to arrays in shared memory.
+
+    Args:
+        spec: A dict mapping a name to the shared memory block name, shape, and dtype of an array.
+
+    Returns:
+        A tuple containing a dict mapping a name to an array, and a list of the attached shared memory blocks. The
+        blocks must be kept alive as long as the arrays are in use.
+    """
+    arrays = {}
+    blocks = []
+    for name, (block_name, shape, dtype) in spec.items():
+        block = multiprocessing.shared_memory.SharedMemory(name=block_name)
+        arrays[name] = numpy.ndarray(shape, numpy.dtype(dtype), buffer=block.buf)
+        blocks.append(block)
+    return arrays, blocks
+
+
+# The state of each worker process, set by the pool initializer.
+_worker_state = {}
+
+
+def _initialize_worker(spec, options, power_base, trace_memory=None):
+    """Attaches a worker process to the base case arrays.
+
+    Args:
+        spec: The shared memory spec of the base case arrays.
+        options: The contingency analysis options.
+        power_base: The power base in MVA.
+        trace_memory: If not None, outages are profiled, and memory is traced if true.
+    """
+    arrays, blocks = _attach(spec)
+    worker_profiler = None if trace_memory is None else profiler.Profiler(trace_memory)
+    base_case = power_system.PowerSystem.from_data(
+        power_system.BusData(arrays['bus_number'], arrays['active_power_consumed'], arrays['reactive_power_consumed'],
+                             arrays['active_power_generated'], arrays['voltage'], arrays['bus_type']),
+        power_system.LineData(*(arrays[name] for name in _LINE_FIELDS)))
+    _worker_state.update(arrays=arrays, blocks=blocks, options=options, power_base=power_base, profiler=worker_profiler,
+                         line_names=power_system_reporter.line_names(base_case, circuits=True))
+
+
+def _solve_profiled_outage(line_index):
+    """Solves the power flow for a line outage in a worker process with profiling enabled.
+
+    Returns:
+        A tuple containing the contingency result and the profile statistics of the outage.
+    """
+    worker_profiler = _worker_state['profiler']
+    with profiler.enable(worker_profiler):
+        result = _solve_outage(line_index)
+    return result, worker_profiler.take()
+
+
+def _solve_outage(line_index):
+    """Solves the power flow for a line outage in a worker process.
+
+    The bus loads, generation, and fill-reducing bus ordering are used directly from shared memory, while the voltages
+    are copied from the base case solution so that they may be updated by the solver.
+
+    Args:
+        line_index: The index of the line that is out of service.
+
+    Returns:
+        The contingency result.
+    """
+    arrays = _worker_state['arrays']
+    options = _worker_state['options']
+    bus_data = power_system.BusData(arrays['bus_number'], arrays['active_power_consumed'],
+                                    arrays['reactive_power_consumed'], arrays['active_power_generated'],
+                                    arrays['voltage'].copy(), arrays['bus_type'])
+    line_data = power_system.LineData(*(numpy.delete(arrays[name], line_index) for name in _LINE_FIELDS))
+    # An outage only removes an edge from the graph of the base case, so the base case ordering still limits fill-in.
+    system = power_system.PowerSystem.from_data(bus_data, line_data,
+                                                {power_flow_solver.DEFAULT_ORDERING: arrays['bus_ordering']})
+
+    # The remaining lines keep their base case names, so each line has the same name in every outage.
+    names = _worker_state['line_names']
+    converged, iterations = solve(system, options)
+    if not converged:
+        violation = Violation(NON_CONVERGENCE, 'System', numpy.nan, numpy.nan, numpy.inf)
+        return ContingencyResult(line_index, names[line_index], False, iterations, [violation])
+
+    violations = find_violations(system, options, _worker_state['power_base'],
+                                 names[:line_index] + names[line_index + 1:])
+    return ContingencyResult(line_index, names[line_index], True, iterations, violations)
+
+
+def run_contingency_analysis(system, options, power_base, processes=None):
+    """Solves the power flow for each single-line outage of a solved base case.
+
+    Args:
+        system: The base case power system. Its bus voltages are used as the starting point for each outage.
+        options: The contingency analysis options.
+        power_base: The power base in MVA.
+        processes: The number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        A list containing the result of each outage, in line order.
+    """
+    active_profiler = profiler.active_profiler()
+    bus_data = system.bus_data
+    arrays = {
+        'bus_number': bus_data.number,
+        'active_power_consumed': bus_data.active_power_consumed,
+        'reactive_power_consumed': bus_data.reactive_power_consumed,
+        'active_power_generated': bus_data.active_power_generated,
+        'voltage': bus_data.voltage,
+        'bus_type': bus_data.bus_type,
+        'bus_ordering': system.bus_ordering(power_flow_solver.DEFAULT_ORDERING),
+    }
+    arrays.update({name: getattr(system.line_data, name) for name in _LINE_FIELDS})
+
+    shared_arrays = _SharedArrays(arrays)
+    try:
+        trace_memory = None if active_profiler is None else active_profiler.trace_memory
+        with multiprocessing.Pool(processes, _initialize_worker,
+                                  (shared_arrays.spec, options, power_base, trace_memory)) as pool:
+            if active_profiler is None:
+                return pool.map(_solve_outage, range(len(system.line_data)))
+
+            results = []
+            for result, stats in pool.map(_solve_profiled_outage, range(len(system.line_data))):
+                active_profiler.merge(stats)
+                results.append(result)
+            return results
+    finally:
+        shared_arrays.close()
+
+
+def violation_report(results):
+    """Reports the violations of each outage in a single table, ranked from most to least severe.
+
+    Args:
+        results: A list of contingency results.
+    """
+    rows = [(result, violation) for result in results for violation in result.violations]
+    rows.sort(key=lambda row: row[1].severity, reverse=True)
+
+    headers = ['Rank', 'Outage', 'Violation', 'Element', 'Value', 'Limit', 'Severity (%)']
+    table = []
+    for rank, (result, violation) in enumerate(rows, 1):
+        table.append([rank, 'Line {}'.format(result.line_name), violation.kind, violation.element, violation.value,
+                      violation.limit, violation.severity])
+
+    return tabulate.tabulate(table, headers=headers, floatfmt=TABULATE_FLOAT_FMT)
+
+
+def parse_arguments():
+    """Parses command line arguments.
+
+    Returns:
+        An object containing program arguments.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--input_workbook', default=DEFAULT_INPUT_WORKBOOK,
+                        help='An Excel workbook containing bus and line data for the base case.')
+    parser.add_argument('--bus_data_worksheet', default=DEFAULT_BUS_DATA_WORKSHEET_NAME,
+                        help='The name of the worksheet containing bus data.')
+    parser.add_argument('--line_data_worksheet', default=DEFAULT_LINE_DATA_WORKSHEET_NAME,
+                        help='The name of the worksheet containing line data.')
+    parser.add_argument('--swing_bus_number', type=int, default=DEFAULT_SWING_BUS_NUMBER, help='The swing bus number.')
+    parser.add_argument('--power_base', type=float, default=DEFAULT_POWER_BASE, help='The base power quantity in MVA.')
+    parser.add_argument('--max_active_power_error', type=float, default=DEFAULT_MAX_ACTIVE_POWER_ERROR,
+                        help='The maximum allowed mismatch between computed and actual megawatts at each bus.')
+    parser.add_argument('--max_reactive_power_error', type=float, default=DEFAULT_MAX_REACTIVE_POWER_ERROR,
+                        help='The maximum allowed mismatch between computed and actual megavars at each bus.')
+    parser.add_argument('--min_operating_voltage', type=float, default=DEFAULT_MIN_OPERATING_VOLTAGE,
+                        help='The minimum acceptable per-unit voltage magnitude at a bus.')
+    parser.add_argument('--max_operating_voltage', type=float, default=DEFAULT_MAX_OPERATING_VOLTAGE,
+                        help='The maximum acceptable per-unit voltage magnitude at a bus.')
+    parser.add_argument('--max_iterations', type=int, default=DEFAULT_MAX_ITERATIONS,
+                        help='The maximum number of iterations before an outage is considered not to converge.')
+    parser.add_argument('--damping', choices=power_flow_solver.DAMPING_METHODS,
+                        help='The method used to damp each Newton-Raphson correction (default: no damping).')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='The number of worker processes (default: the number of CPUs).')
+    parser.add_argument('--profile', action='store_true',
+                        help='Report the time, call count, and peak memory of each phase, summed over all outages.')
+    parser.add_argument('--profile_json', help='A JSON file to which the profile of each phase is written.')
+    return parser.parse_args()
+
+
+def main():
+    """Reads a base case from an input file and runs a contingency analysis on it."""
+    args = parse_arguments()
+    if not args.profile and not args.profile_json:
+        run(args)
+        return
+
+    with profiler.enable() as active_profiler:
+        run(args)
+
+    if args.profile:
+        print(active_profiler.report())
+    if args.profile_json:
+        with open(args.profile_json, 'w') as file:
+            active_profiler.dump(file)
+
+
+def run(args):
+    """Solves the base case and each outage and prints the violation report.
+
+    Args:
+        args: The program arguments.
+    """
+    with profiler.phase('build_system'):
+        builder = power_system_builder.ExcelPowerSystemBuilder(
+            args.input_workbook, args.bus_data_worksheet, args.line_data_worksheet, power_base=args.power_base)
+        system = builder.build_system()
+    options = ContingencyOptions(args.swing_bus_number, args.max_active_power_error / args.power_base,
+                                 args.max_reactive_power_error / args.power_base, args.min_operating_voltage,
+                                 args.max_operating_voltage, args.max_iterations, args.damping)
+
+    converged, iterations = solve(system, options)
+    if not converged:
+        raise SystemExit('The base case did not converge after {} iterations.'.format(iterations))
+
+    results = run_contingency_analysis(system, options, args.power_base, args.processes)
+    with profiler.phase('reports'):
+        print(violation_report(results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,375 @@
+"""A program that traces the PV curves of a power system with a continuation power flow and finds its loading limit.
+
+As the loads of a system increase, the Newton-Raphson Jacobian becomes singular at the point of maximum loadability,
+the "nose" of the PV curves, and a plain power flow stops converging before reaching it. A continuation power flow
+adds the loading level lambda to the unknowns and traces the curves through the nose in a single pass:
+
+    F(x, lambda) = S_base + lambda * K - S(x) = 0
+
+where x contains the voltage phase angles and magnitudes, S(x) are the computed power injections, and K is the
+direction in which the specified injections change as the loading increases. Each point is found in two stages:
+
+    1. Predictor: a step of length sigma is taken along the tangent of the curve, found by solving
+
+           [ J  -K ] [ dx      ]   [  0 ]
+           [  e_k  ] [ dlambda ] = [ +-1 ]
+
+       where J is the power flow Jacobian and e_k selects the continuation parameter, the unknown changing fastest.
+
+    2. Corrector: Newton-Raphson iterations solve F(x, lambda) = 0 with the continuation parameter held at its
+       predicted value. Near the nose the parameter is a voltage magnitude rather than lambda, which keeps the
+       augmented Jacobian nonsingular.
+
+The augmented Jacobian factorized by the last corrector iteration is reused to compute the tangent at the next point.
+The step length grows while the corrector converges quickly and is halved when it fails to converge.
+
+    python continuation_power_flow.py --input_workbook data/Data.xlsx
+"""
+
+import argparse
+import dataclasses
+import numpy
+import power_flow_solver
+import power_system_builder
+import scipy.sparse
+import tabulate
+import typing
+
+# Input data constants.
+DEFAULT_INPUT_WORKBOOK = 'data/Data.xlsx'
+DEFAULT_BUS_DATA_WORKSHEET_NAME = 'Bus data'
+DEFAULT_LINE_DATA_WORKSHEET_NAME = 'Line data'
+
+# Power flow constants.
+DEFAULT_SWING_BUS_NUMBER = 1
+DEFAULT_POWER_BASE = 100
+DEFAULT_MAX_ACTIVE_POWER_ERROR = 0.1
+DEFAULT_MAX_REACTIVE_POWER_ERROR = 0.1
+
+# Continuation constants.
+DEFAULT_INITIAL_STEP = 0.1
+DEFAULT_MIN_STEP = 0.001
+DEFAULT_MAX_STEP = 0.5
+DEFAULT_MAX_CORRECTOR_ITERATIONS = 10
+DEFAULT_MAX_POINTS = 200
+
+# The step length is doubled after a corrector converges in at most this many iterations.
+FAST_CORRECTOR_ITERATIONS = 3
+
+# Tracing stops once the loading on the lower part of the curves falls below this fraction of the maximum loading.
+DEFAULT_STOP_FRACTION = 0.8
+
+TABULATE_FLOAT_FMT = '.4f'
+
+
+@dataclasses.dataclass(frozen=True)
+class ContinuationOptions:
+    """Options used to trace the PV curves. Power quantities are in per-unit.
+
+    The loads increase in proportion to their base case values. If scale_generation is true, the generation at PV buses
+    increases in proportion as well; otherwise, the swing bus supplies the whole increase.
+    """
+    swing_bus_number: int = DEFAULT_SWING_BUS_NUMBER
+    max_active_power_error: float = DEFAULT_MAX_ACTIVE_POWER_ERROR / DEFAULT_POWER_BASE
+    max_reactive_power_error: float = DEFAULT_MAX_REACTIVE_POWER_ERROR / DEFAULT_POWER_BASE
+    scale_generation: bool = False
+    initial_step: float = DEFAULT_INITIAL_STEP
+    min_step: float = DEFAULT_MIN_STEP
+    max_step: float = DEFAULT_MAX_STEP
+    max_corrector_iterations: int = DEFAULT_MAX_CORRECTOR_ITERATIONS
+    max_points: int = DEFAULT_MAX_POINTS
+    stop_fraction: float = DEFAULT_STOP_FRACTION
+
+
+@dataclasses.dataclass(frozen=True)
+class ContinuationPoint:
+    """A point on the PV curves. The loads at this point are (1 + load_parameter) times their base case values."""
+    load_parameter: float
+    voltage: numpy.ndarray
+    iterations: int
+
+
+@dataclasses.dataclass(frozen=True)
+class ContinuationResult:
+    """The traced PV curves. The nose is the point with the largest load parameter."""
+    points: typing.List[ContinuationPoint]
+    nose: ContinuationPoint
+    factorizations: int
+    factorizations_saved: int
+
+
+class ContinuationPowerFlow:
+    """A continuation power flow built on the Newton-Raphson power flow solver."""
+
+    def __init__(self, system, options=ContinuationOptions()):
+        """Initializes the continuation power flow.
+
+        Args:
+            system: The base case power system. The base case is solved starting from its bus voltages.
+            options: The continuation options.
+        """
+        self._system = system
+        self._options = options
+        self._solver = power_flow_solver.PowerFlowSolver(system, options.swing_bus_number,
+                                                         options.max_active_power_error,
+                                                         options.max_reactive_power_error)
+
+        bus_data = system.bus_data
+        self._base_active_power_consumed = bus_data.active_power_consumed.copy()
+        self._base_reactive_power_consumed = bus_data.reactive_power_consumed.copy()
+        self._base_active_power_generated = bus_data.active_power_generated.copy()
+
+        active_power_direction = -self._base_active_power_consumed
+        if options.scale_generation:
+            active_power_direction = active_power_direction + self._base_active_power_generated
+        self._direction = numpy.concatenate([active_power_direction[self._solver.pv_pq_indices],
+                                             -self._base_reactive_power_consumed[self._solver.pq_indices]])
+
+        self._load_parameter = 0.0
+        self._factorizations = 0
+        self._factorizations_saved = 0
+
+    def trace(self):
+        """Traces the PV curves from the base case through the nose.
+
+        The loads and generation of the system are restored to their base case values once tracing is complete, and
+        the bus voltages are left at the base case solution.
+
+        Returns:
+            The continuation result.
+
+        Raises:
+            RuntimeError: If the base case does not converge.
+        """
+        points = []
+        try:
+            return self._trace(points)
+        finally:
+            self._set_load_parameter(0.0)
+            if points:
+                self._system.bus_data.voltage[:] = points[0].voltage
+                self._solver.update_buses()
+
+    def _trace(self, points):
+        """Traces the PV curves, appending each point to a list.
+
+        Args:
+            points: An empty list to which the points are appended.
+
+        Returns:
+            The continuation result.
+        """
+        options = self._options
+        converged, iterations, factorization = self._correct(None, 0.0)
+        if not converged:
+            raise RuntimeError('The base case power flow did not converge.')
+
+        points.append(self._point(iterations))
+        parameter_index = len(self._direction)
+        tangent_sign = 1.0
+        step = options.initial_step
+        max_load_parameter = 0.0
+
+        while len(points) < options.max_points:
+            if factorization is None:
+                factorization = self._factorize(parameter_index)
+            else:
+                self._factorizations_saved += 1
+
+            rhs = numpy.zeros(len(self._direction) + 1)
+            rhs[-1] = tangent_sign
+            tangent = factorization.solve(rhs)
+            tangent /= numpy.linalg.norm(tangent)
+            parameter_index = int(numpy.argmax(numpy.abs(tangent)))
+            tangent_sign = numpy.sign(tangent[parameter_index])
+
+            converged, iterations, factorization = self._predict_and_correct(tangent, step, parameter_index)
+            while not converged:
+                step /= 2
+                if step < options.min_step:
+                    return self._result(points)
+                converged, iterations, factorization = self._predict_and_correct(tangent, step, parameter_index)
+
+            points.append(self._point(iterations))
+            max_load_parameter = max(max_load_parameter, self._load_parameter)
+            if iterations <= FAST_CORRECTOR_ITERATIONS:
+                step = min(2 * step, options.max_step)
+
+            if self._load_parameter < options.stop_fraction * max_load_parameter:
+                break
+
+        return self._result(points)
+
+    def _predict_and_correct(self, tangent, step, parameter_index):
+        """Takes a predictor step along the tangent and corrects it, restoring the state if the corrector fails.
+
+        Args:
+            tangent: The unit tangent of the curve at the current point.
+            step: The step length.
+            parameter_index: The index of the continuation parameter.
+
+        Returns:
+            The result of the corrector, as returned by _correct.
+        """
+        voltage = self._system.bus_data.voltage.copy()
+        load_parameter = self._load_parameter
+
+        self._scale_buses(load_parameter + step * tangent[-1])
+        self._solver.apply_corrections(step * tangent[:-1])
+        converged, iterations, factorization = self._correct(parameter_index, None)
+        if not converged:
+            self._system.bus_data.voltage[:] = voltage
+            self._set_load_parameter(load_parameter)
+        return converged, iterations, factorization
+
+    def _correct(self, parameter_index, load_parameter):
+        """Solves the power flow equations with the continuation parameter held fixed.
+
+        Args:
+            parameter_index: The index of the fixed continuation parameter, or None to hold the load parameter fixed at
+                the given value and solve an ordinary power flow.
+            load_parameter: The load parameter, if parameter_index is None.
+
+        Returns:
+            A tuple containing whether the equations were solved, the number of iterations, and the last factorization
+            of the augmented Jacobian, which is None if no iterations were needed.
+        """
+        if parameter_index is None:
+            parameter_index = len(self._direction)
+            self._set_load_parameter(load_parameter)
+
+        factorization = None
+        for iterations in range(self._options.max_corrector_iterations):
+            if self._solver.has_converged():
+                return True, iterations, factorization
+
+            try:
+                factorization = self._factorize(parameter_index)
+                corrections = factorization.solve(numpy.append(self._solver.mismatches(), 0.0))
+            except power_flow_solver.SOLVE_ERRORS:
+                return False, iterations, None
+
+            self._scale_buses(self._load_parameter + corrections[-1])
+            self._solver.apply_corrections(corrections[:-1])
+            if not numpy.all(numpy.isfinite(self._system.bus_data.voltage)):
+                return False, iterations, None
+
+        return self._solver.has_converged(), self._options.max_corrector_iterations, factorization
+
+    def _factorize(self, parameter_index):
+        """Factorizes the augmented Jacobian at the current point.
+
+        Args:
+            parameter_index: The index of the continuation parameter.
+
+        Returns:
+            The factorization.
+        """
+        size = len(self._direction) + 1
+        direction = self._direction[:, numpy.newaxis]
+        selection = numpy.zeros((1, size))
+        selection[0, parameter_index] = 1
+        jacobian = self._solver.jacobian()
+        if scipy.sparse.issparse(jacobian):
+            augmented = scipy.sparse.bmat([[jacobian, -direction], [selection[:, :-1], selection[:, -1:]]])
+        else:
+            augmented = numpy.block([[jacobian, -direction], [selection]])
+
+        self._factorizations += 1
+        return self._solver.linear_solver.factorize(augmented)
+
+    def _set_load_parameter(self, load_parameter):
+        """Scales the loads, and optionally the generation, of the system for a load parameter."""
+        self._scale_buses(load_parameter)
+        self._solver.update_buses()
+
+    def _scale_buses(self, load_parameter):
+        """Scales the bus data for a load parameter without recomputing the power mismatches."""
+        self._load_parameter = load_parameter
+        bus_data = self._system.bus_data
+        bus_data.active_power_consumed[:] = (1 + load_parameter) * self._base_active_power_consumed
+        bus_data.reactive_power_consumed[:] = (1 + load_parameter) * self._base_reactive_power_consumed
+        if self._options.scale_generation:
+            bus_data.active_power_generated[:] = (1 + load_parameter) * self._base_active_power_generated
+
+    def _point(self, iterations):
+        return ContinuationPoint(self._load_parameter, self._system.bus_data.voltage.copy(), iterations)
+
+    def _result(self, points):
+        nose = max(points, key=lambda point: point.load_parameter)
+        return ContinuationResult(points, nose, self._factorizations, self._factorizations_saved)
+
+
+def pv_curve_report(system, result, power_base, bus_numbers=None):
+    """Reports the total load and bus voltage magnitudes at each traced point, and the maximum loading.
+
+    Args:
+        system: The power system.
+        result: The continuation result.
+        power_base: The power base in MVA.
+        bus_numbers: The buses whose voltages are reported. Defaults to every bus.
+    """
+    indices = system.bus_index_array(system.bus_data.number if bus_numbers is None else bus_numbers)
+    base_load = power_base * numpy.sum(system.bus_data.active_power_consumed)
+    headers = ['Point', 'Load parameter', 'Total load (MW)']
+    headers += ['Bus {} (pu)'.format(number) for number in system.bus_data.number[indices]]
+
+    table = []
+    for number, point in enumerate(result.points, 1):
+        row = [number, point.load_parameter, (1 + point.load_parameter) * base_load]
+        table.append(row + numpy.abs(point.voltage[indices]).tolist())
+
+    nose = result.nose
+    summary = 'Maximum loading: {:.4f} MW (load parameter {:.4f}), lowest voltage {:.4f} pu at bus {}'.format(
+        (1 + nose.load_parameter) * base_load, nose.load_parameter, numpy.min(numpy.abs(nose.voltage)),
+        system.bus_data.number[numpy.argmin(numpy.abs(nose.voltage))])
+    return tabulate.tabulate(table, headers=headers, floatfmt=TABULATE_FLOAT_FMT) + '\n\n' + summary
+
+
+def parse_arguments():
+    """Parses command line arguments.
+
+    Returns:
+        An object containing program arguments.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--input_workbook', default=DEFAULT_INPUT_WORKBOOK,
+                        help='An Excel workbook containing bus and line data for the base case.')
+    parser.add_argument('--bus_data_worksheet', default=DEFAULT_BUS_DATA_WORKSHEET_NAME,
+                        help='The name of the worksheet containing bus data.')
+    parser.add_argument('--line_data_worksheet', default=DEFAULT_LINE_DATA_WORKSHEET_NAME,
+                        help='The name of the worksheet containing line data.')
+    parser.add_argument('--swing_bus_number', type=int, default=DEFAULT_SWING_BUS_NUMBER, help='The swing bus number.')
+    parser.add_argument('--power_base', type=float, default=DEFAULT_POWER_BASE, help='The base power quantity in MVA.')
+    parser.add_argument('--max_active_power_error', type=float, default=DEFAULT_MAX_ACTIVE_POWER_ERROR,
+                        help='The maximum allowed mismatch between computed and actual megawatts at each bus.')
+    parser.add_argument('--max_reactive_power_error', type=float, default=DEFAULT_MAX_REACTIVE_POWER_ERROR,
+                        help='The maximum allowed mismatch between computed and actual megavars at each bus.')
+    parser.add_argument('--scale_generation', action='store_true',
+                        help='Increase generation in proportion to the loads rather than at the swing bus only.')
+    parser.add_argument('--max_step', type=float, default=DEFAULT_MAX_STEP,
+                        help='The maximum step length along the PV curves.')
+    parser.add_argument('--buses', type=int, nargs='+', help='The buses whose voltages are reported (default: all).')
+    return parser.parse_args()
+
+
+def main():
+    """Reads a base case from an input file and traces its PV curves."""
+    args = parse_arguments()
+    builder = power_system_builder.ExcelPowerSystemBuilder(
+        args.input_workbook, args.bus_data_worksheet, args.line_data_worksheet, power_base=args.power_base)
+    system = builder.build_system()
+    options = ContinuationOptions(args.swing_bus_number, args.max_active_power_error / args.power_base,
+                                  args.max_reactive_power_error / args.power_base, args.scale_generation,
+                                  max_step=args.max_step)
+
+    try:
+        result = ContinuationPowerFlow(system, options).trace()
+    except RuntimeError as e:
+        raise SystemExit(str(e))
+
+    print(pv_curve_report(system, result, args.power_base, args.buses))
+
+
+if __name__ == '__main__':
+    main()
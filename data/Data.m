@@ -0,0 +1,54 @@
+function mpc = Data
+% The 12-bus system in Data.xlsx, in MATPOWER format.
+mpc.version = '2';
+mpc.baseMVA = 100;
+
+%% bus data
+%	bus_i	type	Pd	Qd	Gs	Bs	area	Vm	Va	baseKV	zone	Vmax	Vmin
+mpc.bus = [
+	1	3	0	0	0	0	1	1.05	0	138	1	1.06	0.94;
+	2	2	21.7	12.7	0	0	1	1.045	0	138	1	1.06	0.94;
+	3	2	94.2	19	0	0	1	1.01	0	138	1	1.06	0.94;
+	4	1	47.8	-3.9	0	0	1	1	0	138	1	1.06	0.94;
+	5	1	7.6	1.6	0	0	1	1	0	138	1	1.06	0.94;
+	6	1	11.2	7.5	0	0	1	1	0	138	1	1.06	0.94;
+	7	1	29.5	16.6	0	0	1	1	0	138	1	1.06	0.94;
+	8	1	9	5.8	0	0	1	1	0	138	1	1.06	0.94;
+	9	1	3.5	1.8	0	0	1	1	0	138	1	1.06	0.94;
+	10	2	6.1	1.6	0	0	1	1.05	0	138	1	1.06	0.94;
+	11	1	13.5	5.8	0	0	1	1	0	138	1	1.06	0.94;
+	12	2	14.9	5	0	0	1	1.05	0	138	1	1.06	0.94;
+];
+
+%% generator data
+%	bus	Pg	Qg	Qmax	Qmin	Vg	mBase	status	Pmax	Pmin
+mpc.gen = [
+	1	0	0	300	-300	1.05	100	1	300	0;
+	2	40	0	300	-300	1.045	100	1	300	0;
+	3	26	0	300	-300	1.01	100	1	300	0;
+	10	28	0	300	-300	1.05	100	1	300	0;
+	12	30	0	300	-300	1.05	100	1	300	0;
+];
+
+%% branch data
+%	fbus	tbus	r	x	b	rateA	rateB	rateC	ratio	angle	status	angmin	angmax
+mpc.branch = [
+	1	2	0.03876	0.11834	0.0264	47.5	0	0	0	0	1	-360	360;
+	1	2	0.03876	0.11834	0.0264	47.5	0	0	0	0	1	-360	360;
+	1	5	0.05403	0.22304	0.0492	100	0	0	0	0	1	-360	360;
+	2	3	0.04699	0.19797	0.0438	0	0	0	0	0	1	-360	360;
+	2	4	0.05811	0.17632	0.034	0	0	0	0	0	1	-360	360;
+	2	5	0.05695	0.17388	0.0346	0	0	0	0	0	1	-360	360;
+	3	4	0.6701	0.17103	0.0128	0	0	0	0	0	1	-360	360;
+	4	5	0.01335	0.04211	0	0	0	0	0	0	1	-360	360;
+	4	7	0	0.55618	0	0	0	0	0	0	1	-360	360;
+	5	6	0	0.25202	0	0	0	0	0	0	1	-360	360;
+	6	9	0.09498	0.1989	0	0	0	0	0	0	1	-360	360;
+	6	10	0.12291	0.25581	0	0	0	0	0	0	1	-360	360;
+	6	11	0.06615	0.13027	0	0	0	0	0	0	1	-360	360;
+	7	8	0.03181	0.0845	0	0	0	0	0	0	1	-360	360;
+	7	12	0.12711	0.27038	0	0	0	0	0	0	1	-360	360;
+	8	9	0.08205	0.19207	0	0	0	0	0	0	1	-360	360;
+	10	11	0.22092	0.19988	0	0	0	0	0	0	1	-360	360;
+	11	12	0.17093	0.34802	0	0	0	0	0	0	1	-360	360;
+];
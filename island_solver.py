@@ -0,0 +1,188 @@
+"""A module that solves the power flow of each island of a power system independently.
+
+A PowerFlowSolver requires a connected network with a single swing bus: if an outage splits the network into islands,
+the Jacobian of the whole system is singular. The solve_islands function instead finds the islands of the system from
+its lines in service, selects a swing bus for each island, and solves each island as a separate, smaller power flow.
+When several islands need to be solved, they are solved concurrently on a pool of threads.
+
+The swing bus of an island is the first of the designated swing buses that it contains. An island without a designated
+swing bus is assigned its largest generator, unless assignment is disabled. An island without any generator has no
+source of power and is de-energized: its bus voltages are set to zero. Islands that fail to converge keep their start
+voltages, and islands that diverge fail as soon as divergence is detected. The status of every island is reported,
+rather than the whole run failing.
+
+    results = solve_islands(system, swing_bus_numbers=[1])
+    print(island_report(results))
+"""
+
+import concurrent.futures
+import dataclasses
+import numpy
+import power_flow_solver
+import profiler
+import tabulate
+import typing
+
+# Island statuses.
+SOLVED = 'Solved'
+NOT_CONVERGED = 'Not converged'
+NO_SWING_BUS = 'No swing bus'
+DE_ENERGIZED = 'De-energized'
+
+
+@dataclasses.dataclass(frozen=True)
+class IslandOptions:
+    """Options used to solve each island. Power quantities are in per-unit.
+
+    If fast_decoupled is true, the islands are solved with the fast decoupled method, to which damping and Jacobian
+    reuse do not apply.
+    """
+    max_active_power_error: float = power_flow_solver.DEFAULT_MAX_ACTIVE_POWER_ERROR
+    max_reactive_power_error: float = power_flow_solver.DEFAULT_MAX_REACTIVE_POWER_ERROR
+    max_iterations: int = power_flow_solver.DEFAULT_MAX_ITERATIONS
+    damping: str = None
+    assign_swing_buses: bool = True
+    sparse: bool = None
+    max_workers: int = None
+    fast_decoupled: bool = False
+    ordering: str = power_flow_solver.DEFAULT_ORDERING
+    jacobian_reuse: bool = False
+    jacobian_refresh_interval: int = power_flow_solver.DEFAULT_JACOBIAN_REFRESH_INTERVAL
+
+
+@dataclasses.dataclass(frozen=True)
+class IslandResult:
+    """The result of solving the power flow of an island."""
+    bus_numbers: numpy.ndarray
+    swing_bus_number: typing.Optional[int]
+    status: str
+    iterations: int
+
+    @property
+    def converged(self):
+        return self.status == SOLVED
+
+
+def select_swing_bus(system, bus_indices, swing_bus_numbers, assign_swing_buses=True):
+    """Selects the swing bus of an island.
+
+    Args:
+        system: The power system.
+        bus_indices: The indices of the buses of the island.
+        swing_bus_numbers: The designated swing buses.
+        assign_swing_buses: If true, an island without a designated swing bus is assigned its largest generator.
+
+    Returns:
+        The swing bus number, or None if the island has no swing bus.
+    """
+    numbers = system.bus_data.number[bus_indices]
+    designated = numbers[numpy.isin(numbers, list(swing_bus_numbers))]
+    if len(designated):
+        return designated[0].item()
+
+    generation = system.bus_data.active_power_generated[bus_indices]
+    if assign_swing_buses and numpy.any(generation > 0):
+        return numbers[numpy.argmax(generation)].item()
+    return None
+
+
+def solve_islands(system, swing_bus_numbers=(power_flow_solver.DEFAULT_SWING_BUS_NUMBER,), options=IslandOptions()):
+    """Solves the power flow of each island of a system, starting from its current bus voltages.
+
+    The bus voltages of the system are updated with the solution of each island that converges, and set to zero for
+    each island that is de-energized. A swing bus assigned to an island balances the power of the island, so its
+    specified generation is not held.
+
+    Args:
+        system: The power system to solve.
+        swing_bus_numbers: The designated swing buses. Each island may contain at most one of them.
+        options: The island options.
+
+    Returns:
+        A list containing the result of each island, ordered by the first bus of each island.
+    """
+    voltages = system.bus_data.voltage
+    islands = []
+    for bus_indices in system.islands():
+        swing_bus_number = select_swing_bus(system, bus_indices, swing_bus_numbers, options.assign_swing_buses)
+        islands.append((bus_indices, swing_bus_number))
+
+    live_islands = [(bus_indices, swing) for bus_indices, swing in islands if swing is not None]
+
+    # The profiler is not thread safe, so islands are solved one at a time while profiling.
+    if len(live_islands) > 1 and options.max_workers != 1 and profiler.active_profiler() is None:
+        with concurrent.futures.ThreadPoolExecutor(options.max_workers) as executor:
+            solutions = list(executor.map(lambda island: _solve_island(system, *island, options), live_islands))
+    else:
+        solutions = [_solve_island(system, bus_indices, swing, options) for bus_indices, swing in live_islands]
+    solutions = iter(solutions)
+
+    results = []
+    for bus_indices, swing_bus_number in islands:
+        numbers = system.bus_data.number[bus_indices]
+        if swing_bus_number is not None:
+            status, iterations, island_voltages = next(solutions)
+            if status == SOLVED:
+                voltages[bus_indices] = island_voltages
+            results.append(IslandResult(numbers, swing_bus_number, status, iterations))
+        elif numpy.any(system.bus_data.active_power_generated[bus_indices] > 0):
+            results.append(IslandResult(numbers, None, NO_SWING_BUS, 0))
+        else:
+            voltages[bus_indices] = 0
+            results.append(IslandResult(numbers, None, DE_ENERGIZED, 0))
+
+    return results
+
+
+def island_report(results):
+    """Reports the buses, swing bus, and status of each island.
+
+    Args:
+        results: A list of island results.
+    """
+    headers = ['Island', 'Buses', 'Swing Bus', 'Status', 'Iterations']
+    table = []
+    for number, result in enumerate(results, 1):
+        table.append([number, _bus_ranges(result.bus_numbers), result.swing_bus_number, result.status,
+                      result.iterations])
+
+    return tabulate.tabulate(table, headers=headers)
+
+
+def _solve_island(system, bus_indices, swing_bus_number, options):
+    """Solves the power flow of an island.
+
+    Returns:
+        A tuple containing the status of the island, the number of iterations executed, and the voltages of its buses.
+    """
+    island = system.subsystem(bus_indices)
+    summaries = []
+    try:
+        if options.fast_decoupled:
+            solver = power_flow_solver.FastDecoupledPowerFlowSolver(
+                island, swing_bus_number, options.max_active_power_error, options.max_reactive_power_error,
+                options.sparse, ordering=options.ordering)
+        else:
+            solver = power_flow_solver.PowerFlowSolver(
+                island, swing_bus_number, options.max_active_power_error, options.max_reactive_power_error,
+                options.sparse, jacobian_reuse=options.jacobian_reuse,
+                jacobian_refresh_interval=options.jacobian_refresh_interval, ordering=options.ordering,
+                damping=options.damping)
+        converged = solver.solve(options.max_iterations, callback=summaries.append)
+    except power_flow_solver.SOLVE_ERRORS:
+        converged = False
+
+    iterations = summaries[-1].iteration if summaries else 0
+    if converged and numpy.all(numpy.isfinite(island.bus_data.voltage)):
+        return SOLVED, iterations, island.bus_data.voltage
+    return NOT_CONVERGED, iterations, None
+
+
+def _bus_ranges(numbers):
+    """Formats a sorted list of bus numbers compactly, e.g. '1-3, 7'."""
+    numbers = numpy.sort(numbers)
+    breaks = numpy.flatnonzero(numpy.diff(numbers) != 1) + 1
+    ranges = []
+    for group in numpy.split(numbers, breaks):
+        ranges.append(str(group[0]) if len(group) == 1 else '{}-{}'.format(group[0], group[-1]))
+    return ', '.join(ranges)
@@ -0,0 +1,276 @@
+"""A module containing linear solvers for the Newton-Raphson power flow equations.
+
+Each iteration of a power flow solves the linear system J * dx = x for the voltage corrections dx. Rather than inverting
+the Jacobian, which is slow, numerically inaccurate, and destroys sparsity, the solvers in this module factorize the
+matrix with an LU decomposition and solve by forward and back substitution:
+
+    factorization = DenseLinearSolver().factorize(jacobian)
+    corrections = factorization.solve(errors)
+
+Two backends are provided: a dense LU for small systems and a sparse LU (SuperLU) for large systems, whose cost scales
+with the number of nonzero entries of the Jacobian rather than the cube of its size. When a factorized matrix changes in
+only a few rows and columns, e.g. because a line was taken out of service, the existing factorization may be updated
+with a LowRankUpdatedFactorization instead of factorizing the matrix again.
+
+The fill-in of a sparse LU decomposition depends on the order of the rows and columns of the matrix. SuperLU reorders
+the columns of each matrix it factorizes, but a PermutedLinearSolver may instead apply a fill-reducing ordering computed
+once from the structure of the problem, e.g. the graph of the power system, and keep the original ordering of the
+solution vectors.
+"""
+
+import abc
+import numpy
+import scipy.linalg
+import scipy.sparse
+import scipy.sparse.linalg
+
+# The number of buses at or above which sparse storage and factorization are selected automatically.
+SPARSE_BUS_THRESHOLD = 100
+
+# The pivot threshold used by SuperLU in symmetric mode. A diagonal entry is chosen as the pivot unless it is smaller
+# than this fraction of the largest entry of its column.
+SYMMETRIC_PIVOT_THRESHOLD = 0.1
+
+
+class LinearSolver(abc.ABC):
+    """A solver for the linear systems of a power flow."""
+
+    @abc.abstractmethod
+    def solve(self, matrix, rhs):
+        """Solves the linear system matrix * x = rhs.
+
+        Args:
+            matrix: A square matrix.
+            rhs: The right-hand side vector.
+
+        Returns:
+            The solution vector.
+        """
+
+    @abc.abstractmethod
+    def factorize(self, matrix):
+        """Computes the LU decomposition of a matrix so that it may be reused for several solves.
+
+        Args:
+            matrix: A square matrix.
+
+        Returns:
+            A factorization object with a solve(rhs) method.
+        """
+
+
+class DenseLinearSolver(LinearSolver):
+    """A linear solver that uses a dense LU decomposition."""
+
+    def solve(self, matrix, rhs):
+        """Solves the linear system matrix * x = rhs.
+
+        Args:
+            matrix: A square matrix.
+            rhs: The right-hand side vector.
+
+        Returns:
+            The solution vector.
+        """
+        return numpy.linalg.solve(_dense(matrix), rhs)
+
+    def factorize(self, matrix):
+        """Computes the LU decomposition of a matrix so that it may be reused for several solves.
+
+        Args:
+            matrix: A square matrix.
+
+        Returns:
+            A factorization object with a solve(rhs) method.
+        """
+        return _DenseFactorization(scipy.linalg.lu_factor(_dense(matrix)))
+
+
+class SparseLinearSolver(LinearSolver):
+    """A linear solver that uses a sparse LU decomposition."""
+
+    def __init__(self, permc_spec='COLAMD', symmetric_mode=False):
+        """Initializes the sparse linear solver.
+
+        Args:
+            permc_spec: The column permutation used by SuperLU to reduce fill-in.
+            symmetric_mode: If true, SuperLU permutes the rows of the matrix like its columns and pivots on the diagonal
+                where possible. This preserves a symmetric ordering computed for a matrix with a symmetric structure,
+                such as the Jacobian.
+        """
+        self._permc_spec = permc_spec
+        self._symmetric_mode = symmetric_mode
+
+    def solve(self, matrix, rhs):
+        """Solves the linear system matrix * x = rhs.
+
+        Args:
+            matrix: A square matrix.
+            rhs: The right-hand side vector.
+
+        Returns:
+            The solution vector.
+        """
+        return scipy.sparse.linalg.spsolve(_sparse(matrix), rhs, permc_spec=self._permc_spec)
+
+    def factorize(self, matrix):
+        """Computes the LU decomposition of a matrix so that it may be reused for several solves.
+
+        Args:
+            matrix: A square matrix.
+
+        Returns:
+            A factorization object with a solve(rhs) method.
+
+        Raises:
+            numpy.linalg.LinAlgError: If the matrix is singular.
+        """
+        options = {}
+        if self._symmetric_mode:
+            options = dict(diag_pivot_thresh=SYMMETRIC_PIVOT_THRESHOLD, options=dict(SymmetricMode=True))
+
+        try:
+            return scipy.sparse.linalg.splu(_sparse(matrix), permc_spec=self._permc_spec, **options)
+        except RuntimeError as error:
+            # SuperLU reports a singular matrix with a RuntimeError.
+            raise numpy.linalg.LinAlgError(str(error)) from error
+
+
+class PermutedLinearSolver(LinearSolver):
+    """A linear solver that symmetrically permutes the rows and columns of each matrix before factorizing it.
+
+    The permutation is applied to the right-hand side and reverted on the solution, so solutions are returned in the
+    original order of the variables.
+    """
+
+    def __init__(self, permutation, solver=None):
+        """Initializes the permuted linear solver.
+
+        Args:
+            permutation: An array containing the index of each variable, in the order in which it is factorized.
+            solver: The linear solver applied to the permuted matrices. If unspecified, a sparse LU solver is used that
+                keeps the permutation, rather than computing its own column ordering.
+        """
+        self._permutation = numpy.asarray(permutation, dtype=int)
+        self._solver = solver or SparseLinearSolver(permc_spec='NATURAL', symmetric_mode=True)
+
+    def solve(self, matrix, rhs):
+        """Solves the linear system matrix * x = rhs.
+
+        Args:
+            matrix: A square matrix.
+            rhs: The right-hand side vector.
+
+        Returns:
+            The solution vector.
+        """
+        return self.factorize(matrix).solve(rhs)
+
+    def factorize(self, matrix):
+        """Computes the LU decomposition of the permuted matrix so that it may be reused for several solves.
+
+        Args:
+            matrix: A square matrix.
+
+        Returns:
+            A factorization object with a solve(rhs) method.
+        """
+        if scipy.sparse.issparse(matrix):
+            permuted = _sparse(matrix)[self._permutation, :][:, self._permutation]
+        else:
+            permuted = numpy.asarray(matrix)[numpy.ix_(self._permutation, self._permutation)]
+        return _PermutedFactorization(self._solver.factorize(permuted), self._permutation)
+
+
+class _DenseFactorization:
+    """A dense LU factorization."""
+
+    def __init__(self, lu_and_pivots):
+        self._lu_and_pivots = lu_and_pivots
+
+    def solve(self, rhs):
+        """Solves the factorized linear system for a right-hand side vector."""
+        return scipy.linalg.lu_solve(self._lu_and_pivots, rhs)
+
+
+class _PermutedFactorization:
+    """A factorization of a symmetrically permuted matrix."""
+
+    def __init__(self, factorization, permutation):
+        self._factorization = factorization
+        self._permutation = permutation
+
+    def solve(self, rhs):
+        """Solves the factorized linear system for a right-hand side vector or matrix, in the original order."""
+        permuted_solution = self._factorization.solve(numpy.asarray(rhs)[self._permutation])
+        solution = numpy.empty_like(permuted_solution)
+        solution[self._permutation] = permuted_solution
+        return solution
+
+
+class LowRankUpdatedFactorization:
+    """A factorization of a matrix that differs from an already factorized matrix in a few rows and columns.
+
+    The updated matrix is A + U * D * V^T, where A is the factorized matrix, D is a small dense matrix, and U and V
+    select the changed rows and columns. The updated system is solved against the factorization of A using the Woodbury
+    identity:
+
+        (A + U * W)^(-1) = A^(-1) - A^(-1) * U * (I + W * A^(-1) * U)^(-1) * W * A^(-1),  W = D * V^T
+
+    Constructing the update costs one solve against A for each changed row, and each subsequent solve costs one solve
+    against A plus a small dense solve. Updates may be stacked by updating an updated factorization, but each layer adds
+    to the cost of every solve, so callers should factorize the updated matrix again once the total rank grows.
+    """
+
+    def __init__(self, factorization, size, rows, cols, delta):
+        """Initializes the updated factorization.
+
+        Args:
+            factorization: The factorization of the original matrix A.
+            size: The size of A.
+            rows: The indices of the changed rows.
+            cols: The indices of the changed columns.
+            delta: The change to the submatrix at the given rows and columns.
+        """
+        self._factorization = factorization
+        self._rank = len(rows) + (factorization.rank if isinstance(factorization, LowRankUpdatedFactorization) else 0)
+        self._cols = numpy.asarray(cols, dtype=int)
+        self._delta = numpy.asarray(delta, dtype=float)
+
+        selection = numpy.zeros((size, len(rows)))
+        selection[rows, numpy.arange(len(rows))] = 1
+        self._solved_selection = factorization.solve(selection)
+        self._capacitance = numpy.eye(len(rows)) + self._delta @ self._solved_selection[self._cols]
+
+    @property
+    def rank(self):
+        """Returns the total rank of the stacked updates applied to the original factorization."""
+        return self._rank
+
+    def solve(self, rhs):
+        """Solves the updated linear system for a right-hand side vector or matrix."""
+        solution = self._factorization.solve(rhs)
+        correction = numpy.linalg.solve(self._capacitance, self._delta @ solution[self._cols])
+        return solution - self._solved_selection @ correction
+
+
+def default_linear_solver(sparse):
+    """Selects a linear solver for a matrix storage format.
+
+    Args:
+        sparse: True if the matrices to be solved are sparse.
+
+    Returns:
+        A linear solver.
+    """
+    return SparseLinearSolver() if sparse else DenseLinearSolver()
+
+
+def _dense(matrix):
+    """Converts a matrix to a dense array."""
+    return matrix.toarray() if scipy.sparse.issparse(matrix) else numpy.asarray(matrix)
+
+
+def _sparse(matrix):
+    """Converts a matrix to compressed sparse column format, as required by SuperLU."""
+    return scipy.sparse.csc_matrix(matrix)
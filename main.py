@@ -50,10 +50,15 @@ Program arguments: In addition to bus and line data, power flow analysis require
 """
 
 import argparse
+import case_cache
+import island_solver
 import numpy
 import power_flow_solver
+import power_system
 import power_system_builder
 import power_system_reporter
+import profiler
+import warm_start_store
 
 # Input data constants.
 DEFAULT_INPUT_WORKBOOK = 'data/Data.xlsx'
@@ -68,6 +73,24 @@ DEFAULT_MAX_ACTIVE_POWER_ERROR = 0.1
 DEFAULT_MAX_REACTIVE_POWER_ERROR = 0.1
 DEFAULT_MIN_OPERATING_VOLTAGE = 0.95
 DEFAULT_MAX_OPERATING_VOLTAGE = 1.05
+DEFAULT_JACOBIAN_REFRESH_INTERVAL = power_flow_solver.DEFAULT_JACOBIAN_REFRESH_INTERVAL
+DEFAULT_MAX_ITERATIONS = power_flow_solver.DEFAULT_MAX_ITERATIONS
+
+# Power flow solution methods.
+NEWTON_RAPHSON = 'newton_raphson'
+FAST_DECOUPLED = 'fast_decoupled'
+DC = 'dc'
+SOLVERS = {
+    NEWTON_RAPHSON: power_flow_solver.PowerFlowSolver,
+    FAST_DECOUPLED: power_flow_solver.FastDecoupledPowerFlowSolver,
+}
+METHODS = sorted(list(SOLVERS) + [DC])
+DEFAULT_METHOD = NEWTON_RAPHSON
+
+# Fill-reducing bus orderings. With no bus ordering, SuperLU orders the columns of each sparse matrix itself.
+NO_ORDERING = 'none'
+ORDERINGS = power_system.ORDERING_METHODS + (NO_ORDERING,)
+DEFAULT_ORDERING = power_flow_solver.DEFAULT_ORDERING
 
 
 def parse_arguments():
@@ -78,12 +101,16 @@ def parse_arguments():
     """
     parser = argparse.ArgumentParser()
     parser.add_argument('--input_workbook', default=DEFAULT_INPUT_WORKBOOK,
-                        help='An Excel workbook containing bus and line data.')
+                        help='An Excel workbook, CSV bus data file, MATPOWER case (.m), or PSS/E RAW case (.raw).')
     parser.add_argument('--bus_data_worksheet', default=DEFAULT_BUS_DATA_WORKSHEET_NAME,
                         help='The name of the worksheet containing bus data.')
     parser.add_argument('--line_data_worksheet', default=DEFAULT_LINE_DATA_WORKSHEET_NAME,
                         help='The name of the worksheet containing line data.')
-    parser.add_argument('--swing_bus_number', type=int, default=DEFAULT_SWING_BUS_NUMBER, help='The swing bus number.')
+    parser.add_argument('--line_data_file', help='The CSV file containing line data, if the input is a CSV file.')
+    parser.add_argument('--case_cache', help='A directory in which parsed cases are cached for faster loading.')
+    parser.add_argument('--swing_bus_number', type=int,
+                        help='The swing bus number (default: the swing bus of the case, or {}).'.format(
+                            DEFAULT_SWING_BUS_NUMBER))
     parser.add_argument('--start_voltage_magnitude', type=float, default=numpy.abs(DEFAULT_START_VOLTAGE),
                         help='The initial voltage magnitude in volts to use when solving the power flow.')
     parser.add_argument('--start_voltage_angle', type=float, default=numpy.rad2deg(numpy.angle(DEFAULT_START_VOLTAGE)),
@@ -97,37 +124,191 @@ def parse_arguments():
                         help='The minimum acceptable per-unit voltage magnitude at a bus.')
     parser.add_argument('--max_operating_voltage', type=float, default=DEFAULT_MAX_OPERATING_VOLTAGE,
                         help='The maximum acceptable per-unit voltage magnitude at a bus.')
+    parser.add_argument('--sparse', action='store_true', default=None,
+                        help='Use sparse matrices and a sparse LU solver (by default, chosen from the system size).')
+    parser.add_argument('--ordering', choices=ORDERINGS, default=DEFAULT_ORDERING,
+                        help='The fill-reducing bus ordering applied to sparse matrices before they are factorized.')
+    parser.add_argument('--method', choices=METHODS, default=DEFAULT_METHOD,
+                        help='The method used to solve the power flow.')
+    parser.add_argument('--dc_start', action='store_true',
+                        help='Start the power flow from the phase angles of a DC power flow solution, unless it is '
+                             'warm-started from a recorded solution.')
+    parser.add_argument('--max_iterations', type=int, default=DEFAULT_MAX_ITERATIONS,
+                        help='The maximum number of iterations before the power flow is considered not to converge.')
+    parser.add_argument('--damping', choices=power_flow_solver.DAMPING_METHODS,
+                        help='The method used to damp each Newton-Raphson correction (default: no damping).')
+    parser.add_argument('--jacobian_reuse', action='store_true',
+                        help='Reuse the factorized Newton-Raphson Jacobian across iterations until convergence stalls.')
+    parser.add_argument('--jacobian_refresh_interval', type=int,
+                        help='The maximum number of iterations that reuse a single Jacobian factorization (default: '
+                             '{}).'.format(DEFAULT_JACOBIAN_REFRESH_INTERVAL))
+    parser.add_argument('--warm_start_store',
+                        help='A directory of solutions used to warm-start the power flow and record its result.')
+    parser.add_argument('--violations_only', action='store_true',
+                        help='Only report buses outside operating limits and lines that exceed their rating.')
+    parser.add_argument('--profile', action='store_true',
+                        help='Report the time, call count, and peak memory of each phase of the run.')
+    parser.add_argument('--profile_json', help='A JSON file to which the profile of each phase is written.')
     return parser.parse_args()
 
 
 def main():
     """Reads an input file containing system data and initiates power flow computations."""
     args = parse_arguments()
+    if not args.profile and not args.profile_json:
+        run(args)
+        return
+
+    with profiler.enable() as active_profiler:
+        run(args)
+
+    if args.profile:
+        print(active_profiler.report())
+    if args.profile_json:
+        with open(args.profile_json, 'w') as file:
+            active_profiler.dump(file)
+
+
+def check_method_options(args):
+    """Exits with an error if an option that does not apply to the selected solution method is specified.
+
+    Args:
+        args: The program arguments.
+    """
+    unsupported = []
+    if args.method != NEWTON_RAPHSON:
+        unsupported += [flag for flag, value in (('--damping', args.damping), ('--jacobian_reuse', args.jacobian_reuse))
+                        if value]
+    if args.method == DC:
+        unsupported += [flag for flag, value in (('--dc_start', args.dc_start),
+                                                 ('--warm_start_store', args.warm_start_store)) if value]
+    if unsupported:
+        raise SystemExit('{} cannot be used with --method {}.'.format(', '.join(unsupported), args.method))
+
+    if args.jacobian_refresh_interval is not None and not args.jacobian_reuse:
+        raise SystemExit('--jacobian_refresh_interval requires --jacobian_reuse.')
+
+
+def run(args):
+    """Builds and solves the power flow and prints system reports.
+
+    Args:
+        args: The program arguments.
+    """
+    check_method_options(args)
+    if args.jacobian_refresh_interval is None:
+        args.jacobian_refresh_interval = DEFAULT_JACOBIAN_REFRESH_INTERVAL
 
     # Build the power system from an input file.
     start_voltage = args.start_voltage_magnitude * numpy.exp(1j * numpy.deg2rad(args.start_voltage_angle))
-    builder = power_system_builder.ExcelPowerSystemBuilder(
-        args.input_workbook, args.bus_data_worksheet, args.line_data_worksheet, start_voltage, args.power_base)
-    system = builder.build_system()
+    builder_options = {'bus_data_worksheet_name': args.bus_data_worksheet,
+                       'line_data_worksheet_name': args.line_data_worksheet, 'line_data_filename': args.line_data_file}
+    with profiler.phase('build_system'):
+        if args.case_cache:
+            builder = case_cache.CachedPowerSystemBuilder(
+                args.case_cache, args.input_workbook, start_voltage, args.power_base, **builder_options)
+        else:
+            builder = power_system_builder.create_builder(
+                args.input_workbook, start_voltage, args.power_base, **builder_options)
+        system = builder.build_system()
+
+    # MATPOWER and RAW cases specify their own power base and swing bus.
+    args.power_base = builder.power_base
+    if args.swing_bus_number is None:
+        args.swing_bus_number = builder.swing_bus_number or DEFAULT_SWING_BUS_NUMBER
+
+    # The linear power flow of the whole system is singular when the network is split into islands.
+    islanded = len(system.islands()) > 1
+    if islanded and (args.method == DC or args.dc_start):
+        raise SystemExit('--method {} and --dc_start do not support a network split into islands.'.format(DC))
+
+    # Solve the linear power flow as the final result.
+    if args.method == DC:
+        dc_solver = power_flow_solver.DcPowerFlowSolver(system, args.swing_bus_number, args.sparse)
+        dc_solver.solve()
+        with profiler.phase('reports'):
+            print(power_system_reporter.bus_voltage_report(
+                system, args.min_operating_voltage, args.max_operating_voltage, args.violations_only))
+            print(power_system_reporter.dc_line_power_report(
+                system, dc_solver.line_flows, args.power_base, args.violations_only))
+        return
+
+    # Start from the nearest previously recorded solution, if any. Otherwise, the phase angles of the linear power flow
+    # may be used as a starting point. A recorded solution is closer to the result, so it takes precedence.
+    store = warm_start_store.WarmStartStore(args.warm_start_store) if args.warm_start_store else None
+    if store is not None and store.warm_start(system, args.swing_bus_number):
+        print('Warm-started from a previous solution.\n')
+    elif args.dc_start:
+        power_flow_solver.DcPowerFlowSolver(system, args.swing_bus_number, args.sparse).solve()
+
+    # A network split into islands is solved one island at a time. Islands that cannot be solved are reported.
+    ordering = None if args.ordering == NO_ORDERING else args.ordering
+    if islanded:
+        island_options = island_solver.IslandOptions(
+            args.max_active_power_error / args.power_base, args.max_reactive_power_error / args.power_base,
+            args.max_iterations, args.damping, sparse=args.sparse, fast_decoupled=args.method == FAST_DECOUPLED,
+            ordering=ordering, jacobian_reuse=args.jacobian_reuse,
+            jacobian_refresh_interval=args.jacobian_refresh_interval)
+        with profiler.phase('solve'):
+            results = island_solver.solve_islands(system, [args.swing_bus_number], island_options)
+        print(island_solver.island_report(results) + '\n')
+
+        if store is not None and all(result.status in (island_solver.SOLVED, island_solver.DE_ENERGIZED)
+                                     for result in results):
+            store.record(system)
+
+        # The bus power estimates of the whole system are computed for the reports, without solving it.
+        solver = power_flow_solver.PowerFlowSolver(system, args.swing_bus_number, island_options.max_active_power_error,
+                                                   island_options.max_reactive_power_error, args.sparse)
+        print_reports(system, solver, args)
+        return
 
     # Initialize the power flow.
-    solver = power_flow_solver.PowerFlowSolver(system, args.swing_bus_number,
-                                               args.max_active_power_error / args.power_base,
-                                               args.max_reactive_power_error / args.power_base)
-
-    # Iterate towards a solution.
-    iteration = 1
-    print(power_system_reporter.largest_power_mismatch_report(iteration, solver.estimates, args.power_base))
-    while not solver.has_converged():
-        solver.step()
-        print(power_system_reporter.largest_power_mismatch_report(iteration, solver.estimates, args.power_base))
-        iteration += 1
-
-    # Produce system reports.
-    print(power_system_reporter.bus_voltage_report(system, args.min_operating_voltage, args.max_operating_voltage))
-    print(power_system_reporter.power_generation_report(
-        solver.estimates, args.power_base, args.max_active_power_error, args.max_reactive_power_error))
-    print(power_system_reporter.line_power_report(system, args.power_base))
+    options = {'ordering': ordering}
+    if args.method == NEWTON_RAPHSON:
+        options['damping'] = args.damping
+    if args.jacobian_reuse:
+        options.update(jacobian_reuse=True, jacobian_refresh_interval=args.jacobian_refresh_interval)
+    solver = SOLVERS[args.method](system, args.swing_bus_number, args.max_active_power_error / args.power_base,
+                                  args.max_reactive_power_error / args.power_base, args.sparse, **options)
+
+    # Iterate towards a solution. The initial mismatches are reported along with those of the first iteration.
+    with profiler.phase('solve'):
+        try:
+            converged = solver.solve(args.max_iterations, callback=lambda summary: print(
+                power_system_reporter.iteration_summary_report(summary, args.power_base, max(summary.iteration, 1))))
+        except power_flow_solver.DivergenceError as error:
+            raise SystemExit('The power flow diverged after {} iterations. {}'.format(error.summary.iteration, error))
+        except power_flow_solver.SOLVE_ERRORS as error:
+            # E.g. the Jacobian is singular, or a correction overflowed.
+            raise SystemExit('The power flow could not be solved: {}'.format(error))
+
+    if not converged:
+        print('The power flow did not converge after {} iterations.\n'.format(args.max_iterations))
+
+    if args.jacobian_reuse:
+        print('Jacobian factorizations: {} ({} saved)\n'.format(solver.factorizations, solver.factorizations_saved))
+
+    if store is not None and converged:
+        store.record(system)
+
+    print_reports(system, solver, args)
+
+
+def print_reports(system, solver, args):
+    """Prints the bus voltage, power generation, and line power reports.
+
+    Args:
+        system: The solved power system.
+        solver: The solver, which holds the bus power estimates.
+        args: The program arguments.
+    """
+    with profiler.phase('reports'):
+        print(power_system_reporter.bus_voltage_report(
+            system, args.min_operating_voltage, args.max_operating_voltage, args.violations_only))
+        print(power_system_reporter.power_generation_report(
+            solver.estimates, args.power_base, args.max_active_power_error, args.max_reactive_power_error))
+        print(power_system_reporter.line_power_report(system, args.power_base, args.violations_only))
 
 
 if __name__ == '__main__':
@@ -1,23 +1,72 @@
 """A module containing a power flow analysis API.
 
 The main object in this module is the PowerFlowSolver, which takes a power system as input and runs iterations of the
-Newton-Raphson method to determine the voltages at each bus, relative to a swing bus. The buses in the power system are
-directly modified and updated at each iteration.
+Newton-Raphson method to determine the voltages at each bus, relative to a swing bus. The bus voltage array of the power
+system is directly modified and updated at each iteration. The FastDecoupledPowerFlowSolver has the same interface, but
+runs iterations of the fast decoupled load flow method instead. The DcPowerFlowSolver computes an approximate linear
+solution for phase angles and active power line flows in a single step.
 
     system = build_system()
     solver = PowerFlowSolver(system)
     while not solver.has_converged():
         solver.step()
+
+Alternatively, solve() iterates until convergence and reports the progress of each iteration to a callback and to any
+registered observers as an IterationSummary, which is computed from the mismatch arrays without building per-bus
+estimates.
+
+    solver.add_observer(lambda summary: print(summary.iteration, summary.max_active_power_error))
+    converged = solver.solve(max_iterations=20)
+
+solve() also watches the trend of the largest power mismatch and raises a DivergenceError as soon as the power flow is
+clearly diverging, rather than running to the iteration limit. The Newton-Raphson corrections may be damped with the
+optimal multiplier or a backtracking line search, which helps heavily loaded cases converge from a poor start.
 """
 
 import dataclasses
 import enum
+import linear_solver
 import numpy
 import power_system
+import profiler
+import scipy.sparse
 
 DEFAULT_SWING_BUS_NUMBER = 1
 DEFAULT_MAX_ACTIVE_POWER_ERROR = 0.001
 DEFAULT_MAX_REACTIVE_POWER_ERROR = 0.001
+DEFAULT_MAX_ITERATIONS = 20
+
+# The Jacobian reuse policy. A reused factorization is refreshed after this many steps, or as soon as a step fails to
+# reduce the largest power mismatch by at least this ratio.
+DEFAULT_JACOBIAN_REFRESH_INTERVAL = 5
+DEFAULT_JACOBIAN_STALL_RATIO = 0.5
+
+# The largest total rank of the low-rank updates stacked on a factorization by line changes. A line change that would
+# exceed it discards the factorization instead, so the cost of each solve stays bounded however many lines change.
+MAX_LOW_RANK_UPDATE_RANK = 32
+
+# The fill-reducing bus ordering applied to sparse matrices before they are factorized.
+DEFAULT_ORDERING = power_system.MINIMUM_DEGREE
+
+# Damping methods. The optimal multiplier scales each Newton-Raphson correction to minimize a quadratic model of the
+# power mismatches along it, while the line search halves the correction until the power mismatches decrease.
+OPTIMAL_MULTIPLIER = 'optimal_multiplier'
+LINE_SEARCH = 'line_search'
+DAMPING_METHODS = (OPTIMAL_MULTIPLIER, LINE_SEARCH)
+DEFAULT_MIN_STEP_SIZE = 1 / 16
+
+# The fraction of the decrease predicted by the Jacobian that a line search step must achieve to be accepted.
+LINE_SEARCH_DECREASE_RATIO = 1e-4
+
+# Divergence detection. A power flow diverges if its largest power mismatch fails to reach a new minimum in this many
+# consecutive iterations, or grows to this ratio of its initial value.
+DEFAULT_DIVERGENCE_WINDOW = 4
+DEFAULT_DIVERGENCE_RATIO = 1e3
+
+# Fast decoupled load flow variants.
+XB = 'XB'
+BX = 'BX'
+DEFAULT_FAST_DECOUPLED_VARIANT = BX
 
 
 class BusType(enum.Enum):
@@ -39,12 +88,49 @@ class _BusEstimate:
     reactive_power_error: float
 
 
+@dataclasses.dataclass(frozen=True)
+class IterationSummary:
+    """A summary of the state of a power flow solver after an iteration.
+
+    The largest mismatches are signed per-unit values, taken over PV and PQ buses for active power and over PQ buses for
+    reactive power. The step norm is the largest change in any bus voltage during the iteration, in per-unit, and the
+    step size is the fraction of the Newton-Raphson correction that was applied. Both are zero for the initial state.
+    """
+    iteration: int
+    max_active_power_error: float
+    max_active_power_error_bus: int
+    max_reactive_power_error: float
+    max_reactive_power_error_bus: int
+    step_norm: float
+    converged: bool
+    step_size: float = 0.0
+
+
+class DivergenceError(ArithmeticError):
+    """Raised when a power flow diverges. The summary is the summary of the iteration at which divergence was found."""
+
+    def __init__(self, message, summary):
+        super().__init__(message)
+        self.summary = summary
+
+
+# The errors raised by a power flow that cannot be solved: a DivergenceError, a floating point error, or a singular
+# matrix. Drivers that solve many power flows catch these to record a failed solve and move on.
+SOLVE_ERRORS = (ArithmeticError, numpy.linalg.LinAlgError)
+
+
 class PowerFlowSolver:
     """A power flow solver object."""
 
+    # The attributes saved by save_state, other than the admittance matrix.
+    _FACTORIZATION_ATTRIBUTES = ('_factorization',)
+
     def __init__(self, system, swing_bus_number=DEFAULT_SWING_BUS_NUMBER,
                  max_active_power_error=DEFAULT_MAX_ACTIVE_POWER_ERROR,
-                 max_reactive_power_error=DEFAULT_MAX_REACTIVE_POWER_ERROR):
+                 max_reactive_power_error=DEFAULT_MAX_REACTIVE_POWER_ERROR, sparse=None, solver=None,
+                 jacobian_reuse=False, jacobian_refresh_interval=DEFAULT_JACOBIAN_REFRESH_INTERVAL,
+                 jacobian_stall_ratio=DEFAULT_JACOBIAN_STALL_RATIO, ordering=DEFAULT_ORDERING, damping=None,
+                 min_step_size=DEFAULT_MIN_STEP_SIZE):
         """Initializes the power flow solver.
 
         Args:
@@ -52,20 +138,104 @@ class PowerFlowSolver:
             swing_bus_number: The bus designated as the swing bus.
             max_active_power_error: The maximum allowed active power mismatch.
             max_reactive_power_error: The maximum allowed reactive power mismatch.
+            sparse: If true, the admittance matrix and Jacobian are stored as sparse matrices. This is recommended for
+                large systems, where most buses are only connected to a handful of neighbors. If unspecified, sparse
+                storage is selected for systems with at least linear_solver.SPARSE_BUS_THRESHOLD buses.
+            solver: The linear solver used to compute voltage corrections. If unspecified, a sparse LU solver is used
+                with sparse storage and a dense LU solver otherwise.
+            jacobian_reuse: If true, the factorized Jacobian is kept across steps and only refreshed when the mismatch
+                reduction stalls or after a number of steps. Each reused step skips a Jacobian assembly and
+                factorization at the cost of a slower (linear rather than quadratic) rate of convergence.
+            jacobian_refresh_interval: The maximum number of steps taken with a single factorization in reuse mode.
+            jacobian_stall_ratio: In reuse mode, the factorization is refreshed after any step in which the largest
+                power mismatch does not shrink by at least this ratio.
+            ordering: The fill-reducing bus ordering, one of power_system.ORDERING_METHODS, in which the variables of
+                the Jacobian are factorized with sparse storage. The angle and magnitude variables of each bus are
+                kept together. Corrections are still returned in the original bus order. If None, or if a linear
+                solver is specified, the columns are ordered by the linear solver instead.
+            damping: The method used to damp each Newton-Raphson correction, one of DAMPING_METHODS, or None to apply
+                the full correction.
+            min_step_size: The smallest fraction of a correction applied by a damped step.
         """
         self._system = system
         self._swing_bus_number = swing_bus_number
         self._max_active_power_error = max_active_power_error
         self._max_reactive_power_error = max_reactive_power_error
 
-        self._admittance_matrix = system.admittance_matrix()
+        if sparse is None:
+            sparse = len(system.bus_data) >= linear_solver.SPARSE_BUS_THRESHOLD
+
+        self._sparse = sparse
+        self._linear_solver = solver or linear_solver.default_linear_solver(sparse)
+        self._bus_ordering = system.bus_ordering(ordering) if sparse and ordering and solver is None else None
+        self._admittance_matrix = system.admittance_matrix(sparse=sparse)
+        self._bus_types = classify_buses(system.bus_data, swing_bus_number)
+        self._pv_pq_indices = numpy.flatnonzero(self._bus_types != BusType.SWING.value)
+        self._pq_indices = numpy.flatnonzero(self._bus_types == BusType.PQ.value)
+        self._pv_indices = numpy.setdiff1d(self._pv_pq_indices, self._pq_indices)
+        self._pv_pq_positions = _positions(self._pv_pq_indices, len(self._bus_types))
+        self._pq_positions = _positions(self._pq_indices, len(self._bus_types))
+        self._save_pv_magnitudes()
+        self._jacobian_solver = self._ordered_linear_solver(self._pv_pq_indices, self._pq_indices)
+        self._jacobian_reuse = jacobian_reuse
+        self._jacobian_refresh_interval = jacobian_refresh_interval
+        self._jacobian_stall_ratio = jacobian_stall_ratio
+        if damping is not None and damping not in DAMPING_METHODS:
+            raise ValueError('Unknown damping method: {}'.format(damping))
+
+        self._damping = damping
+        self._min_step_size = min_step_size
+        self._step_size = 0.0
+        self._factorization = None
+        self._compensated = False
+        self._refresh_jacobian = True
+        self._steps_since_factorization = 0
+        self._factorizations = 0
+        self._factorizations_saved = 0
+        self._observers = []
         self._compute_estimates()
 
     @property
     def estimates(self):
-        """Returns the current bus power estimates."""
+        """Returns the current bus power estimates.
+
+        The estimates are built on first access after each step, so solvers that only check convergence never build
+        them.
+        """
+        if self._estimates is None:
+            self._estimates = self._bus_power_estimates()
         return self._estimates
 
+    @property
+    def sparse(self):
+        """Returns true if the admittance matrix and Jacobian are stored as sparse matrices."""
+        return self._sparse
+
+    @property
+    def linear_solver(self):
+        """Returns the linear solver used to factorize matrices in their natural variable order."""
+        return self._linear_solver
+
+    @property
+    def pv_pq_indices(self):
+        """Returns the indices of the PV and PQ buses, whose phase angles are the first unknowns of the Jacobian."""
+        return self._pv_pq_indices
+
+    @property
+    def pq_indices(self):
+        """Returns the indices of the PQ buses, whose magnitudes are the last unknowns of the Jacobian."""
+        return self._pq_indices
+
+    @property
+    def factorizations(self):
+        """Returns the number of times the Jacobian has been factorized."""
+        return self._factorizations
+
+    @property
+    def factorizations_saved(self):
+        """Returns the number of steps that reused an existing factorization instead of factorizing the Jacobian."""
+        return self._factorizations_saved
+
     def has_converged(self):
         """Checks if the analysis has converged to a solution.
 
@@ -73,10 +243,110 @@ class PowerFlowSolver:
             True if the power injection estimates at each bus are equal to the actual power injection (within some
             allowable margin), false otherwise.
         """
-        max_dp = numpy.max([numpy.abs(i.active_power_error) for i in self._pv_pq_estimates.values()])
-        max_dq = numpy.max([numpy.abs(i.reactive_power_error) for i in self._pq_estimates.values()])
-        return max_dp <= self._max_active_power_error and max_dq <= self._max_reactive_power_error
+        max_dp = numpy.max(numpy.abs(self._active_power_errors[self._pv_pq_indices]), initial=0)
+        max_dq = numpy.max(numpy.abs(self._reactive_power_errors[self._pq_indices]), initial=0)
+        return bool(max_dp <= self._max_active_power_error and max_dq <= self._max_reactive_power_error)
+
+    def add_observer(self, observer):
+        """Registers a function that is called with an IterationSummary for each iteration executed by solve()."""
+        self._observers.append(observer)
+
+    def remove_observer(self, observer):
+        """Unregisters a function registered with add_observer."""
+        self._observers.remove(observer)
 
+    @property
+    def step_size(self):
+        """Returns the fraction of the Newton-Raphson correction applied by the last step."""
+        return self._step_size
+
+    def summary(self, iteration=0, step_norm=0.0, step_size=0.0):
+        """Summarizes the current power mismatches.
+
+        Args:
+            iteration: The number of iterations executed.
+            step_norm: The largest change in any bus voltage during the last iteration.
+            step_size: The fraction of the correction applied during the last iteration.
+
+        Returns:
+            An IterationSummary.
+        """
+        bus_numbers = self._system.bus_data.number
+        p_errors = self._active_power_errors[self._pv_pq_indices]
+        q_errors = self._reactive_power_errors[self._pq_indices]
+        p_index = numpy.argmax(numpy.abs(p_errors)) if len(p_errors) else None
+        q_index = numpy.argmax(numpy.abs(q_errors)) if len(q_errors) else None
+        return IterationSummary(
+            iteration,
+            0.0 if p_index is None else float(p_errors[p_index]),
+            None if p_index is None else int(bus_numbers[self._pv_pq_indices[p_index]]),
+            0.0 if q_index is None else float(q_errors[q_index]),
+            None if q_index is None else int(bus_numbers[self._pq_indices[q_index]]),
+            float(step_norm), self.has_converged(), float(step_size))
+
+    def solve(self, max_iterations=DEFAULT_MAX_ITERATIONS, callback=None, divergence_window=DEFAULT_DIVERGENCE_WINDOW,
+              divergence_ratio=DEFAULT_DIVERGENCE_RATIO):
+        """Steps until the power flow converges or the iteration limit is reached.
+
+        The callback and each registered observer are called with a summary of the initial state and of the state after
+        each step. The power flow is considered to diverge as soon as its power mismatches are no longer finite, stop
+        decreasing for a number of consecutive steps, or grow to a multiple of their initial value. When there is no
+        solution, e.g. beyond the maximum loadability of the system, damped steps stall rather than diverge, and are
+        detected the same way.
+
+        Args:
+            max_iterations: The maximum number of steps, or None to step until the power flow converges.
+            callback: A function called with an IterationSummary for each iteration, in addition to the observers.
+            divergence_window: The number of consecutive steps without a new smallest power mismatch after which the
+                power flow diverges, or None to ignore the trend of the power mismatches.
+            divergence_ratio: The ratio of the largest power mismatch to its initial value, or to the largest allowed
+                mismatch if greater, at which the power flow diverges, or None for no limit.
+
+        Returns:
+            True if the power flow converged, false if the iteration limit was reached first.
+
+        Raises:
+            DivergenceError: If the power flow diverges.
+        """
+        observers = self._observers + ([callback] if callback else [])
+        voltages = self._system.bus_data.voltage
+        summary = self.summary()
+        for observer in observers:
+            observer(summary)
+
+        largest_mismatch = self._largest_mismatch()
+        mismatch_limit = None
+        if divergence_ratio is not None:
+            mismatch_limit = divergence_ratio * max(largest_mismatch, self._max_active_power_error,
+                                                    self._max_reactive_power_error)
+        smallest_mismatch = largest_mismatch
+        stalled_steps = 0
+        while not summary.converged:
+            if summary.iteration == max_iterations:
+                return False
+
+            previous_voltages = voltages.copy()
+            self.step()
+            summary = self.summary(summary.iteration + 1, numpy.max(numpy.abs(voltages - previous_voltages)),
+                                   self._step_size)
+            for observer in observers:
+                observer(summary)
+
+            largest_mismatch = self._largest_mismatch()
+            stalled_steps = stalled_steps + 1 if not largest_mismatch < smallest_mismatch else 0
+            smallest_mismatch = min(smallest_mismatch, largest_mismatch)
+            if not numpy.isfinite(largest_mismatch):
+                raise DivergenceError('The power mismatches are not finite.', summary)
+            if mismatch_limit is not None and largest_mismatch > mismatch_limit:
+                raise DivergenceError('The largest power mismatch grew to {:g} per-unit.'.format(largest_mismatch),
+                                      summary)
+            if divergence_window is not None and stalled_steps >= divergence_window:
+                raise DivergenceError('The largest power mismatch did not decrease in {} iterations.'.format(
+                    stalled_steps), summary)
+
+        return True
+
+    @profiler.profiled('step')
     def step(self):
         """Executes a step of the power flow analysis using the Newton-Raphson method.
 
@@ -84,40 +354,204 @@ class PowerFlowSolver:
 
             1. Compute the Jacobian for the estimated system.
             2. Execute the Newton-Raphson method to obtain a set of voltage magnitude and phase angle corrections.
-            3. Apply the corrections to each bus.
+            3. Apply the corrections to each bus, scaled down by the damping method if any.
             4. Compute bus power estimates using the explicit power equations.
+
+        In Jacobian reuse mode, and after a line update, the existing factorization is used in place of step 1 for as
+        long as the refresh policy allows. Since convergence is always checked against the explicit power equations,
+        reusing a factorization affects the number of steps but not the accuracy of the solution.
         """
-        jacobian = self._jacobian()
-        corrections = self._compute_corrections(jacobian)
+        largest_mismatch = self._largest_mismatch()
+        if self._refresh_jacobian or self._factorization is None:
+            corrections = self._compute_corrections(self.jacobian())
+        else:
+            corrections = self._factorization.solve(self.mismatches())
+            self._factorizations_saved += 1
+
+        self._step_size = self._apply_damped_corrections(corrections)
+        self._steps_since_factorization += 1
+        self._refresh_jacobian = not self._may_reuse_factorization(largest_mismatch)
+
+    def _apply_damped_corrections(self, corrections):
+        """Applies a damped list of voltage corrections and computes the power mismatches at the new voltages.
+
+        The full correction is applied first. With the optimal multiplier, the power mismatches at the start and at the
+        end of the full correction define a quadratic model of the mismatches along the correction, and the correction
+        is scaled to minimize the model. With the line search, the correction is halved until the mismatches decrease.
+
+        Args:
+            corrections: A list of voltage phase angle and magnitude corrections.
+
+        Returns:
+            The fraction of the corrections that was applied.
+        """
+        voltages = self._system.bus_data.voltage
+        start_voltages = voltages.copy() if self._damping else None
+        start_mismatches = self.mismatches()
         self._apply_corrections(corrections)
         self._compute_estimates()
+        if self._damping is None:
+            return 1.0
 
-    def _compute_estimates(self):
-        """Computes power injection estimates for each bus and splits out PV/PQ and PQ buses."""
-        self._estimates = self._bus_power_estimates()
-        self._pv_pq_estimates = {i.bus.number: i for i in self._estimates.values() if i.bus_type != BusType.SWING}
-        self._pq_estimates = {i.bus.number: i for i in self._estimates.values() if i.bus_type == BusType.PQ}
+        def retry(step_size):
+            voltages[:] = start_voltages
+            self._apply_corrections(step_size * corrections)
+            self._compute_estimates()
+
+        step_size = 1.0
+        if self._damping == OPTIMAL_MULTIPLIER:
+            step_size = _optimal_multiplier(start_mismatches, self.mismatches(), self._min_step_size)
+            if step_size != 1:
+                retry(step_size)
+        else:
+            start_norm = numpy.linalg.norm(start_mismatches)
+            while (step_size > self._min_step_size and not numpy.linalg.norm(self.mismatches()) <=
+                   (1 - LINE_SEARCH_DECREASE_RATIO * step_size) * start_norm):
+                step_size = max(step_size / 2, self._min_step_size)
+                retry(step_size)
+
+        return step_size
+
+    def _may_reuse_factorization(self, previous_largest_mismatch):
+        """Checks if the next step may reuse the current factorization rather than factorizing a new Jacobian.
+
+        Args:
+            previous_largest_mismatch: The largest power mismatch before the last step.
 
-    def _bus_type(self, bus):
-        """Classifies a given bus based on which parameters specify it.
+        Returns:
+            True if the factorization may be reused, false otherwise.
+        """
+        largest_mismatch = self._largest_mismatch()
+        if self._jacobian_reuse:
+            return (self._steps_since_factorization < self._jacobian_refresh_interval and
+                    largest_mismatch <= self._jacobian_stall_ratio * previous_largest_mismatch)
+        return self._compensated and largest_mismatch < previous_largest_mismatch
+
+    def factorize(self, jacobian=None):
+        """Factorizes the Jacobian, so that following steps and line changes reuse it.
 
         Args:
-            bus: The bus to classify.
+            jacobian: The Jacobian to factorize, as returned by jacobian(). If unspecified, the Jacobian is computed at
+                the current bus voltages.
+
+        Returns:
+            The factorization, whose solve method maps a vector of power mismatches to voltage corrections.
+        """
+        self._factorization = self._jacobian_solver.factorize(self.jacobian() if jacobian is None else jacobian)
+        self._factorizations += 1
+        self._steps_since_factorization = 0
+        self._compensated = False
+        self._refresh_jacobian = not self._jacobian_reuse
+        return self._factorization
+
+    def save_state(self):
+        """Saves the admittance matrix and factorizations of the solver, e.g. for a solved base case.
 
         Returns:
-            The bus classification.
+            An opaque state to pass to restore_state.
         """
-        if bus.number == self._swing_bus_number:
-            return BusType.SWING
+        state = {name: getattr(self, name) for name in self._FACTORIZATION_ATTRIBUTES}
+        state['_admittance_matrix'] = self._admittance_matrix.copy()
+        return state
 
-        if bus.active_power_generated:
-            return BusType.PV
+    def restore_state(self, state):
+        """Restores the admittance matrix and factorizations saved by save_state.
 
-        if bus.active_power_consumed or bus.reactive_power_consumed:
-            return BusType.PQ
+        Rather than undoing each line change with another low-rank update, the lines of the power system are restored
+        in place by the caller, and the solver returns to the matrices it had for them. The bus types must be the same
+        as when the state was saved.
 
-        return BusType.UNKNOWN
+        Args:
+            state: A state returned by save_state.
+        """
+        for name in self._FACTORIZATION_ATTRIBUTES:
+            setattr(self, name, state[name])
+        self._admittance_matrix = state['_admittance_matrix'].copy()
+        self._steps_since_factorization = 0
+        self._compensated = False
+        self._refresh_jacobian = not self._jacobian_reuse
+        self._save_pv_magnitudes()
+        self._compute_estimates()
+
+    def update_buses(self):
+        """Recomputes the power mismatches after bus loads, generation, or voltages have been changed in place.
+
+        The voltage magnitudes of PV buses are read again as their set points.
+
+        The admittance matrix is reused. In Jacobian reuse mode, the existing factorization is reused as well, subject
+        to the usual refresh policy. The changes must not alter the type of any bus, e.g. by removing the load of a PQ
+        bus or the generation of a PV bus.
+        """
+        self._compensated = False
+        self._refresh_jacobian = not self._jacobian_reuse
+        self._save_pv_magnitudes()
+        self._compute_estimates()
 
+    def update_line(self, line_index, distributed_impedance=None, shunt_admittance=None, in_service=None):
+        """Changes the parameters of a line, or takes it out of service, without rebuilding the solver.
+
+        The line is updated in the power system and the four admittance matrix entries it affects are patched in place.
+        A line change only affects the Jacobian in the rows and columns of the two buses it connects, so rather than
+        being factorized again, the existing factorization is updated with a low-rank compensation. Each following
+        step then costs roughly one triangular solve until the compensated Jacobian stops reducing the mismatch. Once
+        the updates stacked on a factorization would exceed MAX_LOW_RANK_UPDATE_RANK, the next step factorizes the
+        Jacobian again instead.
+
+        Args:
+            line_index: The index of the line.
+            distributed_impedance: The new distributed impedance of the line.
+            shunt_admittance: The new shunt admittance of the line.
+            in_service: False to take the line out of service, or true to return it to service.
+        """
+        indices = numpy.array([self._system.line_source_indices[line_index],
+                               self._system.line_destination_indices[line_index]])
+        before = self._line_admittances(line_index)
+        self._system.update_line(line_index, distributed_impedance, shunt_admittance, in_service)
+        after = self._line_admittances(line_index)
+        self._apply_line_change(indices, [new - old for new, old in zip(after, before)])
+        self._compute_estimates()
+
+    def apply_corrections(self, corrections):
+        """Applies voltage corrections to the power system and recomputes the power mismatches at the new voltages.
+
+        Args:
+            corrections: A list of voltage phase angle and magnitude corrections, in the order of the unknowns of the
+                Jacobian.
+        """
+        self._apply_corrections(corrections)
+        self._compute_estimates()
+
+    @profiler.profiled('power_mismatches')
+    def _compute_estimates(self):
+        """Computes the power injected at each bus and the active and reactive power mismatches."""
+        self._compute_injections()
+        bus_data = self._system.bus_data
+        p_specified = bus_data.active_power_generated - bus_data.active_power_consumed
+        self._active_power_errors = p_specified - self._injections.real
+        self._reactive_power_errors = -bus_data.reactive_power_consumed - self._injections.imag
+
+        self._estimates = None
+
+    def _compute_injections(self):
+        """Computes the complex power injected at each bus.
+
+        The products V_k * conj(Y_kj) * conj(V_j) are computed once per iteration and shared by the power injection
+        estimates and all four Jacobian submatrices. The real and imaginary parts of each product contain the cos/sin
+        terms of the active and reactive power equations, respectively, and their row sums are the bus injections:
+
+            S = V * conj(Y * V)
+        """
+        voltages = self._system.bus_data.voltage
+        self._voltage_magnitudes = numpy.abs(voltages)
+        if self._sparse:
+            self._power_products = (scipy.sparse.diags(voltages) @ self._admittance_matrix.conj()
+                                    @ scipy.sparse.diags(numpy.conj(voltages))).tocsr()
+        else:
+            self._power_products = voltages[:, numpy.newaxis] * numpy.conj(self._admittance_matrix) * numpy.conj(
+                voltages)
+        self._injections = numpy.asarray(self._power_products.sum(axis=1)).ravel()
+
+    @profiler.profiled('bus_power_estimates')
     def _bus_power_estimates(self):
         """Computes power injection estimates for each bus.
 
@@ -125,158 +559,70 @@ class PowerFlowSolver:
             A dict mapping a bus number to its power injection estimate.
         """
         estimates = {}
-        for index_src, src in enumerate(self._system.buses):
-            bus_type = self._bus_type(src)
-            p = 0
-            q = 0
-            v_k = numpy.abs(src.voltage)
-            theta_k = numpy.angle(src.voltage)
-
-            for index_dst, dst in enumerate(self._system.buses):
-                v_i = numpy.abs(dst.voltage)
-                theta_i = numpy.angle(dst.voltage)
-                y_ki = self._admittance_matrix[index_src][index_dst]
-                g_ki = y_ki.real
-                b_ki = y_ki.imag
-                theta_ki = theta_k - theta_i
-
-                p += v_k * v_i * (g_ki * numpy.cos(theta_ki) + b_ki * numpy.sin(theta_ki))
-                q += v_k * v_i * (g_ki * numpy.sin(theta_ki) - b_ki * numpy.cos(theta_ki))
-
-            p_error = src.active_power_generated - src.active_power_consumed - p
-            q_error = -src.reactive_power_consumed - q
-            estimates[src.number] = _BusEstimate(src, bus_type, p, q, p_error, q_error)
+        for bus, bus_type, s, p_error, q_error in zip(self._system.buses, self._bus_types, self._injections,
+                                                      self._active_power_errors, self._reactive_power_errors):
+            estimates[bus.number] = _BusEstimate(bus, BusType(bus_type), s.real, s.imag, p_error, q_error)
 
         return estimates
 
-    def _jacobian(self):
+    def mismatches(self):
+        """Returns the active power mismatches at PV and PQ buses followed by reactive power mismatches at PQ buses."""
+        return numpy.concatenate([self._active_power_errors[self._pv_pq_indices],
+                                  self._reactive_power_errors[self._pq_indices]])
+
+    def _largest_mismatch(self):
+        """Returns the largest absolute active or reactive power mismatch."""
+        return numpy.max(numpy.abs(self.mismatches()), initial=0.0)
+
+    @profiler.profiled('jacobian')
+    def jacobian(self):
         """Computes the Jacobian for the power flow."""
-        j11 = self._jacobian_11()
-        j12 = self._jacobian_12()
-        j21 = self._jacobian_21()
-        j22 = self._jacobian_22()
-        j1 = numpy.concatenate([j11, j12], axis=1)
-        j2 = numpy.concatenate([j21, j22], axis=1)
-        return numpy.concatenate([j1, j2], axis=0)
+        blocks = [[self._jacobian_11(), self._jacobian_12()], [self._jacobian_21(), self._jacobian_22()]]
+        return scipy.sparse.bmat(blocks, format='csc') if self._sparse else numpy.block(blocks)
 
     def _jacobian_11(self):
-        """Computes the Jacobian submatrix J11."""
-        j11 = numpy.zeros((len(self._pv_pq_estimates), len(self._pv_pq_estimates)))
-        for row, src_number in enumerate(self._pv_pq_estimates):
-            src = self._pv_pq_estimates[src_number]
-            k = [index for index, bus in enumerate(self._system.buses) if bus.number == src.bus.number][0]
-            v_k = numpy.abs(src.bus.voltage)
-            theta_k = numpy.angle(src.bus.voltage)
-            q_k = src.reactive_power
-
-            for col, dst_number in enumerate(self._pv_pq_estimates):
-                dst = self._pv_pq_estimates[dst_number]
-                j = [index for index, bus in enumerate(self._system.buses) if bus.number == dst.bus.number][0]
-                v_j = numpy.abs(dst.bus.voltage)
-                theta_j = numpy.angle(dst.bus.voltage)
-                theta_kj = theta_k - theta_j
-
-                y_kj = self._admittance_matrix[k][j]
-                g_kj = y_kj.real
-                b_kj = y_kj.imag
-
-                if k != j:
-                    j11[row][col] = v_k * v_j * (g_kj * numpy.sin(theta_kj) - b_kj * numpy.cos(theta_kj))
-                else:
-                    j11[row][col] = -q_k - (v_k ** 2) * b_kj
-
-        return j11
+        """Computes the Jacobian submatrix J11, the partials of active power with respect to phase angle."""
+        j11 = self._power_products.imag - self._diag(self._injections.imag)
+        return self._submatrix(j11, self._pv_pq_indices, self._pv_pq_indices)
 
     def _jacobian_12(self):
-        """Computes the Jacobian submatrix J12."""
-        j12 = numpy.zeros((len(self._pv_pq_estimates), len(self._pq_estimates)))
-        for row, src_number in enumerate(self._pv_pq_estimates):
-            src = self._pv_pq_estimates[src_number]
-            k = [index for index, bus in enumerate(self._system.buses) if bus.number == src.bus.number][0]
-            v_k = numpy.abs(src.bus.voltage)
-            theta_k = numpy.angle(src.bus.voltage)
-            p_k = src.active_power
-
-            for col, dst_number in enumerate(self._pq_estimates):
-                dst = self._pq_estimates[dst_number]
-                j = [index for index, bus in enumerate(self._system.buses) if bus.number == dst.bus.number][0]
-                theta_j = numpy.angle(dst.bus.voltage)
-                theta_kj = theta_k - theta_j
-
-                y_kj = self._admittance_matrix[k][j]
-                g_kj = y_kj.real
-                b_kj = y_kj.imag
-
-                if k != j:
-                    j12[row][col] = v_k * (g_kj * numpy.cos(theta_kj) + b_kj * numpy.sin(theta_kj))
-                else:
-                    j12[row][col] = p_k / v_k + g_kj * v_k
-
-        return j12
+        """Computes the Jacobian submatrix J12, the partials of active power with respect to magnitude."""
+        j12 = self._scale_columns(self._power_products.real, 1 / self._voltage_magnitudes)
+        j12 += self._diag(self._injections.real / self._voltage_magnitudes)
+        return self._submatrix(j12, self._pv_pq_indices, self._pq_indices)
 
     def _jacobian_21(self):
-        """Computes the Jacobian submatrix J21."""
-        j21 = numpy.zeros((len(self._pq_estimates), len(self._pv_pq_estimates)))
-        for row, src_number in enumerate(self._pq_estimates):
-            src = self._pq_estimates[src_number]
-            k = [index for index, bus in enumerate(self._system.buses) if bus.number == src.bus.number][0]
-            v_k = numpy.abs(src.bus.voltage)
-            theta_k = numpy.angle(src.bus.voltage)
-            p_k = src.active_power
-
-            for col, dst_number in enumerate(self._pv_pq_estimates):
-                dst = self._pv_pq_estimates[dst_number]
-                j = [index for index, bus in enumerate(self._system.buses) if bus.number == dst.bus.number][0]
-                v_j = numpy.abs(dst.bus.voltage)
-                theta_j = numpy.angle(dst.bus.voltage)
-                theta_kj = theta_k - theta_j
-
-                y_kj = self._admittance_matrix[k][j]
-                g_kj = y_kj.real
-                b_kj = y_kj.imag
-
-                if k != j:
-                    j21[row][col] = -v_k * v_j * (g_kj * numpy.cos(theta_kj) + b_kj * numpy.sin(theta_kj))
-                else:
-                    j21[row][col] = p_k - g_kj * v_k ** 2
-
-        return j21
+        """Computes the Jacobian submatrix J21, the partials of reactive power with respect to phase angle."""
+        j21 = self._diag(self._injections.real) - self._power_products.real
+        return self._submatrix(j21, self._pq_indices, self._pv_pq_indices)
 
     def _jacobian_22(self):
-        """Computes the Jacobian submatrix J22."""
-        j22 = numpy.zeros((len(self._pq_estimates), len(self._pq_estimates)))
-        for row, src_number in enumerate(self._pq_estimates):
-            src = self._pq_estimates[src_number]
-            k = [index for index, bus in enumerate(self._system.buses) if bus.number == src.bus.number][0]
-            v_k = numpy.abs(src.bus.voltage)
-            theta_k = numpy.angle(src.bus.voltage)
-            q_k = src.reactive_power
-
-            for col, dst_number in enumerate(self._pq_estimates):
-                dst = self._pq_estimates[dst_number]
-                j = [index for index, bus in enumerate(self._system.buses) if bus.number == dst.bus.number][0]
-                theta_j = numpy.angle(dst.bus.voltage)
-                theta_kj = theta_k - theta_j
-
-                y_kj = self._admittance_matrix[k][j]
-                g_kj = y_kj.real
-                b_kj = y_kj.imag
-
-                if k != j:
-                    j22[row][col] = v_k * (g_kj * numpy.sin(theta_kj) - b_kj * numpy.cos(theta_kj))
-                else:
-                    j22[row][col] = q_k / v_k - b_kj * v_k
-
-        return j22
+        """Computes the Jacobian submatrix J22, the partials of reactive power with respect to magnitude."""
+        j22 = self._scale_columns(self._power_products.imag, 1 / self._voltage_magnitudes)
+        j22 += self._diag(self._injections.imag / self._voltage_magnitudes)
+        return self._submatrix(j22, self._pq_indices, self._pq_indices)
+
+    def _diag(self, values):
+        """Builds a diagonal matrix in the solver's storage format."""
+        return scipy.sparse.diags(values, format='csr') if self._sparse else numpy.diag(values)
 
+    def _scale_columns(self, matrix, factors):
+        """Multiplies each column of a matrix by the corresponding factor."""
+        return (matrix @ scipy.sparse.diags(factors)).tocsr() if self._sparse else matrix * factors
+
+    def _submatrix(self, matrix, rows, cols):
+        """Selects the given rows and columns of a matrix."""
+        return matrix[rows, :][:, cols] if self._sparse else matrix[numpy.ix_(rows, cols)]
+
+    @profiler.profiled('corrections')
     def _compute_corrections(self, jacobian):
         """Computes corrective factors to apply to voltage phase angles and magnitudes.
 
         This method executes an iteration of the Newton-Raphson method. The state vector is given from the list of
-        active and reactive power injection mismatches, and the corrective factors are computed by multiplying the
-        state vector by the inverse Jacobian.
+        active and reactive power injection mismatches, and the corrective factors are computed by solving the linear
+        system below with an LU factorization of the Jacobian rather than by inverting it.
 
-            dx = J^(-1)x
+            J * dx = x
 
         There are expected to be phase angle corrections for all PV and PQ buses, and magnitude corrections for all PQ
         buses.
@@ -287,26 +633,435 @@ class PowerFlowSolver:
         Returns:
             An ordered list of voltage phase angle and magnitude corrections.
         """
-        p_errors = [i.active_power_error for i in self._pv_pq_estimates.values()]
-        q_errors = [i.reactive_power_error for i in self._pq_estimates.values()]
-        errors = numpy.transpose([p_errors + q_errors])
-        corrections = numpy.matmul(numpy.linalg.inv(jacobian), errors)
-        return corrections.transpose()[0]
+        self._factorization = self._jacobian_solver.factorize(jacobian)
+        self._factorizations += 1
+        self._steps_since_factorization = 0
+        self._compensated = False
+        return self._factorization.solve(self.mismatches())
+
+    def _ordered_linear_solver(self, *variable_buses):
+        """Returns a linear solver that factorizes matrices in the fill-reducing bus ordering.
+
+        Args:
+            variable_buses: For each group of variables of the matrices, e.g. the phase angles of PV and PQ buses, an
+                array containing the bus index of each variable. Variables of the same bus are factorized together.
+
+        Returns:
+            A linear solver, which is the solver of this object if no ordering is applied.
+        """
+        if self._bus_ordering is None:
+            return self._linear_solver
+
+        ranks = _positions(self._bus_ordering, len(self._bus_types))
+        keys = numpy.concatenate([ranks[buses] * len(variable_buses) + group
+                                  for group, buses in enumerate(variable_buses)])
+        return linear_solver.PermutedLinearSolver(numpy.argsort(keys))
+
+    def _save_pv_magnitudes(self):
+        """Saves the voltage magnitude set point of each PV bus, which corrections must never change."""
+        self._pv_magnitudes = numpy.abs(self._system.bus_data.voltage[self._pv_indices])
 
     def _apply_corrections(self, corrections):
-        """Applies a list of voltage corrections to each bus.
+        """Applies a list of voltage corrections to the bus voltage array.
+
+        The voltages of PV buses are rebuilt from their saved magnitude set points rather than from the magnitudes of
+        the voltage array, which would drift from the set points by rounding errors with every correction, and are
+        rounded so that their magnitudes equal the set points exactly.
 
         Args:
             corrections: A list of voltage phase angle and magnitude corrections.
         """
-        angle_corrections = corrections[0:len(self._pv_pq_estimates)]
-        for c, e in zip(angle_corrections, self._pv_pq_estimates.values()):
-            magnitude = numpy.abs(e.bus.voltage)
-            angle = numpy.angle(e.bus.voltage) + c
-            e.bus.voltage = magnitude * numpy.exp(1j * angle)
-
-        magnitude_corrections = corrections[len(self._pv_pq_estimates):]
-        for c, e in zip(magnitude_corrections, self._pq_estimates.values()):
-            magnitude = numpy.abs(e.bus.voltage) + c
-            angle = numpy.angle(e.bus.voltage)
-            e.bus.voltage = magnitude * numpy.exp(1j * angle)
+        voltages = self._system.bus_data.voltage
+        magnitudes = numpy.abs(voltages)
+        angles = numpy.angle(voltages)
+        angles[self._pv_pq_indices] += corrections[0:len(self._pv_pq_indices)]
+        magnitudes[self._pq_indices] += corrections[len(self._pv_pq_indices):]
+        voltages[self._pq_indices] = magnitudes[self._pq_indices] * numpy.exp(1j * angles[self._pq_indices])
+        voltages[self._pv_indices] = exact_polar(self._pv_magnitudes, angles[self._pv_indices])
+
+    def _line_admittances(self, line_index):
+        """Returns the contribution of a line to each admittance matrix maintained by the solver."""
+        return [self._system.line_admittance(line_index)]
+
+    def _apply_line_change(self, indices, changes):
+        """Updates the admittance matrix and the Jacobian factorization after a line change.
+
+        Args:
+            indices: The indices of the source and destination buses of the line.
+            changes: The change in the contribution of the line to each admittance matrix maintained by the solver.
+        """
+        self._patch_admittance_matrix(indices, changes[0])
+        if self._factorization is None:
+            return
+
+        rows, cols, delta = self._jacobian_change(indices, changes[0])
+        if _update_rank(self._factorization) + len(rows) > MAX_LOW_RANK_UPDATE_RANK:
+            # The next step factorizes the Jacobian of the updated system.
+            self._factorization = None
+            self._compensated = False
+            self._refresh_jacobian = True
+            return
+
+        self._factorization = linear_solver.LowRankUpdatedFactorization(
+            self._factorization, len(self._pv_pq_indices) + len(self._pq_indices), rows, cols, delta)
+        self._compensated = True
+        self._refresh_jacobian = False
+        self._steps_since_factorization = 0
+
+    def _patch_admittance_matrix(self, indices, change):
+        """Adds a 2x2 change to the rows and columns of the admittance matrix for a pair of buses."""
+        if self._sparse:
+            for row in range(2):
+                for col in range(2):
+                    self._admittance_matrix[indices[row], indices[col]] += change[row][col]
+        else:
+            self._admittance_matrix[numpy.ix_(indices, indices)] += change
+
+    def _jacobian_change(self, indices, change):
+        """Computes the change in the Jacobian caused by a change to the admittance matrix for a pair of buses.
+
+        The Jacobian is linear in the admittance matrix at a fixed voltage, so the change is given by the Jacobian
+        formulas applied to the products V_k * conj(dY_kj) * conj(V_j) of the two buses. Only the rows and columns of
+        the two buses are affected.
+
+        Args:
+            indices: The indices of the pair of buses.
+            change: The 2x2 change to the admittance matrix.
+
+        Returns:
+            A tuple containing the affected Jacobian rows, the affected Jacobian columns, and the change to the
+            submatrix at those rows and columns.
+        """
+        voltages = self._system.bus_data.voltage[indices]
+        magnitudes = numpy.abs(voltages)
+        products = voltages[:, numpy.newaxis] * numpy.conj(change) * numpy.conj(voltages)
+        injections = products.sum(axis=1)
+        delta = numpy.block([
+            [products.imag - numpy.diag(injections.imag),
+             products.real / magnitudes + numpy.diag(injections.real / magnitudes)],
+            [numpy.diag(injections.real) - products.real,
+             products.imag / magnitudes + numpy.diag(injections.imag / magnitudes)]])
+
+        angle_positions = self._pv_pq_positions[indices]
+        magnitude_positions = self._pq_positions[indices]
+        positions = numpy.concatenate([angle_positions, len(self._pv_pq_indices) + magnitude_positions])
+        present = numpy.concatenate([angle_positions >= 0, magnitude_positions >= 0])
+        return positions[present], positions[present], delta[numpy.ix_(present, present)]
+
+
+class FastDecoupledPowerFlowSolver(PowerFlowSolver):
+    """A power flow solver that uses the fast decoupled load flow method.
+
+    The fast decoupled method approximates the Newton-Raphson Jacobian with two constant matrices: B', relating active
+    power mismatches to phase angle corrections, and B'', relating reactive power mismatches to magnitude corrections.
+
+        dP / V = B' * dtheta
+        dQ / V = B'' * dV
+
+    Both matrices are built and factorized once, so each iteration costs a pair of triangular solves rather than a
+    Jacobian assembly and factorization. Each step executes a P-theta half-iteration followed by a Q-V half-iteration.
+    The method typically requires more iterations than Newton-Raphson, but each iteration is much cheaper.
+    """
+
+    _FACTORIZATION_ATTRIBUTES = ('_b_p_factorization', '_b_q_factorization')
+
+    def __init__(self, system, swing_bus_number=DEFAULT_SWING_BUS_NUMBER,
+                 max_active_power_error=DEFAULT_MAX_ACTIVE_POWER_ERROR,
+                 max_reactive_power_error=DEFAULT_MAX_REACTIVE_POWER_ERROR, sparse=None, solver=None,
+                 variant=DEFAULT_FAST_DECOUPLED_VARIANT, ordering=DEFAULT_ORDERING):
+        """Initializes the power flow solver.
+
+        Args:
+            system: The power flow system being analyzed.
+            swing_bus_number: The bus designated as the swing bus.
+            max_active_power_error: The maximum allowed active power mismatch.
+            max_reactive_power_error: The maximum allowed reactive power mismatch.
+            sparse: If true, the admittance matrix and B' and B'' matrices are stored as sparse matrices.
+            solver: The linear solver used to factorize B' and B''.
+            variant: The fast decoupled variant. In the XB variant, line resistances are neglected when building B'. In
+                the BX variant, they are neglected when building B''. Line shunts are neglected when building B' in
+                both variants. The BX variant tends to converge better on systems with high R/X ratios.
+            ordering: The fill-reducing bus ordering in which B' and B'' are factorized with sparse storage.
+        """
+        super().__init__(system, swing_bus_number, max_active_power_error, max_reactive_power_error, sparse, solver,
+                         ordering=ordering)
+        if variant not in (XB, BX):
+            raise ValueError('Unknown fast decoupled variant: {}'.format(variant))
+
+        self._variant = variant
+        self._factorize_b_matrices()
+
+    @profiler.profiled('step')
+    def step(self):
+        """Executes a step of the power flow analysis using the fast decoupled method.
+
+        The following steps are performed:
+
+            1. Solve B' for phase angle corrections using the active power mismatches and apply them to each bus.
+            2. Compute bus power estimates using the explicit power equations.
+            3. Solve B'' for magnitude corrections using the reactive power mismatches and apply them to each bus.
+            4. Compute bus power estimates using the explicit power equations.
+        """
+        p_errors = self._active_power_errors[self._pv_pq_indices] / self._voltage_magnitudes[self._pv_pq_indices]
+        angle_corrections = self._b_p_factorization.solve(p_errors)
+        self._step_size = 1.0
+        self._apply_corrections(numpy.concatenate([angle_corrections, numpy.zeros(len(self._pq_indices))]))
+        self._compute_estimates()
+
+        if self._b_q_factorization is None:
+            return
+
+        q_errors = self._reactive_power_errors[self._pq_indices] / self._voltage_magnitudes[self._pq_indices]
+        magnitude_corrections = self._b_q_factorization.solve(q_errors)
+        self._apply_corrections(numpy.concatenate([numpy.zeros(len(self._pv_pq_indices)), magnitude_corrections]))
+        self._compute_estimates()
+
+    def jacobian(self):
+        """Computes the Newton-Raphson Jacobian at the current bus voltages, e.g. for sensitivity analysis.
+
+        The fast decoupled method never uses the Jacobian, so the products it is built from are computed on demand.
+        """
+        PowerFlowSolver._compute_injections(self)
+        return super().jacobian()
+
+    def factorize(self, jacobian=None):
+        """Raises NotImplementedError, since fast decoupled steps solve B' and B'' rather than the Jacobian."""
+        raise NotImplementedError('The fast decoupled method factorizes B\' and B\'\' rather than the Jacobian.')
+
+    def _factorize_b_matrices(self):
+        """Builds and factorizes B' and B'' from the lines of the system."""
+        y_p = self._system.admittance_matrix(sparse=self._sparse, **self._b_p_options())
+        y_q = self._system.admittance_matrix(sparse=self._sparse, **self._b_q_options())
+        b_p = self._submatrix(-y_p.imag, self._pv_pq_indices, self._pv_pq_indices)
+        b_q = self._submatrix(-y_q.imag, self._pq_indices, self._pq_indices)
+        self._b_p_factorization = self._ordered_linear_solver(self._pv_pq_indices).factorize(b_p)
+        self._b_q_factorization = (self._ordered_linear_solver(self._pq_indices).factorize(b_q)
+                                   if len(self._pq_indices) else None)
+
+    def _b_p_options(self):
+        """Returns the admittance matrix options used to build B'."""
+        return {'ignore_resistance': self._variant == XB, 'ignore_shunts': True}
+
+    def _b_q_options(self):
+        """Returns the admittance matrix options used to build B''."""
+        return {'ignore_resistance': self._variant == BX}
+
+    def _line_admittances(self, line_index):
+        """Returns the contribution of a line to the admittance matrix and the matrices B' and B'' are built from."""
+        return [self._system.line_admittance(line_index),
+                self._system.line_admittance(line_index, **self._b_p_options()),
+                self._system.line_admittance(line_index, **self._b_q_options())]
+
+    def _apply_line_change(self, indices, changes):
+        """Updates the admittance matrix and the B' and B'' factorizations after a line change.
+
+        Args:
+            indices: The indices of the source and destination buses of the line.
+            changes: The change in the contribution of the line to each admittance matrix maintained by the solver.
+        """
+        self._patch_admittance_matrix(indices, changes[0])
+        if _update_rank(self._b_p_factorization) + len(indices) > MAX_LOW_RANK_UPDATE_RANK:
+            self._factorize_b_matrices()
+            return
+
+        positions = self._pv_pq_positions[indices]
+        present = positions >= 0
+        self._b_p_factorization = linear_solver.LowRankUpdatedFactorization(
+            self._b_p_factorization, len(self._pv_pq_indices), positions[present], positions[present],
+            -changes[1].imag[numpy.ix_(present, present)])
+
+        positions = self._pq_positions[indices]
+        present = positions >= 0
+        if self._b_q_factorization is not None:
+            self._b_q_factorization = linear_solver.LowRankUpdatedFactorization(
+                self._b_q_factorization, len(self._pq_indices), positions[present], positions[present],
+                -changes[2].imag[numpy.ix_(present, present)])
+
+    def _compute_injections(self):
+        """Computes the complex power injected at each bus.
+
+        The fast decoupled method never builds a Jacobian, so the injections are computed directly:
+
+            S = V * conj(Y * V)
+        """
+        voltages = self._system.bus_data.voltage
+        self._voltage_magnitudes = numpy.abs(voltages)
+        self._injections = voltages * numpy.conj(self._admittance_matrix @ voltages)
+
+
+class DcPowerFlowSolver:
+    """A linear (DC) power flow solver.
+
+    The DC power flow assumes that line resistances are negligible, that voltage magnitudes are 1 per-unit, and that
+    phase angle differences are small. The active power injections are then a linear function of the phase angles,
+
+        P = B * theta
+
+    where B is the susceptance part of the admittance matrix built without line resistances or shunts. A solve costs a
+    single triangular solve against a factorization of B that is computed once, so the solver may be reused to screen
+    many injection patterns on the same network. Reactive power and voltage magnitudes are not computed.
+
+    Solving writes the phase angles to the bus voltage array of the power system and leaves the voltage magnitudes
+    unchanged, so a PowerFlowSolver constructed afterwards on the same system starts from the DC solution.
+
+        solver = DcPowerFlowSolver(system)
+        solver.solve()
+        print(solver.line_flows)
+    """
+
+    def __init__(self, system, swing_bus_number=DEFAULT_SWING_BUS_NUMBER, sparse=None, solver=None):
+        """Initializes the power flow solver.
+
+        Args:
+            system: The power flow system being analyzed.
+            swing_bus_number: The bus designated as the swing bus.
+            sparse: If true, the susceptance matrix is stored as a sparse matrix. If unspecified, sparse storage is
+                selected for systems with at least linear_solver.SPARSE_BUS_THRESHOLD buses.
+            solver: The linear solver used to factorize the susceptance matrix.
+        """
+        if sparse is None:
+            sparse = len(system.bus_data) >= linear_solver.SPARSE_BUS_THRESHOLD
+
+        self._system = system
+        self._swing_bus_index = system.bus_indices[swing_bus_number]
+        self._non_swing_indices = numpy.delete(numpy.arange(len(system.bus_data)), self._swing_bus_index)
+
+        susceptance_matrix = -system.admittance_matrix(sparse=sparse, ignore_resistance=True, ignore_shunts=True).imag
+        if sparse:
+            reduced_matrix = susceptance_matrix[self._non_swing_indices, :][:, self._non_swing_indices]
+        else:
+            reduced_matrix = susceptance_matrix[numpy.ix_(self._non_swing_indices, self._non_swing_indices)]
+
+        self._factorization = (solver or linear_solver.default_linear_solver(sparse)).factorize(reduced_matrix)
+        self._angles = None
+
+    @property
+    def angles(self):
+        """Returns the phase angle at each bus in radians, or None if the power flow has not been solved."""
+        return self._angles
+
+    @property
+    def line_flows(self):
+        """Returns the active power flowing through each line in per-unit, or None if the power flow is unsolved."""
+        if self._angles is None:
+            return None
+
+        theta_src = self._angles[self._system.line_source_indices]
+        theta_dst = self._angles[self._system.line_destination_indices]
+        line_data = self._system.line_data
+        reactance = numpy.where(line_data.in_service, line_data.distributed_impedance.imag, 1)
+        return line_data.in_service * (theta_src - theta_dst) / reactance
+
+    def has_converged(self):
+        """Checks if the power flow has been solved. The DC power flow is solved exactly in a single step."""
+        return self._angles is not None
+
+    def step(self):
+        """Solves the power flow. This is equivalent to calling solve()."""
+        self.solve()
+
+    @profiler.profiled('dc_power_flow')
+    def solve(self):
+        """Solves the power flow for the current bus injections and updates the bus voltage phase angles."""
+        bus_data = self._system.bus_data
+        p_specified = bus_data.active_power_generated - bus_data.active_power_consumed
+
+        voltages = bus_data.voltage
+        swing_angle = numpy.angle(voltages[self._swing_bus_index])
+        angles = numpy.full(len(bus_data), swing_angle)
+        angles[self._non_swing_indices] += self._factorization.solve(p_specified[self._non_swing_indices])
+
+        voltages[:] = numpy.abs(voltages) * numpy.exp(1j * angles)
+        self._angles = angles
+
+
+def classify_buses(bus_data, swing_bus_number):
+    """Classifies each bus based on which parameters specify it.
+
+    A bus other than the swing bus has the type given by the input if there is one. Otherwise, it is a PV bus if it
+    generates active power, a PQ bus if it consumes power, and of unknown type otherwise. Buses of unknown type are
+    solved like PV buses.
+
+    Args:
+        bus_data: The bus data.
+        swing_bus_number: The bus designated as the swing bus.
+
+    Returns:
+        An array containing the BusType value of each bus.
+    """
+    return numpy.select(
+        [bus_data.number == swing_bus_number, bus_data.bus_type != BusType.UNKNOWN.value,
+         bus_data.active_power_generated != 0,
+         (bus_data.active_power_consumed != 0) | (bus_data.reactive_power_consumed != 0)],
+        [BusType.SWING.value, bus_data.bus_type, BusType.PV.value, BusType.PQ.value], BusType.UNKNOWN.value)
+
+
+def exact_polar(magnitudes, angles):
+    """Converts voltages from polar form to complex numbers whose magnitudes equal the given magnitudes exactly.
+
+    The rounding of m * exp(j * theta) can leave its magnitude an ulp away from m. The smaller component is moved by up
+    to an ulp, the larger component is recomputed from it, and the first nearby pair whose magnitude is exactly m is
+    kept, which changes the phase angle by only a few ulps. The rare voltages without such a pair are left unchanged.
+
+    Args:
+        magnitudes: An array of voltage magnitudes.
+        angles: An array of voltage phase angles, in radians.
+
+    Returns:
+        An array of complex voltages.
+    """
+    voltages = magnitudes * numpy.exp(1j * angles)
+    exact = numpy.abs(voltages) == magnitudes
+    swapped = numpy.abs(voltages.imag) > numpy.abs(voltages.real)
+    larger = numpy.where(swapped, voltages.imag, voltages.real)
+    smaller = numpy.where(swapped, voltages.real, voltages.imag)
+    for smaller_ulps in (0, -1, 1):
+        small = smaller + smaller_ulps * numpy.spacing(smaller)
+        large = numpy.copysign(numpy.sqrt((magnitudes - small) * (magnitudes + small)), larger)
+        for larger_ulps in (0, -1, 1):
+            big = large + larger_ulps * numpy.spacing(large)
+            candidates = numpy.where(swapped, small + 1j * big, big + 1j * small)
+            found = ~exact & (numpy.abs(candidates) == magnitudes)
+            voltages[found] = candidates[found]
+            exact |= found
+    return voltages
+
+
+def _optimal_multiplier(start_mismatches, end_mismatches, min_step_size):
+    """Computes the optimal multiplier of a Newton-Raphson correction.
+
+    The power mismatches along a correction dx are modeled as f(mu) = (1 - mu) * f(0) + mu^2 * f(1), a quadratic that
+    matches the Newton-Raphson linearization and the mismatches at the end of the full correction. The optimal
+    multiplier minimizes the sum of the squares of the modeled mismatches, among the roots of the derivative of that sum
+    and the ends of the allowed range.
+
+    Args:
+        start_mismatches: The power mismatches before the correction.
+        end_mismatches: The power mismatches after the full correction.
+        min_step_size: The smallest allowed multiplier.
+
+    Returns:
+        The multiplier, between the smallest allowed multiplier and one.
+    """
+    if not numpy.all(numpy.isfinite(end_mismatches)):
+        return min_step_size
+
+    a = start_mismatches
+    c = end_mismatches
+    roots = numpy.roots([2 * (c @ c), -3 * (a @ c), a @ a + 2 * (a @ c), -(a @ a)])
+    candidates = [root.real for root in roots if abs(root.imag) < 1e-9 and min_step_size < root.real < 1]
+    candidates += [min_step_size, 1.0]
+    costs = [numpy.sum(((1 - mu) * a + mu ** 2 * c) ** 2) for mu in candidates]
+    return candidates[int(numpy.argmin(costs))]
+
+
+def _update_rank(factorization):
+    """Returns the total rank of the low-rank updates stacked on a factorization."""
+    return factorization.rank if isinstance(factorization, linear_solver.LowRankUpdatedFactorization) else 0
+
+
+def _positions(indices, size):
+    """Maps each bus index to its position in an array of bus indices, or -1 if it is not present."""
+    positions = numpy.full(size, -1)
+    positions[indices] = numpy.arange(len(indices))
+    return positions
@@ -5,56 +5,472 @@ a power system and its buses and lines. Each line connects two buses and there m
 
 This model is simplified to allow only one load or generator to be attached at each bus. Loads are specified by the
 power they consume, while generators are specified by the active power they inject and their controlled voltage.
+
+The state of a power system is stored as a structure of arrays: the BusData and LineData objects hold one contiguous
+NumPy array per attribute, and row k of each array describes the k-th bus or line. Bus and Line objects are lightweight
+views over a single row of these arrays, so reading or writing an attribute of a bus reads or writes the array. Large
+systems may be built directly from arrays, in which case no Bus or Line objects are created until they are requested.
+
+The order of the buses is the order of the input, which is arbitrary as far as sparse factorization is concerned. The
+bus_ordering method computes a fill-reducing elimination order of the buses from the graph of lines in service, which
+solvers apply to their sparse matrices before factorizing them. The ordering is computed once per topology and cached.
 """
 
 import dataclasses
 import numpy
-import typing
+import profiler
+import scipy.sparse
+import scipy.sparse.csgraph
+import scipy.sparse.linalg
+
+# Fill-reducing bus ordering methods.
+MINIMUM_DEGREE = 'minimum_degree'
+REVERSE_CUTHILL_MCKEE = 'reverse_cuthill_mckee'
+ORDERING_METHODS = (MINIMUM_DEGREE, REVERSE_CUTHILL_MCKEE)
+
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class BusData:
+    """Arrays containing the data for a set of buses.
+
+    The bus type array holds the power_flow_solver.BusType value of each bus whose type is given by the input, e.g. the
+    PV and PQ buses of a MATPOWER case, and zero (unknown) for each bus whose type is inferred from its injections.
+    """
+    number: numpy.ndarray
+    active_power_consumed: numpy.ndarray
+    reactive_power_consumed: numpy.ndarray
+    active_power_generated: numpy.ndarray
+    voltage: numpy.ndarray
+    bus_type: numpy.ndarray = None
+
+    def __post_init__(self):
+        if self.bus_type is None:
+            object.__setattr__(self, 'bus_type', numpy.zeros(len(self.number), dtype=int))
+
+    @staticmethod
+    def from_columns(number, active_power_consumed, reactive_power_consumed, active_power_generated, voltage):
+        """Builds bus data from array-like columns, converting each to a contiguous array of the appropriate type."""
+        return BusData(numpy.array(number, dtype=int), numpy.array(active_power_consumed, dtype=float),
+                       numpy.array(reactive_power_consumed, dtype=float),
+                       numpy.array(active_power_generated, dtype=float), numpy.array(voltage, dtype=complex))
+
+    def __len__(self):
+        return len(self.number)
+
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class LineData:
+    """Arrays containing the data for a set of lines.
+
+    A line without a power rating has a NaN maximum power. Lines are in service unless specified otherwise; a line that
+    is out of service does not contribute to the admittance matrix and carries no power.
+    """
+    source: numpy.ndarray
+    destination: numpy.ndarray
+    distributed_impedance: numpy.ndarray
+    shunt_admittance: numpy.ndarray
+    max_power: numpy.ndarray
+    in_service: numpy.ndarray = None
+
+    def __post_init__(self):
+        if self.in_service is None:
+            object.__setattr__(self, 'in_service', numpy.ones(len(self.source), dtype=bool))
+
+    @staticmethod
+    def from_columns(source, destination, distributed_impedance, shunt_admittance, max_power):
+        """Builds line data from array-like columns, converting each to a contiguous array of the appropriate type."""
+        max_power = [numpy.nan if i is None else i for i in max_power]
+        return LineData(numpy.array(source, dtype=int), numpy.array(destination, dtype=int),
+                        numpy.array(distributed_impedance, dtype=complex), numpy.array(shunt_admittance, dtype=complex),
+                        numpy.array(max_power, dtype=float))
 
+    def __len__(self):
+        return len(self.source)
 
-@dataclasses.dataclass()
-class Bus:
+
+def _view_attribute(name, read_only=False):
+    """Creates a property that accesses a row of one of the arrays backing a view."""
+
+    def getter(self):
+        return getattr(self._data, name)[self._index].item()
+
+    def setter(self, value):
+        getattr(self._data, name)[self._index] = value
+
+    return property(getter, None if read_only else setter)
+
+
+class _RowView:
+    """A view over a single row of a set of data arrays."""
+    __slots__ = ('_data', '_index')
+    _FIELDS = ()
+
+    @classmethod
+    def _view(cls, data, index):
+        """Creates a view backed by a row of a power system's data."""
+        view = cls.__new__(cls)
+        view._data = data
+        view._index = index
+        return view
+
+    def _values(self):
+        return tuple(getattr(self, name) for name in self._FIELDS)
+
+    def __eq__(self, other):
+        return self._values() == other._values() if type(other) is type(self) else NotImplemented
+
+    def __repr__(self):
+        fields = ', '.join('{}={!r}'.format(name, value) for name, value in zip(self._FIELDS, self._values()))
+        return '{}({})'.format(type(self).__name__, fields)
+
+
+class Bus(_RowView):
     """A bus in the power system."""
-    number: int
-    active_power_consumed: float
-    reactive_power_consumed: float
-    active_power_generated: float
-    voltage: complex
+    __slots__ = ()
+    __hash__ = None
+    _FIELDS = ('number', 'active_power_consumed', 'reactive_power_consumed', 'active_power_generated', 'voltage')
+
+    number = _view_attribute('number')
+    active_power_consumed = _view_attribute('active_power_consumed')
+    reactive_power_consumed = _view_attribute('reactive_power_consumed')
+    active_power_generated = _view_attribute('active_power_generated')
+    voltage = _view_attribute('voltage')
 
+    def __init__(self, number, active_power_consumed, reactive_power_consumed, active_power_generated, voltage):
+        """Initializes a bus that is not yet part of a power system. The bus is backed by arrays of length one."""
+        self._data = BusData.from_columns(
+            [number], [active_power_consumed], [reactive_power_consumed], [active_power_generated], [voltage])
+        self._index = 0
 
-@dataclasses.dataclass(frozen=True)
-class Line:
+
+class Line(_RowView):
     """A power line connecting two buses."""
-    source: int
-    destination: int
-    distributed_impedance: complex
-    shunt_admittance: complex
-    max_power: typing.Optional[float]
+    __slots__ = ()
+    _FIELDS = ('source', 'destination', 'distributed_impedance', 'shunt_admittance', 'max_power')
+
+    source = _view_attribute('source', read_only=True)
+    destination = _view_attribute('destination', read_only=True)
+    distributed_impedance = _view_attribute('distributed_impedance', read_only=True)
+    shunt_admittance = _view_attribute('shunt_admittance', read_only=True)
+
+    def __init__(self, source, destination, distributed_impedance, shunt_admittance, max_power):
+        """Initializes a line that is not yet part of a power system. The line is backed by arrays of length one."""
+        self._data = LineData.from_columns(
+            [source], [destination], [distributed_impedance], [shunt_admittance], [max_power])
+        self._index = 0
+
+    @property
+    def max_power(self):
+        max_power = self._data.max_power[self._index].item()
+        return None if numpy.isnan(max_power) else max_power
+
+    @property
+    def in_service(self):
+        return self._data.in_service[self._index].item()
+
+    def __hash__(self):
+        return hash(self._values())
 
 
-@dataclasses.dataclass(frozen=True)
 class PowerSystem:
-    """An object representing a power system."""
-    buses: typing.List[Bus]
-    lines: typing.List[Line]
+    """An object representing a power system.
+
+    When the system is constructed, an index mapping each bus number to its position in the bus list is built, along
+    with arrays containing the positions of the source and destination buses of each line. These should be used instead
+    of searching the bus list for a particular bus number.
+    """
+
+    def __init__(self, buses, lines):
+        """Initializes a power system from lists of buses and lines.
+
+        The data for the buses and lines is copied into the arrays of the power system, and the given Bus and Line
+        objects become views over those arrays.
+
+        Args:
+            buses: A list of buses.
+            lines: A list of lines.
+        """
+        bus_data = BusData.from_columns(*zip(*(bus._values() for bus in buses))) if buses else _empty_bus_data()
+        line_data = LineData.from_columns(*zip(*(line._values() for line in lines))) if lines else _empty_line_data()
+        self._initialize(bus_data, line_data)
+
+        for index, bus in enumerate(buses):
+            bus._data = bus_data
+            bus._index = index
+
+        for index, line in enumerate(lines):
+            line._data = line_data
+            line._index = index
+
+        self._buses = list(buses)
+        self._lines = list(lines)
+
+    @classmethod
+    def from_data(cls, bus_data, line_data, bus_orderings=None):
+        """Creates a power system directly from bus and line data arrays, without creating Bus or Line objects.
+
+        Args:
+            bus_data: The bus data.
+            line_data: The line data.
+            bus_orderings: A dict mapping ordering methods to bus orderings already computed for the current topology,
+                e.g. loaded from a case cache.
+
+        Returns:
+            A power system backed by the given arrays.
+        """
+        system = cls.__new__(cls)
+        system._initialize(bus_data, line_data)
+        for method, order in (bus_orderings or {}).items():
+            system._bus_orderings[method] = (line_data.in_service.copy(), order)
+        return system
+
+    def _initialize(self, bus_data, line_data):
+        """Stores the data arrays and builds the bus number index."""
+        self.bus_data = bus_data
+        self.line_data = line_data
+        self.bus_indices = dict(zip(bus_data.number.tolist(), range(len(bus_data))))
+        self.line_source_indices = self.bus_index_array(line_data.source)
+        self.line_destination_indices = self.bus_index_array(line_data.destination)
+        self._buses = None
+        self._lines = None
+        self._bus_orderings = {}
+
+    @property
+    def buses(self):
+        """Returns the list of buses in the system. The buses are created on first access."""
+        if self._buses is None:
+            self._buses = [Bus._view(self.bus_data, index) for index in range(len(self.bus_data))]
+        return self._buses
+
+    @property
+    def lines(self):
+        """Returns the list of lines in the system. The lines are created on first access."""
+        if self._lines is None:
+            self._lines = [Line._view(self.line_data, index) for index in range(len(self.line_data))]
+        return self._lines
+
+    def bus_index_array(self, bus_numbers):
+        """Converts an array of bus numbers to an array of positions in the bus arrays.
+
+        Args:
+            bus_numbers: An array of bus numbers.
+
+        Returns:
+            An array containing the position of each bus.
 
-    def admittance_matrix(self):
+        Raises:
+            KeyError: If a bus number is not part of the system.
+        """
+        bus_numbers = numpy.asarray(bus_numbers, dtype=int)
+        missing = ~numpy.isin(bus_numbers, self.bus_data.number)
+        if numpy.any(missing):
+            raise KeyError(bus_numbers[missing][0].item())
+
+        order = numpy.argsort(self.bus_data.number, kind='stable')
+        return order[numpy.searchsorted(self.bus_data.number, bus_numbers, sorter=order)]
+
+    @profiler.profiled('admittance_matrix')
+    def admittance_matrix(self, sparse=False, ignore_resistance=False, ignore_shunts=False):
         """Computes the admittance matrix for the system.
 
+        The matrix is assembled in a single pass over the lines: each line contributes its series admittance to the two
+        off-diagonal entries it connects and its series and shunt admittances to the two diagonal entries. Duplicate
+        entries (e.g. parallel lines) are summed.
+
+        Args:
+            sparse: If true, a sparse matrix in compressed sparse row format is returned instead of a dense array.
+            ignore_resistance: If true, the resistance of each line is neglected.
+            ignore_shunts: If true, the shunt admittance of each line is neglected.
+
         Returns:
             The admittance matrix for the system.
         """
-        matrix = numpy.zeros((len(self.buses), len(self.buses))) * 1j
-        for line in self.lines:
-            src = [index for index, bus in enumerate(self.buses) if bus.number == line.source][0]
-            dst = [index for index, bus in enumerate(self.buses) if bus.number == line.destination][0]
+        src = self.line_source_indices
+        dst = self.line_destination_indices
+        y_distributed, y_shunt = self._line_admittances(slice(None), ignore_resistance, ignore_shunts)
+
+        rows = numpy.concatenate([src, dst, src, dst])
+        cols = numpy.concatenate([dst, src, src, dst])
+        values = numpy.concatenate([-y_distributed, -y_distributed, y_distributed + y_shunt, y_distributed + y_shunt])
+
+        shape = (len(self.bus_data), len(self.bus_data))
+        matrix = scipy.sparse.coo_matrix((values, (rows, cols)), shape=shape)
+        return matrix.tocsr() if sparse else matrix.toarray()
+
+    def islands(self):
+        """Finds the islands of the system, i.e. the sets of buses connected to each other by lines in service.
+
+        Returns:
+            A list containing an array of the bus indices of each island, in ascending order. The islands are ordered by
+            their first bus.
+        """
+        in_service = self.line_data.in_service
+        shape = (len(self.bus_data), len(self.bus_data))
+        adjacency = scipy.sparse.coo_matrix((numpy.ones(numpy.count_nonzero(in_service)), (
+            self.line_source_indices[in_service], self.line_destination_indices[in_service])), shape=shape)
+        count, labels = scipy.sparse.csgraph.connected_components(adjacency, directed=False)
+
+        # Islands are labeled in the order in which their first bus is found.
+        order = numpy.argsort(labels, kind='stable')
+        return numpy.split(order, numpy.cumsum(numpy.bincount(labels, minlength=count))[:-1])
+
+    def subsystem(self, bus_indices):
+        """Creates a power system from a subset of the buses and the lines between them.
+
+        The data of the subsystem is copied, so changes to the subsystem, e.g. solving it, do not affect this system.
+
+        Args:
+            bus_indices: The indices of the buses of the subsystem.
+
+        Returns:
+            The subsystem.
+        """
+        inside = numpy.zeros(len(self.bus_data), dtype=bool)
+        inside[bus_indices] = True
+        lines = inside[self.line_source_indices] & inside[self.line_destination_indices]
+        bus_data = BusData(*(getattr(self.bus_data, field.name)[bus_indices]
+                             for field in dataclasses.fields(BusData)))
+        line_data = LineData(*(getattr(self.line_data, field.name)[lines] for field in dataclasses.fields(LineData)))
+        return PowerSystem.from_data(bus_data, line_data)
+
+    def bus_ordering(self, method=MINIMUM_DEGREE):
+        """Computes a fill-reducing elimination order of the buses from the graph of lines in service.
+
+        Factorizing a sparse matrix indexed by bus, such as the Jacobian, in this order creates far fewer nonzero
+        entries than factorizing it in input order. The minimum degree ordering eliminates the least connected bus of
+        the remaining graph first, which produces the least fill-in on meshed networks. The reverse Cuthill-McKee
+        ordering is cheaper to compute and minimizes the bandwidth of the matrix instead.
+
+        The ordering is cached, and only computed again after a line is taken out of or returned to service.
+
+        Args:
+            method: The ordering method, one of ORDERING_METHODS.
+
+        Returns:
+            An array containing the index of each bus, in elimination order.
+        """
+        if method not in ORDERING_METHODS:
+            raise ValueError('Unknown bus ordering method: {}'.format(method))
+
+        in_service = self.line_data.in_service
+        cached = self._bus_orderings.get(method)
+        if cached is not None and numpy.array_equal(cached[0], in_service):
+            return cached[1]
+
+        size = len(self.bus_data)
+        src = self.line_source_indices[in_service]
+        dst = self.line_destination_indices[in_service]
+        adjacency = scipy.sparse.coo_matrix((numpy.ones(2 * len(src)), (numpy.concatenate([src, dst]),
+                                                                         numpy.concatenate([dst, src]))),
+                                            shape=(size, size)).tocsr()
+        adjacency.data[:] = 1
+        if method == MINIMUM_DEGREE:
+            order = _minimum_degree_ordering(adjacency)
+        else:
+            order = scipy.sparse.csgraph.reverse_cuthill_mckee(adjacency, symmetric_mode=True).astype(int)
+
+        self._bus_orderings[method] = (in_service.copy(), order)
+        return order
+
+    def line_admittance(self, line_index, ignore_resistance=False, ignore_shunts=False):
+        """Computes the contribution of a line to the admittance matrix.
+
+        Args:
+            line_index: The index of the line.
+            ignore_resistance: If true, the resistance of the line is neglected.
+            ignore_shunts: If true, the shunt admittance of the line is neglected.
+
+        Returns:
+            A 2x2 matrix that the line adds to the rows and columns of its source and destination buses.
+        """
+        y_distributed, y_shunt = self._line_admittances(line_index, ignore_resistance, ignore_shunts)
+        return numpy.array([[y_distributed + y_shunt, -y_distributed], [-y_distributed, y_distributed + y_shunt]])
+
+    def update_line(self, line_index, distributed_impedance=None, shunt_admittance=None, in_service=None):
+        """Changes the parameters of a line in place. Parameters that are not specified are left unchanged.
+
+        Args:
+            line_index: The index of the line.
+            distributed_impedance: The new distributed impedance of the line.
+            shunt_admittance: The new shunt admittance of the line.
+            in_service: False to take the line out of service, or true to return it to service.
+        """
+        if distributed_impedance is not None:
+            self.line_data.distributed_impedance[line_index] = distributed_impedance
+        if shunt_admittance is not None:
+            self.line_data.shunt_admittance[line_index] = shunt_admittance
+        if in_service is not None:
+            self.line_data.in_service[line_index] = in_service
+
+    def _line_admittances(self, lines, ignore_resistance, ignore_shunts):
+        """Computes the series and shunt admittances of a set of lines, which are zero for lines out of service.
+
+        Args:
+            lines: An index, slice, or index array selecting lines.
+            ignore_resistance: If true, line resistances are neglected.
+            ignore_shunts: If true, line shunt admittances are neglected.
+
+        Returns:
+            A tuple containing the series admittances and the shunt admittances.
+
+        Raises:
+            ValueError: If a line in service has zero impedance, or zero reactance when resistances are neglected.
+        """
+        in_service = self.line_data.in_service[lines]
+        z_distributed = self.line_data.distributed_impedance[lines]
+        if ignore_resistance:
+            z_distributed = 1j * z_distributed.imag
+
+        zero = in_service & (z_distributed == 0)
+        if numpy.any(zero):
+            index = numpy.atleast_1d(numpy.arange(len(self.line_data))[lines])[numpy.atleast_1d(zero)][0]
+            raise ValueError('Line {}-{} has zero {}.'.format(self.line_data.source[index],
+                                                              self.line_data.destination[index],
+                                                              'reactance' if ignore_resistance else 'impedance'))
+
+        # Lines out of service are skipped rather than divided by, since their impedance may be zero.
+        y_distributed = in_service / numpy.where(in_service, z_distributed, 1)
+        y_shunt = in_service * self.line_data.shunt_admittance[lines]
+        if ignore_shunts:
+            y_shunt = numpy.zeros_like(y_shunt)
+        return y_distributed, y_shunt
+
+
+def _minimum_degree_ordering(adjacency):
+    """Computes a minimum degree ordering of the nodes of a graph.
+
+    SciPy does not expose a minimum degree ordering directly, but SuperLU computes one to order the columns of a matrix
+    before factorizing it. The ordering is read back from the factorization of a diagonally dominant matrix with the
+    sparsity pattern of the graph, which SuperLU factorizes along its diagonal without pivoting.
+
+    The numeric factorization is wasted work, but the matrix has one row per bus rather than two and a quarter of the
+    entries of the Jacobian, so it costs a fraction of a single Jacobian factorization. A symbolic minimum degree pass
+    written in Python takes several times longer on large networks. Callers that solve many variants of one topology,
+    such as line outages, should pass the base case ordering to PowerSystem.from_data rather than compute it again.
+
+    Args:
+        adjacency: The symmetric adjacency matrix of the graph, with unit entries.
+
+    Returns:
+        An array containing the index of each node, in elimination order.
+    """
+    if adjacency.shape[0] == 0:
+        return numpy.zeros(0, dtype=int)
+
+    degrees = numpy.asarray(adjacency.sum(axis=1)).ravel()
+    matrix = scipy.sparse.diags(degrees + 1) - adjacency
+    lu = scipy.sparse.linalg.splu(matrix.tocsc(), permc_spec='MMD_AT_PLUS_A', diag_pivot_thresh=0,
+                                  options=dict(SymmetricMode=True))
+
+    # perm_c maps each column to its position in the factorization.
+    return numpy.argsort(lu.perm_c)
+
 
-            y_distributed = 1 / line.distributed_impedance
-            y_shunt = line.shunt_admittance
+def _empty_bus_data():
+    """Creates bus data for a system without buses."""
+    return BusData.from_columns([], [], [], [], [])
 
-            matrix[src][dst] -= y_distributed
-            matrix[dst][src] -= y_distributed
-            matrix[src][src] += y_distributed + y_shunt
-            matrix[dst][dst] += y_distributed + y_shunt
 
-        return matrix
+def _empty_line_data():
+    """Creates line data for a system without lines."""
+    return LineData.from_columns([], [], [], [], [])
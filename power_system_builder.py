@@ -3,10 +3,32 @@
 Currently supported file formats:
 
     1. Excel
+    2. CSV
+    3. MATPOWER (.m)
+    4. PSS/E RAW, revision 33 (.raw)
+
+The SyntheticPowerSystemBuilder generates random meshed networks of any size instead, e.g. for benchmarks.
+
+The Excel builder creates a Bus or Line object for each row of its input. The other builders parse their input in bulk
+straight into bus and line data arrays, which is much faster for large cases.
+
+The power system model has a single load and generator per bus and no bus shunts or transformer taps. When a MATPOWER or
+RAW case is built, the loads and generators at each bus are combined, isolated buses are dropped, and a warning is
+issued for any bus shunts, off-nominal transformer taps, or phase shifts, which are ignored. The type of each bus is
+taken from the case, so a bus without load or generation is still solved as a PQ bus, and a synchronous condenser as a
+PV bus.
 """
 
+import abc
+import csv
+import dataclasses
+import numpy
 import openpyxl
+import os
+import power_flow_solver
 import power_system
+import re
+import warnings
 
 # Builder defaults.
 FLAT_START_VOLTAGE = 1 + 0j
@@ -14,13 +36,23 @@ DEFAULT_BUS_DATA_WORKSHEET_NAME = 'Bus data'
 DEFAULT_LINE_DATA_WORKSHEET_NAME = 'Line data'
 DEFAULT_POWER_BASE = 100
 
+# Synthetic network defaults.
+DEFAULT_SYNTHETIC_SEED = 0
+DEFAULT_GENERATOR_FRACTION = 0.2
+DEFAULT_MESH_PROBABILITY = 0.5
+
+
+class PowerSystemBuilder(abc.ABC):
+    # The swing bus specified by the input, or None if the input does not specify one.
+    swing_bus_number = None
 
-class PowerSystemBuilder:
+    @abc.abstractmethod
     def build_buses(self):
-        raise NotImplementedError()
+        """Builds a list of buses in the system."""
 
+    @abc.abstractmethod
     def build_lines(self):
-        raise NotImplementedError()
+        """Builds a list of lines in the system."""
 
     def build_system(self):
         """Builds a power system."""
@@ -69,6 +101,10 @@ class ExcelPowerSystemBuilder(PowerSystemBuilder):
         self._start_voltage = start_voltage
         self._power_base = power_base
 
+    @property
+    def power_base(self):
+        return self._power_base
+
     def build_buses(self):
         """Builds a list of buses in the system."""
         result = []
@@ -104,3 +140,466 @@ class ExcelPowerSystemBuilder(PowerSystemBuilder):
                 power_system.Line(source_bus_number, destination_bus_number, z_distributed, y_shunt, max_power))
 
         return result
+
+
+class ArrayPowerSystemBuilder(PowerSystemBuilder):
+    """A power system builder that builds bus and line data arrays rather than Bus and Line objects."""
+
+    @abc.abstractmethod
+    def build_bus_data(self):
+        """Builds the bus data arrays."""
+
+    @abc.abstractmethod
+    def build_line_data(self):
+        """Builds the line data arrays."""
+
+    def build_buses(self):
+        """Builds a list of buses in the system."""
+        return self.build_system().buses
+
+    def build_lines(self):
+        """Builds a list of lines in the system."""
+        return self.build_system().lines
+
+    def build_system(self):
+        """Builds a power system directly from data arrays."""
+        return power_system.PowerSystem.from_data(self.build_bus_data(), self.build_line_data())
+
+
+class CsvPowerSystemBuilder(ArrayPowerSystemBuilder):
+    """A power system builder that reads data from a pair of CSV files.
+
+    The files are expected to have a header row followed by data in the same format as the worksheets read by the
+    ExcelPowerSystemBuilder. Fields that are not specified are left empty.
+    """
+
+    def __init__(self, bus_data_filename, line_data_filename, start_voltage=FLAT_START_VOLTAGE,
+                 power_base=DEFAULT_POWER_BASE):
+        """Initializes the power system builder.
+
+        Args:
+            bus_data_filename: The name of the CSV file containing bus data.
+            line_data_filename: The name of the CSV file containing line data.
+            start_voltage: The start voltage for PQ buses.
+            power_base: The power base in MVA.
+        """
+        self._bus_data_filename = bus_data_filename
+        self._line_data_filename = line_data_filename
+        self._start_voltage = start_voltage
+        self._power_base = power_base
+
+    @property
+    def power_base(self):
+        return self._power_base
+
+    def build_bus_data(self):
+        """Builds the bus data arrays."""
+        number, p_load, q_load, p_generator, voltage = _read_csv_columns(self._bus_data_filename, 5)
+        present = ~numpy.isnan(number)
+        voltage = numpy.where(numpy.isnan(voltage) | (voltage == 0), self._start_voltage, voltage)
+        return power_system.BusData.from_columns(
+            number[present], numpy.nan_to_num(p_load[present]) / self._power_base,
+            numpy.nan_to_num(q_load[present]) / self._power_base,
+            numpy.nan_to_num(p_generator[present]) / self._power_base, voltage[present])
+
+    def build_line_data(self):
+        """Builds the line data arrays."""
+        source, destination, r, x, b, max_power = _read_csv_columns(self._line_data_filename, 6)
+        present = ~numpy.isnan(source) & ~numpy.isnan(destination)
+        z_distributed = numpy.nan_to_num(r) + 1j * numpy.nan_to_num(x)
+        y_shunt = 1j * numpy.nan_to_num(b) / 2
+        return power_system.LineData(source[present].astype(int), destination[present].astype(int),
+                                     z_distributed[present], y_shunt[present], max_power[present])
+
+
+class MatpowerPowerSystemBuilder(ArrayPowerSystemBuilder):
+    """A power system builder that reads a MATPOWER case file.
+
+    The bus, gen, and branch matrices and the baseMVA value of the case are used. The power base and swing bus are taken
+    from the case. Generator buses start at their voltage set point and PQ buses at the start voltage.
+    """
+
+    def __init__(self, filename, start_voltage=FLAT_START_VOLTAGE):
+        """Initializes the power system builder and parses the case file.
+
+        Args:
+            filename: The MATPOWER case filename.
+            start_voltage: The start voltage for PQ buses.
+        """
+        with open(filename) as file:
+            text = re.sub(r'%.*', '', file.read())
+
+        self._start_voltage = start_voltage
+        self._power_base = float(re.search(r'mpc\.baseMVA\s*=\s*([^;\s]+)', text).group(1))
+        bus = _matpower_matrix(text, 'bus')
+        gen = _matpower_matrix(text, 'gen')
+        branch = _matpower_matrix(text, 'branch')
+
+        # MATPOWER column indices.
+        bus = bus[bus[:, 1] != 4]
+        self._bus_numbers = bus[:, 0].astype(int)
+        self._bus_types = bus[:, 1].astype(int)
+        self._active_power_consumed = bus[:, 2]
+        self._reactive_power_consumed = bus[:, 3]
+        self._voltage_magnitudes = bus[:, 7]
+        self.swing_bus_number = _first(self._bus_numbers[self._bus_types == 3])
+
+        gen = gen[(gen[:, 7] > 0) & numpy.isin(gen[:, 0], self._bus_numbers)]
+        self._generator_buses = gen[:, 0].astype(int)
+        self._active_power_generated = gen[:, 1]
+        self._voltage_set_points = gen[:, 5]
+
+        branch = branch[numpy.isin(branch[:, 0], self._bus_numbers) & numpy.isin(branch[:, 1], self._bus_numbers)]
+        self._branches = branch
+
+        taps = branch[:, 8] if branch.shape[1] > 8 else numpy.zeros(len(branch))
+        shifts = branch[:, 9] if branch.shape[1] > 9 else numpy.zeros(len(branch))
+        _warn_unsupported(numpy.any(bus[:, 4:6] != 0), numpy.any((taps != 0) & (taps != 1)), numpy.any(shifts != 0))
+
+    @property
+    def power_base(self):
+        return self._power_base
+
+    def build_bus_data(self):
+        """Builds the bus data arrays."""
+        return _build_bus_data(self._bus_numbers, numpy.isin(self._bus_types, (2, 3)), self._voltage_magnitudes,
+                               self._active_power_consumed, self._reactive_power_consumed, self._generator_buses,
+                               self._active_power_generated, self._voltage_set_points, self._start_voltage,
+                               self._power_base)
+
+    def build_line_data(self):
+        """Builds the line data arrays."""
+        branch = self._branches
+        in_service = branch[:, 10] > 0 if branch.shape[1] > 10 else numpy.ones(len(branch), dtype=bool)
+        return _build_line_data(branch, in_service)
+
+
+class RawPowerSystemBuilder(ArrayPowerSystemBuilder):
+    """A power system builder that reads a PSS/E RAW case file, revision 33.
+
+    The bus, load, fixed shunt, generator, branch, and two-winding transformer data are used; the remaining sections are
+    ignored. Transformers are modeled as lines with their series impedance. The power base and swing bus are taken from
+    the case. Generator buses start at their voltage set point and PQ buses at the start voltage.
+    """
+
+    def __init__(self, filename, start_voltage=FLAT_START_VOLTAGE):
+        """Initializes the power system builder and parses the case file.
+
+        Args:
+            filename: The RAW case filename.
+            start_voltage: The start voltage for PQ buses.
+
+        Raises:
+            ValueError: If the case contains a three-winding transformer or an unknown transformer impedance code.
+        """
+        with open(filename) as file:
+            lines = file.read().splitlines()
+
+        self._start_voltage = start_voltage
+        self._power_base = float(_raw_records(lines[:1])[0][1])
+        sections = _raw_sections(lines[3:])
+        bus, load, shunt, gen, branch, transformer = (_raw_records(sections[i]) if i < len(sections) else []
+                                                      for i in range(6))
+
+        # Bus data: I, NAME, BASKV, IDE, AREA, ZONE, OWNER, VM, VA, ...
+        bus = [record for record in bus if int(record[3]) != 4]
+        self._bus_numbers = numpy.array([int(record[0]) for record in bus], dtype=int)
+        self._bus_types = numpy.array([int(record[3]) for record in bus], dtype=int)
+        self._voltage_magnitudes = numpy.array([float(record[7]) for record in bus])
+        self.swing_bus_number = _first(self._bus_numbers[self._bus_types == 3])
+
+        # Load data: I, ID, STATUS, AREA, ZONE, PL, QL, ... Constant current and admittance loads are ignored.
+        load = numpy.array([[int(record[0]), float(record[5]), float(record[6])] for record in load
+                            if int(record[2]) > 0]).reshape(-1, 3)
+        positions = _positions(self._bus_numbers, load[:, 0])
+        present = positions >= 0
+        self._active_power_consumed = numpy.bincount(positions[present], load[present, 1], len(bus))
+        self._reactive_power_consumed = numpy.bincount(positions[present], load[present, 2], len(bus))
+
+        # Generator data: I, ID, PG, QG, QT, QB, VS, IREG, MBASE, ZR, ZX, RT, XT, GTAP, STAT, ...
+        gen = numpy.array([[int(record[0]), float(record[2]), float(record[6])] for record in gen
+                           if int(record[14]) > 0]).reshape(-1, 3)
+        gen = gen[numpy.isin(gen[:, 0], self._bus_numbers)]
+        self._generator_buses = gen[:, 0].astype(int)
+        self._active_power_generated = gen[:, 1]
+        self._voltage_set_points = gen[:, 2]
+
+        # Branch data: I, J, CKT, R, X, B, RATEA, RATEB, RATEC, GI, BI, GJ, BJ, ST, ...
+        branches = [[abs(int(record[0])), abs(int(record[1])), float(record[3]), float(record[4]), float(record[5]),
+                     float(record[6]), int(record[13])] for record in branch]
+
+        # Two-winding transformer data, four records each: I, J, K, CKT, CW, CZ, CM, MAG1, MAG2, NMETR, NAME, STAT, ...;
+        # R1-2, X1-2, SBASE1-2; WINDV1, NOMV1, ANG1, RATA1, ...; WINDV2, NOMV2.
+        off_nominal = False
+        shifted = False
+        index = 0
+        while index < len(transformer):
+            record = transformer[index]
+            if int(record[2]) != 0:
+                raise ValueError('Three-winding transformers are not supported.')
+
+            impedance, winding_1, winding_2 = transformer[index + 1:index + 4]
+            r, x = _raw_transformer_impedance(int(record[5]), float(impedance[0]), float(impedance[1]),
+                                              float(impedance[2]), self._power_base)
+            branches.append([abs(int(record[0])), abs(int(record[1])), r, x, 0, float(winding_1[3]), int(record[11])])
+            off_nominal |= int(record[4]) == 1 and (float(winding_1[0]) != 1 or float(winding_2[0]) != 1)
+            shifted |= float(winding_1[2]) != 0
+            index += 4
+
+        branches = numpy.array(branches).reshape(-1, 7)
+        self._branches = branches[numpy.isin(branches[:, 0], self._bus_numbers) &
+                                  numpy.isin(branches[:, 1], self._bus_numbers)]
+
+        # Fixed shunt data: I, ID, STATUS, GL, BL
+        bus_shunts = any(int(record[2]) > 0 and (float(record[3]) or float(record[4])) for record in shunt)
+        _warn_unsupported(bus_shunts, off_nominal, shifted)
+
+    @property
+    def power_base(self):
+        return self._power_base
+
+    def build_bus_data(self):
+        """Builds the bus data arrays."""
+        return _build_bus_data(self._bus_numbers, numpy.isin(self._bus_types, (2, 3)), self._voltage_magnitudes,
+                               self._active_power_consumed, self._reactive_power_consumed, self._generator_buses,
+                               self._active_power_generated, self._voltage_set_points, self._start_voltage,
+                               self._power_base)
+
+    def build_line_data(self):
+        """Builds the line data arrays."""
+        branch = self._branches
+        return _build_line_data(branch, branch[:, 6] > 0)
+
+
+class SyntheticPowerSystemBuilder(ArrayPowerSystemBuilder):
+    """A power system builder that generates a random meshed network.
+
+    The buses are laid out row by row on a square grid, and each bus is connected to its left or upper neighbor so that
+    the network is connected. The remaining edges of the grid are added at random to form loops, so each bus has
+    between one and four lines, as in a transmission network. Bus 1 is the swing bus. A random fraction of the other
+    buses are generators that share the total load equally, so the swing bus only supplies the losses and power flows
+    stay local however large the network is. All other buses are loads.
+
+    The same bus count and seed always produce the same network.
+    """
+
+    def __init__(self, bus_count, seed=DEFAULT_SYNTHETIC_SEED, generator_fraction=DEFAULT_GENERATOR_FRACTION,
+                 mesh_probability=DEFAULT_MESH_PROBABILITY, start_voltage=FLAT_START_VOLTAGE,
+                 power_base=DEFAULT_POWER_BASE):
+        """Initializes the power system builder.
+
+        Args:
+            bus_count: The number of buses. At least two buses are required.
+            seed: The seed of the random number generator.
+            generator_fraction: The fraction of buses, other than the swing bus, that are generators.
+            mesh_probability: The probability that each grid edge not needed to connect the network is a line.
+            start_voltage: The start voltage for PQ buses.
+            power_base: The power base in MVA.
+        """
+        if bus_count < 2:
+            raise ValueError('A synthetic network requires at least two buses.')
+
+        self._bus_count = bus_count
+        self._seed = seed
+        self._generator_fraction = generator_fraction
+        self._mesh_probability = mesh_probability
+        self._start_voltage = start_voltage
+        self._power_base = power_base
+        self.swing_bus_number = 1
+
+    @property
+    def power_base(self):
+        return self._power_base
+
+    def build_bus_data(self):
+        """Builds the bus data arrays."""
+        rng = numpy.random.default_rng([self._seed, 0])
+        n = self._bus_count
+        generators = numpy.zeros(n, dtype=bool)
+        generators[1 + rng.permutation(n - 1)[:max(1, int(self._generator_fraction * (n - 1)))]] = True
+
+        # Loads between 2 and 10 MW at a power factor of about 0.95.
+        p_load = numpy.where(generators, 0, rng.uniform(2, 10, n)) / self._power_base
+        p_load[0] = 0
+        q_load = p_load * rng.uniform(0.25, 0.4, n)
+        p_generated = numpy.where(generators, p_load.sum() / generators.sum(), 0)
+
+        voltage = numpy.where(generators, rng.uniform(1.0, 1.04, n), self._start_voltage).astype(complex)
+        voltage[0] = 1.04
+        return power_system.BusData(numpy.arange(1, n + 1), p_load, q_load, p_generated, voltage)
+
+    def build_line_data(self):
+        """Builds the line data arrays."""
+        rng = numpy.random.default_rng([self._seed, 1])
+        n = self._bus_count
+        width = int(numpy.ceil(numpy.sqrt(n)))
+        index = numpy.arange(n)
+        has_left = index % width > 0
+        has_up = index >= width
+
+        # Connect each bus to its left or upper neighbor, choosing at random where it has both.
+        choose_left = has_left & (~has_up | (rng.random(n) < 0.5))
+        tree_neighbor = numpy.where(choose_left, index - 1, index - width)[1:]
+
+        # Add the grid edges that are not part of the tree at random.
+        left_extra = has_left & ~choose_left & (rng.random(n) < self._mesh_probability)
+        up_extra = has_up & choose_left & (rng.random(n) < self._mesh_probability)
+        source = numpy.concatenate([tree_neighbor, index[left_extra] - 1, index[up_extra] - width])
+        destination = numpy.concatenate([index[1:], index[left_extra], index[up_extra]])
+
+        count = len(source)
+        r = rng.uniform(0.002, 0.01, count)
+        x = r * rng.uniform(5, 10, count)
+        b = rng.uniform(0.005, 0.03, count)
+        return power_system.LineData(source + 1, destination + 1, r + 1j * x, 1j * b / 2, numpy.full(count, 250.0))
+
+
+def create_builder(filename, start_voltage=FLAT_START_VOLTAGE, power_base=DEFAULT_POWER_BASE, **options):
+    """Creates a power system builder for an input file, selected from the file extension.
+
+    Args:
+        filename: The input filename. A CSV file is expected to contain bus data.
+        start_voltage: The start voltage for PQ buses.
+        power_base: The power base in MVA. MATPOWER and RAW cases specify their own power base.
+        options: Additional builder options: the worksheet names for Excel workbooks (bus_data_worksheet_name and
+            line_data_worksheet_name) and the name of the line data file for CSV files (line_data_filename).
+
+    Returns:
+        A power system builder.
+
+    Raises:
+        ValueError: If the file extension is not recognized.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        bus_data_worksheet_name = options.get('bus_data_worksheet_name', DEFAULT_BUS_DATA_WORKSHEET_NAME)
+        line_data_worksheet_name = options.get('line_data_worksheet_name', DEFAULT_LINE_DATA_WORKSHEET_NAME)
+        return ExcelPowerSystemBuilder(filename, bus_data_worksheet_name, line_data_worksheet_name, start_voltage,
+                                       power_base)
+    if extension == '.csv':
+        if not options.get('line_data_filename'):
+            raise ValueError('A line data file is required for CSV input.')
+        return CsvPowerSystemBuilder(filename, options['line_data_filename'], start_voltage, power_base)
+    if extension == '.m':
+        return MatpowerPowerSystemBuilder(filename, start_voltage)
+    if extension == '.raw':
+        return RawPowerSystemBuilder(filename, start_voltage)
+    raise ValueError('Unrecognized input file format: {}'.format(filename))
+
+
+def _read_csv_columns(filename, count):
+    """Reads the first columns of a CSV file with a header row into float arrays. Empty fields are read as NaN."""
+    data = numpy.genfromtxt(filename, delimiter=',', skip_header=1, usecols=range(count), ndmin=2)
+    return data.reshape(-1, count).T
+
+
+def _matpower_matrix(text, name):
+    """Parses a numeric matrix assigned to a field of a MATPOWER case."""
+    match = re.search(r'mpc\.{}\s*=\s*\[(.*?)\]'.format(name), text, re.DOTALL)
+    if match is None:
+        raise ValueError('The MATPOWER case does not contain mpc.{}.'.format(name))
+
+    rows = [row for row in re.split(r'[;\n]', match.group(1).replace(',', ' ')) if row.strip()]
+    values = numpy.array(' '.join(rows).split(), dtype=float)
+    return values.reshape(len(rows), -1)
+
+
+def _raw_sections(lines):
+    """Splits the lines of a RAW case following its header into sections, which are terminated by a line '0 / ...'."""
+    sections = [[]]
+    for line in lines:
+        if line.strip() == 'Q':
+            break
+        if re.match(r'\s*0\s*(/|$)', line):
+            sections.append([])
+        else:
+            sections[-1].append(line)
+    return sections
+
+
+def _raw_records(lines):
+    """Parses the comma separated fields of the records of a RAW case section. Names are quoted with single quotes."""
+    return [[field.strip() for field in record] for record in csv.reader(lines, quotechar="'", skipinitialspace=True)]
+
+
+def _raw_transformer_impedance(code, r, x, winding_base, power_base):
+    """Converts the impedance of a RAW two-winding transformer to per-unit on the system base.
+
+    Args:
+        code: The impedance code CZ. The impedance is in per-unit on the system base if it is 1, in per-unit on the
+            winding base if it is 2, and given as the load loss in watts and the impedance magnitude in per-unit on the
+            winding base if it is 3.
+        r: The R1-2 field.
+        x: The X1-2 field.
+        winding_base: The winding base in MVA.
+        power_base: The system base in MVA.
+
+    Returns:
+        A tuple containing the resistance and reactance in per-unit on the system base.
+
+    Raises:
+        ValueError: If the impedance code is not supported.
+    """
+    if code == 1:
+        return r, x
+    if code == 2:
+        return r * power_base / winding_base, x * power_base / winding_base
+    if code == 3:
+        r = r / (winding_base * 1e6)
+        x = numpy.sqrt(max(x ** 2 - r ** 2, 0))
+        return r * power_base / winding_base, x * power_base / winding_base
+    raise ValueError('Unknown transformer impedance code: {}'.format(code))
+
+
+def _build_bus_data(numbers, generator_bus, voltage_magnitudes, active_power_consumed, reactive_power_consumed,
+                    generator_buses, active_power_generated, voltage_set_points, start_voltage, power_base):
+    """Builds bus data from a case in which loads are given per bus and generators are given separately.
+
+    The generation at each bus is combined, and the first generator at a bus sets its voltage. Buses of a generator type
+    start at their voltage set point, or at their case voltage magnitude if they have no generator. As in MATPOWER,
+    buses of a generator type with a generator in service are PV buses, and all other buses are PQ buses.
+    """
+    positions = _positions(numbers, generator_buses)
+    voltage = numpy.where(generator_bus, voltage_magnitudes, start_voltage).astype(complex)
+    voltage[positions[::-1]] = numpy.where(generator_bus[positions[::-1]], voltage_set_points[::-1],
+                                           voltage[positions[::-1]])
+    active_power_generated = numpy.bincount(positions, active_power_generated, len(numbers))
+    has_generator = numpy.bincount(positions, minlength=len(numbers)) > 0
+    bus_type = numpy.where(generator_bus & has_generator, power_flow_solver.BusType.PV.value,
+                           power_flow_solver.BusType.PQ.value)
+    bus_data = power_system.BusData.from_columns(numbers, active_power_consumed / power_base,
+                                                 reactive_power_consumed / power_base,
+                                                 active_power_generated / power_base, voltage)
+    return dataclasses.replace(bus_data, bus_type=bus_type)
+
+
+def _build_line_data(branch, in_service):
+    """Builds line data from rows of source bus, destination bus, resistance, reactance, susceptance, and rating."""
+    return power_system.LineData(branch[:, 0].astype(int), branch[:, 1].astype(int), branch[:, 2] + 1j * branch[:, 3],
+                                 1j * branch[:, 4] / 2, numpy.where(branch[:, 5] > 0, branch[:, 5], numpy.nan),
+                                 in_service)
+
+
+def _positions(numbers, values):
+    """Finds the position of each value in an array of bus numbers, or -1 if it is not present."""
+    order = numpy.argsort(numbers, kind='stable')
+    sorted_positions = numpy.searchsorted(numbers, values, sorter=order)
+    found = sorted_positions < len(numbers)
+    found[found] = numbers[order[sorted_positions[found]]] == values[found]
+
+    positions = numpy.full(len(values), -1)
+    positions[found] = order[sorted_positions[found]]
+    return positions
+
+
+def _first(values):
+    """Returns the first value of an array, or None if it is empty."""
+    return values[0].item() if len(values) else None
+
+
+def _warn_unsupported(bus_shunts, off_nominal_taps, phase_shifts):
+    """Warns about case data that the power system model does not support."""
+    for unsupported, description in ((bus_shunts, 'bus shunts'), (off_nominal_taps, 'off-nominal transformer taps'),
+                                     (phase_shifts, 'phase shifting transformers')):
+        if unsupported:
+            warnings.warn('The case contains {}, which are ignored.'.format(description))
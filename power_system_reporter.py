@@ -1,5 +1,13 @@
-"""A module containing power system reports."""
+"""A module containing power system reports.
 
+The quantities behind the bus voltage and line power reports are computed for all buses and lines at once from the
+voltage vector and the line source and destination index arrays, and are available as arrays through bus_voltages and
+line_flows. Rendering a report as a table is only needed for display, and may be limited to the buses and lines that
+violate their limits, which keeps reports on large systems short.
+"""
+
+import collections
+import dataclasses
 import numpy
 import power_flow_solver
 import power_system
@@ -7,50 +15,158 @@ import tabulate
 
 TABULATE_FLOAT_FMT = '.4f'
 
+LINE_POWER_HEADERS = ['Line', 'Sending Power (MW)', 'Sending Power (Mvar)', 'Sending Power (MVA)',
+                      'Receiving Power (MW)', 'Receiving Power (Mvar)', 'Receiving Power (MVA)', 'Exceeds Rating']
+
+
+@dataclasses.dataclass(frozen=True)
+class BusVoltages:
+    """The voltage magnitude and phase angle of each bus and whether it is outside operating limits."""
+    magnitude: numpy.ndarray
+    angle: numpy.ndarray
+    under_voltage: numpy.ndarray
+    over_voltage: numpy.ndarray
+
+    @property
+    def outside_limits(self):
+        return self.under_voltage | self.over_voltage
+
+
+@dataclasses.dataclass(frozen=True)
+class LineFlows:
+    """The complex power flowing into each line at its source and destination buses, in MVA.
+
+    The loading of a line is the larger apparent power of its two ends. Lines without a rating never exceed it.
+    """
+    sending_power: numpy.ndarray
+    receiving_power: numpy.ndarray
+    loading: numpy.ndarray
+    exceeds_rating: numpy.ndarray
+
+    @property
+    def losses(self):
+        return self.sending_power + self.receiving_power
+
+
+def bus_voltages(system, min_operating_voltage, max_operating_voltage, tolerance=0):
+    """Computes the voltage at each bus and checks it against operating limits.
+
+    Args:
+        system: The power system being analyzed.
+        min_operating_voltage: The minimum operating voltage.
+        max_operating_voltage: The maximum operating voltage.
+        tolerance: The amount by which a voltage must pass a limit before it is considered outside the limit.
+
+    Returns:
+        The bus voltages. Phase angles are in degrees.
+    """
+    magnitude = numpy.abs(system.bus_data.voltage)
+    return BusVoltages(magnitude, numpy.rad2deg(numpy.angle(system.bus_data.voltage)),
+                       magnitude < min_operating_voltage - tolerance, magnitude > max_operating_voltage + tolerance)
+
+
+def line_flows(system, power_base):
+    """Computes the power flowing through each line. Lines out of service carry no power.
+
+    Args:
+        system: The power system being analyzed.
+        power_base: The power base in MVA.
+
+    Returns:
+        The line flows.
+    """
+    line_data = system.line_data
+    v_src = system.bus_data.voltage[system.line_source_indices]
+    v_dst = system.bus_data.voltage[system.line_destination_indices]
+    i_src = (v_src - v_dst) / line_data.distributed_impedance + v_src * line_data.shunt_admittance
+    i_dst = (v_dst - v_src) / line_data.distributed_impedance + v_dst * line_data.shunt_admittance
+    s_src = power_base * v_src * numpy.conj(i_src) * line_data.in_service
+    s_dst = power_base * v_dst * numpy.conj(i_dst) * line_data.in_service
+    return _line_flows(line_data, s_src, s_dst)
+
+
+def dc_line_flows(system, line_flows, power_base):
+    """Converts the active power flows computed by a DC power flow to line flows.
+
+    DC line flows are lossless and have no reactive component, so the receiving power is the negative of the sending
+    power.
+
+    Args:
+        system: The power system being analyzed.
+        line_flows: The active power flowing from the source to the destination of each line in per-unit.
+        power_base: The power base in MVA.
+
+    Returns:
+        The line flows.
+    """
+    s_src = power_base * numpy.asarray(line_flows, dtype=complex)
+    return _line_flows(system.line_data, s_src, -s_src)
+
 
-def bus_voltage_report(system, min_operating_voltage, max_operating_voltage):
+def line_names(system, circuits=False):
+    """Returns the name of each line, in the form 'source-destination'.
+
+    Args:
+        system: The power system.
+        circuits: If true, parallel lines between the same pair of buses are told apart by their circuit number, counted
+            in line order, e.g. '1-2 #1' and '1-2 #2'. Contingency results use these names to identify each outage.
+    """
+    lines = list(zip(system.line_data.source.tolist(), system.line_data.destination.tolist()))
+    counts = collections.Counter(frozenset(line) for line in lines)
+    circuit_numbers = collections.Counter()
+    names = []
+    for source, destination in lines:
+        name = '{}-{}'.format(source, destination)
+        pair = frozenset((source, destination))
+        circuit_numbers[pair] += 1
+        names.append('{} #{}'.format(name, circuit_numbers[pair]) if circuits and counts[pair] > 1 else name)
+    return names
+
+
+def bus_voltage_report(system, min_operating_voltage, max_operating_voltage, violations_only=False):
     """Reports the voltage at each bus and whether the bus is outside operating limits.
 
     Args:
         system: The power system being analyzed.
         min_operating_voltage: The minimum operating voltage.
         max_operating_voltage: The maximum operating voltage.
+        violations_only: If true, only buses outside operating limits are reported.
     """
-    headers = ['Bus', 'Voltage (V)', 'Phase (deg)', 'Outside Operating Limits']
-    table = []
-    for bus in system.buses:
-        voltage = numpy.abs(bus.voltage)
-        outside_limits = 'Yes' if voltage < min_operating_voltage or voltage > max_operating_voltage else 'No'
-        table.append([bus.number, numpy.abs(bus.voltage), numpy.rad2deg(numpy.angle(bus.voltage)), outside_limits])
+    voltages = bus_voltages(system, min_operating_voltage, max_operating_voltage)
+    outside_limits = voltages.outside_limits
+    rows = numpy.flatnonzero(outside_limits) if violations_only else slice(None)
 
-    return tabulate.tabulate(table, headers=headers, floatfmt=TABULATE_FLOAT_FMT)
+    headers = ['Bus', 'Voltage (V)', 'Phase (deg)', 'Outside Operating Limits']
+    table = zip(system.bus_data.number[rows].tolist(), voltages.magnitude[rows].tolist(),
+                voltages.angle[rows].tolist(), _yes_no(outside_limits[rows]))
+    return tabulate.tabulate(list(table), headers=headers, floatfmt=TABULATE_FLOAT_FMT)
 
 
-def line_power_report(system, power_base):
+def line_power_report(system, power_base, violations_only=False):
     """Reports the active, reactive, and apparent power for each transmission line.
 
     Args:
         system: The power system being analyzed.
         power_base: The power base in MVA.
+        violations_only: If true, only lines that exceed their rating are reported.
     """
-    headers = ['Line', 'Sending Power (MW)', 'Sending Power (Mvar)', 'Sending Power (MVA)', 'Receiving Power (MW)',
-               'Receiving Power (Mvar)', 'Receiving Power (MVA)', 'Exceeds Rating']
-    table = []
-    for line in system.lines:
-        src = next(filter(lambda bus: bus.number == line.source, system.buses))
-        dst = next(filter(lambda bus: bus.number == line.destination, system.buses))
+    return _line_power_table(system, line_flows(system, power_base), violations_only)
+
 
-        i_src = (src.voltage - dst.voltage) / line.distributed_impedance + src.voltage * line.shunt_admittance
-        i_dst = (dst.voltage - src.voltage) / line.distributed_impedance + dst.voltage * line.shunt_admittance
-        s_src = power_base * src.voltage * numpy.conj(i_src)
-        s_dst = power_base * dst.voltage * numpy.conj(i_dst)
+def dc_line_power_report(system, line_flows, power_base, violations_only=False):
+    """Reports the active power for each transmission line computed by a DC power flow.
 
-        line_name = '{}-{}'.format(src.number, dst.number)
-        exceeds_rating = 'Yes' if line.max_power and max(s_src, s_dst) > line.max_power else 'No'
-        table.append([line_name, s_src.real, s_src.imag, numpy.abs(s_src), s_dst.real, s_dst.imag, numpy.abs(s_dst),
-                      exceeds_rating])
+    The report has the same format as the line power report. DC line flows are lossless and have no reactive component,
+    so the receiving power is the negative of the sending power and the apparent power is the magnitude of the active
+    power.
 
-    return tabulate.tabulate(table, headers=headers, floatfmt=TABULATE_FLOAT_FMT)
+    Args:
+        system: The power system being analyzed.
+        line_flows: The active power flowing from the source to the destination of each line in per-unit.
+        power_base: The power base in MVA.
+        violations_only: If true, only lines that exceed their rating are reported.
+    """
+    return _line_power_table(system, dc_line_flows(system, line_flows, power_base), violations_only)
 
 
 def largest_power_mismatch_report(iteration, estimates, power_base):
@@ -77,6 +193,25 @@ def largest_power_mismatch_report(iteration, estimates, power_base):
         iteration, max_p_error, max_p_error_estimate.bus.number, max_q_error, max_q_error_estimate.bus.number)
 
 
+def iteration_summary_report(summary, power_base, iteration=None):
+    """Reports the largest active and reactive power mismatches of an iteration summary.
+
+    The report has the same format as the largest power mismatch report, but is computed from the summary rather than
+    from a set of bus power estimates.
+
+    Args:
+        summary: A power_flow_solver.IterationSummary.
+        power_base: The power base in MVA.
+        iteration: The iteration number to report. If unspecified, the iteration of the summary is reported.
+    """
+    return '''Iteration {}
+  Largest active power mismatch:   {:8.4f} MW   (Bus {})
+  Largest reactive power mismatch: {:8.4f} Mvar (Bus {})'''.format(
+        summary.iteration if iteration is None else iteration, summary.max_active_power_error * power_base,
+        summary.max_active_power_error_bus, summary.max_reactive_power_error * power_base,
+        summary.max_reactive_power_error_bus)
+
+
 def power_generation_report(estimates, power_base, max_active_power_error, max_reactive_power_error):
     """Reports the active and reactive power generation from each generator and synchronous condenser.
 
@@ -99,3 +234,28 @@ def power_generation_report(estimates, power_base, max_active_power_error, max_r
     floatfmt_p = '.{}f'.format(int(numpy.ceil(-numpy.log10(max_active_power_error))))
     floatfmt_q = '.{}f'.format(int(numpy.ceil(-numpy.log10(max_reactive_power_error))))
     return tabulate.tabulate(table, headers=headers, floatfmt=(None, floatfmt_p, floatfmt_q))
+
+
+def _line_flows(line_data, s_src, s_dst):
+    """Builds line flows from the power flowing into each line at both ends."""
+    loading = numpy.maximum(numpy.abs(s_src), numpy.abs(s_dst))
+    with numpy.errstate(invalid='ignore'):
+        exceeds_rating = loading > line_data.max_power
+    return LineFlows(s_src, s_dst, loading, exceeds_rating)
+
+
+def _line_power_table(system, flows, violations_only):
+    """Renders line flows in the format of the line power report."""
+    rows = numpy.flatnonzero(flows.exceeds_rating) if violations_only else numpy.arange(len(system.line_data))
+    s_src = flows.sending_power[rows]
+    s_dst = flows.receiving_power[rows]
+    names = line_names(system)
+    table = zip([names[row] for row in rows.tolist()], s_src.real.tolist(), s_src.imag.tolist(),
+                numpy.abs(s_src).tolist(), s_dst.real.tolist(), s_dst.imag.tolist(), numpy.abs(s_dst).tolist(),
+                _yes_no(flows.exceeds_rating[rows]))
+    return tabulate.tabulate(list(table), headers=LINE_POWER_HEADERS, floatfmt=TABULATE_FLOAT_FMT)
+
+
+def _yes_no(values):
+    """Converts an array of booleans to a list of 'Yes' and 'No' strings."""
+    return numpy.where(values, 'Yes', 'No').tolist()
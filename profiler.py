@@ -0,0 +1,216 @@
+"""A module containing a lightweight profiler for the phases of a power flow run.
+
+Functions and blocks of code are assigned to named phases, such as building the Jacobian or rendering reports. While a
+Profiler is enabled, each phase records its number of calls, its total wall time, and the peak memory allocated while
+it runs. Phases may be nested, in which case the time and memory of the inner phase are included in the outer phase.
+Statistics accumulate across every solve executed while the profiler is enabled, and statistics gathered in other
+processes, e.g. by contingency analysis workers, may be merged in.
+
+When no profiler is enabled, entering a phase costs a single global lookup, so the instrumentation may be left in
+performance-critical code.
+
+    @profiler.profiled('jacobian')
+    def jacobian(self):
+        ...
+
+    with profiler.enable() as active_profiler:
+        with profiler.phase('solve'):
+            solve()
+    print(active_profiler.report())
+"""
+
+import contextlib
+import dataclasses
+import functools
+import json
+import tabulate
+import time
+import tracemalloc
+
+TABULATE_FLOAT_FMT = '.4f'
+
+# tracemalloc.reset_peak was added in Python 3.9. On earlier versions, the traces are cleared instead.
+_HAS_RESET_PEAK = hasattr(tracemalloc, 'reset_peak')
+
+
+@dataclasses.dataclass
+class PhaseStats:
+    """The statistics of a phase. The peak memory is the most memory allocated above the start of any call, in bytes."""
+    calls: int = 0
+    wall_time: float = 0.0
+    peak_memory: int = 0
+
+    def merge(self, other):
+        """Adds the statistics of another run of the same phase."""
+        self.calls += other.calls
+        self.wall_time += other.wall_time
+        self.peak_memory = max(self.peak_memory, other.peak_memory)
+
+
+class Profiler:
+    """A profiler that records statistics for each phase entered while it is enabled."""
+
+    def __init__(self, trace_memory=True):
+        """Initializes the profiler.
+
+        Args:
+            trace_memory: If true, the peak memory of each phase is traced with tracemalloc. Tracing slows down memory
+                allocations, so it may be disabled when only timings are of interest.
+        """
+        self._trace_memory = trace_memory
+        self._started_tracing = False
+        self._stats = {}
+        self._peaks = []
+        self._cleared_memory = 0
+
+    @property
+    def trace_memory(self):
+        """Returns whether the peak memory of each phase is traced."""
+        return self._trace_memory
+
+    @property
+    def stats(self):
+        """Returns a dict mapping each phase name to its statistics."""
+        return self._stats
+
+    def start(self):
+        """Starts tracing memory allocations, if enabled and not already being traced."""
+        if self._trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._cleared_memory = 0
+
+    def stop(self):
+        """Stops tracing memory allocations, if they were traced by this profiler."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Records the statistics of a block of code under a phase name."""
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            current, peak = self._traced_memory()
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            self._reset_peak(current)
+            self._peaks.append(current)
+
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - start_time
+            peak_memory = 0
+            if tracing:
+                # The tracemalloc peak is reset whenever a phase starts, so the peak of a phase is the largest of the
+                # peaks observed before and after each of its inner phases.
+                peak = max(self._peaks.pop(), self._traced_memory()[1])
+                peak_memory = max(peak - current, 0)
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+
+            self.merge({name: PhaseStats(1, wall_time, peak_memory)})
+
+    def _traced_memory(self):
+        """Returns the current and peak traced memory, including any memory traced before the traces were cleared."""
+        current, peak = tracemalloc.get_traced_memory()
+        return current + self._cleared_memory, peak + self._cleared_memory
+
+    def _reset_peak(self, current):
+        """Resets the peak traced memory to the current traced memory.
+
+        Without tracemalloc.reset_peak, the traces are cleared and the current traced memory is carried as an offset.
+        Blocks allocated before the traces were cleared are then no longer subtracted when they are freed, so peaks may
+        be overestimated.
+        """
+        if _HAS_RESET_PEAK:
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.clear_traces()
+            self._cleared_memory = current
+
+    def merge(self, stats):
+        """Adds statistics recorded elsewhere, e.g. in another process.
+
+        Args:
+            stats: A dict mapping a phase name to its statistics.
+        """
+        for name, phase_stats in stats.items():
+            self._stats.setdefault(name, PhaseStats()).merge(phase_stats)
+
+    def take(self):
+        """Returns the statistics recorded so far and resets them."""
+        stats, self._stats = self._stats, {}
+        return stats
+
+    def report(self):
+        """Reports the statistics of each phase, ordered from the longest to the shortest total wall time."""
+        headers = ['Phase', 'Calls', 'Total Time (s)', 'Mean Time (ms)', 'Peak Memory (MiB)']
+        table = []
+        for name, phase_stats in sorted(self._stats.items(), key=lambda item: item[1].wall_time, reverse=True):
+            table.append([name, phase_stats.calls, phase_stats.wall_time,
+                          1000 * phase_stats.wall_time / phase_stats.calls, phase_stats.peak_memory / 2 ** 20])
+
+        return tabulate.tabulate(table, headers=headers, floatfmt=TABULATE_FLOAT_FMT)
+
+    def to_json(self):
+        """Returns the statistics as a JSON-serializable dict. Times are in seconds and memory is in bytes."""
+        return {'phases': {name: dataclasses.asdict(phase_stats) for name, phase_stats in sorted(self._stats.items())}}
+
+    def dump(self, file):
+        """Writes the statistics to a file as JSON.
+
+        Args:
+            file: A writable text file.
+        """
+        json.dump(self.to_json(), file, indent=2)
+
+
+# The enabled profiler, if any.
+_active_profiler = None
+
+
+@contextlib.contextmanager
+def enable(profiler=None):
+    """Enables a profiler for the duration of a block of code.
+
+    Args:
+        profiler: The profiler to enable. If unspecified, a new profiler is created.
+
+    Yields:
+        The enabled profiler.
+    """
+    global _active_profiler
+    profiler = profiler or Profiler()
+    previous_profiler, _active_profiler = _active_profiler, profiler
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        _active_profiler = previous_profiler
+
+
+def active_profiler():
+    """Returns the enabled profiler, or None if profiling is disabled."""
+    return _active_profiler
+
+
+def phase(name):
+    """Returns a context manager that records a block of code under a phase name if a profiler is enabled."""
+    return contextlib.nullcontext() if _active_profiler is None else _active_profiler.phase(name)
+
+
+def profiled(name):
+    """Decorates a function so that each call is recorded under a phase name if a profiler is enabled."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _active_profiler is None:
+                return function(*args, **kwargs)
+            with _active_profiler.phase(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,550 @@
+"""A program that runs a long-lived power flow service for quick what-if studies.
+
+Starting a power flow program pays for the Python interpreter, its imports, parsing the input file, and building the
+admittance matrix before the first iteration, which dwarfs the solve itself for small changes to a known case. The
+service instead keeps each loaded case in memory, solved, along with a pool of pre-warmed solver instances. Each
+instance holds a copy of the case and a solver that keeps its admittance matrix, bus ordering, and Jacobian
+factorization between requests.
+
+A solve request names a case and a set of deltas: load changes, generator setpoints, and line status changes. The
+deltas are applied to the base case, not accumulated across requests. A free instance of the case is reset to the base
+case by restoring the admittance matrix and Jacobian factorization saved for it, the deltas are applied to it in place
+(line changes as low-rank updates of the factorization), and the power flow is solved from the base case solution on a
+pool of worker threads. Requests for different cases, or for the same case when several instances are free, are solved
+concurrently.
+
+The service speaks newline-delimited JSON over a Unix socket, or over TCP. Each request is a JSON object on one line
+with a method, optional parameters, and an optional id that is echoed in the response. Each response is a JSON object
+on one line containing either a result or an error. Requests on one connection are handled concurrently, so responses
+may arrive out of order. Powers are in MW and Mvar, voltages in per-unit, and angles in degrees.
+
+    {"id": 1, "method": "load_case", "params": {"case": "base", "filename": "data/Data.xlsx"}}
+    {"id": 2, "method": "solve", "params": {"case": "base", "loads": [{"bus": 3, "active_power": 120}],
+                                            "generators": [{"bus": 2, "voltage": 1.03}],
+                                            "lines": [{"index": 14, "in_service": false}]}}
+    {"id": 3, "method": "list_cases"}
+    {"id": 4, "method": "unload_case", "params": {"case": "base"}}
+
+    python solver_service.py --socket power_flow.sock --case base=data/Data.xlsx
+"""
+
+import argparse
+import asyncio
+import case_cache
+import concurrent.futures
+import dataclasses
+import island_solver
+import json
+import numpy
+import power_flow_solver
+import power_system
+import power_system_builder
+import power_system_reporter
+import queue
+import socket
+import time
+
+# Service constants.
+DEFAULT_SOCKET_PATH = 'power_flow.sock'
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_POOL_SIZE = 2
+
+# Power flow constants.
+DEFAULT_POWER_BASE = 100
+DEFAULT_MAX_ACTIVE_POWER_ERROR = 0.1
+DEFAULT_MAX_REACTIVE_POWER_ERROR = 0.1
+DEFAULT_MIN_OPERATING_VOLTAGE = 0.95
+DEFAULT_MAX_OPERATING_VOLTAGE = 1.05
+DEFAULT_MAX_ITERATIONS = power_flow_solver.DEFAULT_MAX_ITERATIONS
+
+# Solve statuses.
+SOLVED = 'Solved'
+NOT_CONVERGED = 'Not converged'
+DIVERGED = 'Diverged'
+
+# Bus data fields restored from the base case before each solve.
+_BUS_STATE_FIELDS = ('active_power_consumed', 'reactive_power_consumed', 'active_power_generated', 'voltage')
+
+
+class ServiceError(Exception):
+    """Raised when a request cannot be served, e.g. because it names an unknown case or bus."""
+
+
+@dataclasses.dataclass(frozen=True)
+class ServiceOptions:
+    """Options used to solve each case. Power quantities are in per-unit."""
+    max_active_power_error: float = DEFAULT_MAX_ACTIVE_POWER_ERROR / DEFAULT_POWER_BASE
+    max_reactive_power_error: float = DEFAULT_MAX_REACTIVE_POWER_ERROR / DEFAULT_POWER_BASE
+    min_operating_voltage: float = DEFAULT_MIN_OPERATING_VOLTAGE
+    max_operating_voltage: float = DEFAULT_MAX_OPERATING_VOLTAGE
+    max_iterations: int = DEFAULT_MAX_ITERATIONS
+    damping: str = None
+    sparse: bool = None
+    pool_size: int = DEFAULT_POOL_SIZE
+
+
+class Case:
+    """A solved base case and a pool of solver instances for it."""
+
+    def __init__(self, name, system, power_base, swing_bus_number, options=ServiceOptions()):
+        """Solves the base case and creates its solver instances.
+
+        Args:
+            name: The name of the case.
+            system: The base case power system. It is solved in place.
+            power_base: The power base in MVA.
+            swing_bus_number: The swing bus number.
+            options: The service options.
+
+        Raises:
+            ServiceError: If the base case does not converge.
+        """
+        self.name = name
+        self.system = system
+        self.power_base = power_base
+        self.swing_bus_number = swing_bus_number
+        self.options = options
+
+        if len(system.islands()) > 1:
+            raise ServiceError('The base case of {} is split into islands.'.format(name))
+
+        try:
+            converged = self.create_solver(system).solve(options.max_iterations)
+        except power_flow_solver.SOLVE_ERRORS:
+            converged = False
+        if not converged:
+            raise ServiceError('The base case of {} did not converge.'.format(name))
+
+        self._instances = queue.Queue()
+        for _ in range(options.pool_size):
+            self._instances.put(_SolverInstance(self))
+
+    def create_solver(self, system):
+        """Creates a Newton-Raphson solver for a copy of the base case."""
+        return power_flow_solver.PowerFlowSolver(
+            system, self.swing_bus_number, self.options.max_active_power_error, self.options.max_reactive_power_error,
+            self.options.sparse, jacobian_reuse=True, damping=self.options.damping)
+
+    def describe(self):
+        """Returns a JSON-serializable description of the case."""
+        return {'case': self.name, 'buses': len(self.system.bus_data), 'lines': len(self.system.line_data),
+                'power_base': self.power_base, 'swing_bus_number': self.swing_bus_number,
+                'pool_size': self.options.pool_size}
+
+    def solve(self, deltas):
+        """Solves the base case with a set of deltas applied, on the first free solver instance.
+
+        Args:
+            deltas: A dict that may contain lists of load, generator, and line deltas, as described in the module.
+
+        Returns:
+            A JSON-serializable dict containing the solution.
+        """
+        instance = self._instances.get()
+        try:
+            return instance.solve(deltas)
+        except ServiceError:
+            raise
+        except Exception:
+            # The solver may have been left in any state, so the instance starts over from the base case.
+            instance.invalidate()
+            raise
+        finally:
+            self._instances.put(instance)
+
+
+class _SolverInstance:
+    """A copy of a base case with a solver that is kept between requests."""
+
+    def __init__(self, case):
+        self._case = case
+        base = case.system
+        self._system = power_system.PowerSystem.from_data(
+            power_system.BusData(*(getattr(base.bus_data, field.name).copy()
+                                   for field in dataclasses.fields(power_system.BusData))),
+            power_system.LineData(*(getattr(base.line_data, field.name).copy()
+                                    for field in dataclasses.fields(power_system.LineData))))
+        self._bus_types = power_flow_solver.classify_buses(self._system.bus_data, case.swing_bus_number)
+        self._create_solver()
+        self._stale = False
+
+    def invalidate(self):
+        """Creates the solver again from the base case before the next request."""
+        self._stale = True
+
+    def solve(self, deltas):
+        """Resets the instance to the base case, applies a set of deltas, and solves the power flow."""
+        start_time = time.perf_counter()
+        self._reset()
+        try:
+            self._apply_bus_deltas(deltas.get('loads', ()), deltas.get('generators', ()))
+            line_deltas = deltas.get('lines', ())
+            for delta in line_deltas:
+                self._apply_line_delta(int(delta['index']), bool(delta['in_service']))
+        except (KeyError, TypeError, ValueError) as error:
+            self._stale = True
+            raise ServiceError('Invalid delta: {!r}'.format(error))
+
+        if line_deltas and len(self._system.islands()) > 1:
+            status, iterations, islands = self._solve_islands()
+        else:
+            status, iterations, islands = self._solve_system()
+
+        return self._solution(status, iterations, islands, time.perf_counter() - start_time)
+
+    def _create_solver(self):
+        """Creates a solver for the base case and saves its state with the Jacobian of the base case factorized."""
+        self._solver = self._case.create_solver(self._system)
+        self._solver.factorize()
+        self._base_state = self._solver.save_state()
+
+    def _reset(self):
+        """Restores the bus and line data of the base case, and the admittance matrix and factorization of its solver.
+
+        The solver is only created again if a previous request changed the type of a bus or failed to solve.
+        """
+        base = self._case.system
+        for name in _BUS_STATE_FIELDS:
+            getattr(self._system.bus_data, name)[:] = getattr(base.bus_data, name)
+        self._system.line_data.in_service[:] = base.line_data.in_service
+
+        if self._stale:
+            self._create_solver()
+            self._stale = False
+        else:
+            self._solver.restore_state(self._base_state)
+
+    def _apply_line_delta(self, index, in_service):
+        """Takes a line out of service or returns it to service."""
+        if not 0 <= index < len(self._system.line_data):
+            raise ServiceError('Unknown line index: {}'.format(index))
+
+        try:
+            self._solver.update_line(index, in_service=in_service)
+        except power_flow_solver.SOLVE_ERRORS:
+            # The line is still updated in the system, e.g. if it splits the system into islands.
+            self._stale = True
+
+    def _apply_bus_deltas(self, loads, generators):
+        """Applies load and generator deltas, creating a new solver if they change the type of any bus."""
+        bus_data = self._system.bus_data
+        power_base = self._case.power_base
+        for delta in loads:
+            index = self._bus_index(delta['bus'])
+            if 'active_power' in delta:
+                bus_data.active_power_consumed[index] = float(delta['active_power']) / power_base
+            if 'reactive_power' in delta:
+                bus_data.reactive_power_consumed[index] = float(delta['reactive_power']) / power_base
+
+        for delta in generators:
+            index = self._bus_index(delta['bus'])
+            if 'active_power' in delta:
+                bus_data.active_power_generated[index] = float(delta['active_power']) / power_base
+            if 'voltage' in delta:
+                bus_data.voltage[index] = float(delta['voltage']) * numpy.exp(1j * numpy.angle(bus_data.voltage[index]))
+
+        if not (loads or generators):
+            return
+
+        bus_types = power_flow_solver.classify_buses(bus_data, self._case.swing_bus_number)
+        if numpy.array_equal(bus_types, self._bus_types):
+            self._solver.update_buses()
+        else:
+            self._stale = True
+            self._solver = self._case.create_solver(self._system)
+
+    def _bus_index(self, bus_number):
+        """Returns the index of a bus."""
+        try:
+            return self._system.bus_indices[int(bus_number)]
+        except KeyError:
+            raise ServiceError('Unknown bus: {}'.format(bus_number))
+
+    def _solve_system(self):
+        """Solves the power flow of the whole system.
+
+        Returns:
+            A tuple containing the status, the number of iterations, and None for the islands.
+        """
+        summaries = []
+        try:
+            converged = self._solver.solve(self._case.options.max_iterations, callback=summaries.append)
+            status = SOLVED if converged else NOT_CONVERGED
+        except power_flow_solver.SOLVE_ERRORS as error:
+            status = DIVERGED if isinstance(error, power_flow_solver.DivergenceError) else NOT_CONVERGED
+
+        if status != SOLVED:
+            self._stale = True
+        return status, summaries[-1].iteration if summaries else 0, None
+
+    def _solve_islands(self):
+        """Solves the power flow of each island of the system separately.
+
+        Returns:
+            A tuple containing the status, the largest number of iterations of any island, and the island results.
+        """
+        options = self._case.options
+        island_options = island_solver.IslandOptions(options.max_active_power_error, options.max_reactive_power_error,
+                                                     options.max_iterations, options.damping, sparse=options.sparse,
+                                                     max_workers=1)
+        results = island_solver.solve_islands(self._system, [self._case.swing_bus_number], island_options)
+        solved = all(result.status in (island_solver.SOLVED, island_solver.DE_ENERGIZED) for result in results)
+        islands = [{'buses': result.bus_numbers.tolist(), 'swing_bus_number': result.swing_bus_number,
+                    'status': result.status} for result in results]
+        return SOLVED if solved else NOT_CONVERGED, max(result.iterations for result in results), islands
+
+    def _solution(self, status, iterations, islands, solve_time):
+        """Describes the solution of the instance as a JSON-serializable dict."""
+        options = self._case.options
+        voltages = power_system_reporter.bus_voltages(self._system, options.min_operating_voltage,
+                                                      options.max_operating_voltage)
+        flows = power_system_reporter.line_flows(self._system, self._case.power_base)
+        bus_numbers = self._system.bus_data.number
+        solution = {
+            'status': status,
+            'converged': status == SOLVED,
+            'iterations': iterations,
+            'solve_time': solve_time,
+            'bus_numbers': bus_numbers.tolist(),
+            'voltage_magnitudes': voltages.magnitude.tolist(),
+            'voltage_angles': voltages.angle.tolist(),
+            'line_loadings': flows.loading.tolist(),
+            'voltage_violations': bus_numbers[voltages.outside_limits].tolist(),
+            'line_violations': numpy.flatnonzero(flows.exceeds_rating).tolist(),
+        }
+        if islands is not None:
+            solution['islands'] = islands
+        return solution
+
+
+class SolverService:
+    """A service that solves what-if requests against cases kept in memory."""
+
+    def __init__(self, options=ServiceOptions(), max_workers=None, cache_directory=None):
+        """Initializes the service.
+
+        Args:
+            options: The options used to solve each case.
+            max_workers: The number of worker threads that solve requests. If unspecified, the default of
+                concurrent.futures.ThreadPoolExecutor is used.
+            cache_directory: A directory in which parsed cases are cached, or None to parse each case on load.
+        """
+        self._options = options
+        self._cache_directory = cache_directory
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers)
+        self._cases = {}
+
+    @property
+    def cases(self):
+        """Returns a dict mapping each case name to its case."""
+        return self._cases
+
+    def load_case(self, name, filename, swing_bus_number=None, power_base=DEFAULT_POWER_BASE, **builder_options):
+        """Builds, solves, and adds a case, replacing any case with the same name.
+
+        Args:
+            name: The name of the case.
+            filename: The input filename.
+            swing_bus_number: The swing bus number. If unspecified, the swing bus of the case, or bus 1, is used.
+            power_base: The power base in MVA, if the input does not specify one.
+            builder_options: Additional options passed to power_system_builder.create_builder.
+
+        Returns:
+            The case.
+        """
+        if self._cache_directory:
+            builder = case_cache.CachedPowerSystemBuilder(self._cache_directory, filename, power_base=power_base,
+                                                          **builder_options)
+        else:
+            builder = power_system_builder.create_builder(filename, power_base=power_base, **builder_options)
+
+        system = builder.build_system()
+        swing_bus_number = swing_bus_number or builder.swing_bus_number or power_flow_solver.DEFAULT_SWING_BUS_NUMBER
+        case = Case(name, system, builder.power_base, swing_bus_number, self._options)
+        self._cases[name] = case
+        return case
+
+    async def handle_request(self, request):
+        """Handles a request, running any parsing or solving on the worker threads.
+
+        Args:
+            request: A dict containing the method, parameters, and id of the request.
+
+        Returns:
+            A JSON-serializable response.
+        """
+        loop = asyncio.get_running_loop()
+        response = {'id': request.get('id')} if isinstance(request, dict) else {'id': None}
+        try:
+            if not isinstance(request, dict):
+                raise ServiceError('A request must be a JSON object.')
+
+            method = request.get('method')
+            params = dict(request.get('params') or {})
+            if method == 'load_case':
+                name = params.pop('case')
+                filename = params.pop('filename')
+                case = await loop.run_in_executor(self._executor, lambda: self.load_case(name, filename, **params))
+                response['result'] = case.describe()
+            elif method == 'unload_case':
+                response['result'] = self._find_case(params.get('case')).describe()
+                del self._cases[params['case']]
+            elif method == 'list_cases':
+                response['result'] = [case.describe() for case in self._cases.values()]
+            elif method == 'solve':
+                case = self._find_case(params.get('case'))
+                response['result'] = await loop.run_in_executor(self._executor, case.solve, params)
+            else:
+                raise ServiceError('Unknown method: {}'.format(method))
+        except Exception as error:
+            response['error'] = str(error) if isinstance(error, ServiceError) else '{}: {}'.format(
+                type(error).__name__, error)
+        return response
+
+    async def serve(self, socket_path=DEFAULT_SOCKET_PATH, host=None, port=None):
+        """Serves requests until cancelled.
+
+        Args:
+            socket_path: The path of the Unix socket, if no port is given.
+            host: The host to bind, if a port is given.
+            port: The TCP port to listen on. If unspecified, the service listens on the Unix socket.
+        """
+        server = await self.start(socket_path, host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def start(self, socket_path=DEFAULT_SOCKET_PATH, host=None, port=None):
+        """Starts listening for connections, and returns the server."""
+        if port is not None:
+            return await asyncio.start_server(self._handle_connection, host or DEFAULT_HOST, port)
+        return await asyncio.start_unix_server(self._handle_connection, socket_path)
+
+    def close(self):
+        """Waits for running requests to finish and stops the worker threads."""
+        self._executor.shutdown()
+
+    def _find_case(self, name):
+        """Returns a loaded case."""
+        if name not in self._cases:
+            raise ServiceError('Unknown case: {}'.format(name))
+        return self._cases[name]
+
+    async def _handle_connection(self, reader, writer):
+        """Handles the requests of a connection concurrently, writing each response as soon as it is ready."""
+        tasks = set()
+
+        async def respond(line):
+            try:
+                request = json.loads(line)
+            except ValueError as error:
+                response = {'id': None, 'error': 'Invalid JSON: {}'.format(error)}
+            else:
+                response = await self.handle_request(request)
+            writer.write(json.dumps(response).encode() + b'\n')
+            await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.create_task(respond(line))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+
+            await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+
+def request(method, params=None, socket_path=DEFAULT_SOCKET_PATH, host=None, port=None):
+    """Sends a single request to a running service and waits for its response.
+
+    Args:
+        method: The request method.
+        params: The request parameters.
+        socket_path: The path of the Unix socket, if no port is given.
+        host: The host of the service, if a port is given.
+        port: The TCP port of the service.
+
+    Returns:
+        The result of the request.
+
+    Raises:
+        ServiceError: If the service responds with an error.
+    """
+    if port is not None:
+        connection = socket.create_connection((host or DEFAULT_HOST, port))
+    else:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(socket_path)
+
+    with connection, connection.makefile('rwb') as file:
+        file.write(json.dumps({'id': 1, 'method': method, 'params': params or {}}).encode() + b'\n')
+        file.flush()
+        response = json.loads(file.readline())
+
+    if 'error' in response:
+        raise ServiceError(response['error'])
+    return response['result']
+
+
+def parse_arguments():
+    """Parses command line arguments.
+
+    Returns:
+        An object containing program arguments.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH, help='The path of the Unix socket to listen on.')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='The host to bind, if a TCP port is given.')
+    parser.add_argument('--port', type=int, help='Listen on a TCP port instead of a Unix socket.')
+    parser.add_argument('--case', action='append', default=[], metavar='NAME=FILE',
+                        help='A case to load at startup. May be repeated.')
+    parser.add_argument('--case_cache', help='A directory in which parsed cases are cached for faster loading.')
+    parser.add_argument('--pool_size', type=int, default=DEFAULT_POOL_SIZE,
+                        help='The number of solver instances kept for each case.')
+    parser.add_argument('--max_workers', type=int, help='The number of worker threads that solve requests.')
+    parser.add_argument('--power_base', type=float, default=DEFAULT_POWER_BASE, help='The base power quantity in MVA.')
+    parser.add_argument('--max_active_power_error', type=float, default=DEFAULT_MAX_ACTIVE_POWER_ERROR,
+                        help='The maximum allowed mismatch between computed and actual megawatts at each bus.')
+    parser.add_argument('--max_reactive_power_error', type=float, default=DEFAULT_MAX_REACTIVE_POWER_ERROR,
+                        help='The maximum allowed mismatch between computed and actual megavars at each bus.')
+    parser.add_argument('--min_operating_voltage', type=float, default=DEFAULT_MIN_OPERATING_VOLTAGE,
+                        help='The minimum acceptable per-unit voltage magnitude at a bus.')
+    parser.add_argument('--max_operating_voltage', type=float, default=DEFAULT_MAX_OPERATING_VOLTAGE,
+                        help='The maximum acceptable per-unit voltage magnitude at a bus.')
+    parser.add_argument('--max_iterations', type=int, default=DEFAULT_MAX_ITERATIONS,
+                        help='The maximum number of iterations before a request is considered not to converge.')
+    parser.add_argument('--damping', choices=power_flow_solver.DAMPING_METHODS,
+                        help='The method used to damp each Newton-Raphson correction (default: no damping).')
+    parser.add_argument('--sparse', action='store_true', default=None,
+                        help='Use sparse matrices and a sparse LU solver (by default, chosen from the system size).')
+    return parser.parse_args()
+
+
+def main():
+    """Loads the startup cases and serves requests until interrupted."""
+    args = parse_arguments()
+    options = ServiceOptions(args.max_active_power_error / args.power_base,
+                             args.max_reactive_power_error / args.power_base, args.min_operating_voltage,
+                             args.max_operating_voltage, args.max_iterations, args.damping, args.sparse,
+                             args.pool_size)
+    service = SolverService(options, args.max_workers, args.case_cache)
+    for case in args.case:
+        name, _, filename = case.partition('=')
+        service.load_case(name, filename, power_base=args.power_base)
+        print('Loaded case {}.'.format(name))
+
+    print('Listening on {}.'.format(args.socket if args.port is None else '{}:{}'.format(args.host, args.port)))
+    try:
+        asyncio.run(service.serve(args.socket, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+import batched_power_flow_solver
+import numpy
+import power_flow_solver
+import power_system
+import power_system_builder
+import unittest
+
+
+class TestBatchedPowerFlowSolver(unittest.TestCase):
+    LOAD_FACTORS = [[0.9], [1.0], [1.1]]
+
+    @staticmethod
+    def solve(system):
+        solver = power_flow_solver.PowerFlowSolver(system, max_active_power_error=0.00001,
+                                                   max_reactive_power_error=0.00001)
+        iterations = 0
+        while not solver.has_converged():
+            solver.step()
+            iterations += 1
+        return iterations
+
+    def test_solution(self):
+        for filename in ('data/Data.xlsx', 'data/Sample-Powell-3.1.xlsx'):
+            builder = power_system_builder.ExcelPowerSystemBuilder(filename)
+            system = builder.build_system()
+            solver = batched_power_flow_solver.BatchedPowerFlowSolver(
+                system, system.bus_data.active_power_consumed * self.LOAD_FACTORS,
+                system.bus_data.reactive_power_consumed * self.LOAD_FACTORS, max_active_power_error=0.00001,
+                max_reactive_power_error=0.00001)
+            self.assertFalse(solver.has_converged())
+            numpy.testing.assert_array_equal(solver.solve(), [True, True, True])
+            self.assertTrue(solver.has_converged())
+
+            for k, (factor,) in enumerate(self.LOAD_FACTORS):
+                expected_system = builder.build_system()
+                expected_system.bus_data.active_power_consumed[:] *= factor
+                expected_system.bus_data.reactive_power_consumed[:] *= factor
+                iterations = TestBatchedPowerFlowSolver.solve(expected_system)
+
+                # Each scenario drops out of the batch as soon as it converges.
+                self.assertEqual(solver.iterations[k], iterations)
+                numpy.testing.assert_array_almost_equal(solver.voltages[k], expected_system.bus_data.voltage, 8)
+
+    def test_jacobians(self):
+        builder = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx')
+        system = builder.build_system()
+        solver = batched_power_flow_solver.BatchedPowerFlowSolver(system)
+        expected = power_flow_solver.PowerFlowSolver(system, sparse=False).jacobian()
+        numpy.testing.assert_array_almost_equal(solver._jacobians(solver.voltages)[0], expected)
+
+    def test_iteration_limit(self):
+        builder = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx')
+        system = builder.build_system()
+        solver = batched_power_flow_solver.BatchedPowerFlowSolver(
+            system, system.bus_data.active_power_consumed * [[1.0], [50.0]])
+        numpy.testing.assert_array_equal(solver.solve(max_iterations=10), [True, False])
+        self.assertFalse(solver.has_converged())
+
+    def test_zero_injection_bus(self):
+        # Bus 3 carries power from bus 2 to bus 4 without any load or generation of its own.
+        bus_data = power_system.BusData.from_columns([1, 2, 3, 4], [0, 0.5, 0, 0.8], [0, 0.2, 0, 0.3], [0] * 4,
+                                                     [1.02, 1, 1, 1])
+        line_data = power_system.LineData.from_columns([1, 2, 3], [2, 3, 4], [0.01 + 0.05j] * 3, [0] * 3, [None] * 3)
+        system = power_system.PowerSystem.from_data(bus_data, line_data)
+        solver = batched_power_flow_solver.BatchedPowerFlowSolver(system, max_active_power_error=0.00001,
+                                                                  max_reactive_power_error=0.00001)
+        numpy.testing.assert_array_equal(solver.solve(), [True])
+
+        TestBatchedPowerFlowSolver.solve(system)
+        numpy.testing.assert_array_almost_equal(solver.voltages[0], system.bus_data.voltage, 8)
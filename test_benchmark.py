@@ -0,0 +1,77 @@
+import benchmark
+import json
+import numpy
+import os
+import power_flow_solver
+import tempfile
+import unittest
+import unittest.mock
+
+
+class TestBenchmark(unittest.TestCase):
+    @staticmethod
+    def run_with_timings(label, timings):
+        return {'label': label, 'results': {'10': {'timings': timings}, '100': {'timings': timings}}}
+
+    def test_run_benchmarks(self):
+        run = benchmark.run_benchmarks([10], benchmark.BenchmarkOptions(repeats=1), 'test')
+        self.assertEqual(run['label'], 'test')
+        result = run['results']['10']
+        self.assertEqual(result['buses'], 10)
+        self.assertGreater(result['iterations'], 0)
+        self.assertTrue(result['converged'])
+        self.assertFalse(result['sparse'])
+        self.assertEqual(set(result['timings']), set(benchmark.PHASES))
+        self.assertTrue(all(time > 0 for time in result['timings'].values()))
+
+        # Runs are appended to the history and can be found by label or index.
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'history.json')
+            benchmark.append_history(filename, run)
+            benchmark.append_history(filename, dict(run, label='other'))
+            history = benchmark.read_history(filename)
+            self.assertEqual(len(history), 2)
+            self.assertEqual(benchmark.find_run(history, 'test')['label'], 'test')
+            self.assertEqual(benchmark.find_run(history, '-1')['label'], 'other')
+            self.assertRaises(KeyError, benchmark.find_run, history, 'missing')
+            with open(filename) as file:
+                self.assertEqual(json.load(file)[0]['results']['10']['timings'], result['timings'])
+
+    def test_benchmark_size_not_solved(self):
+        # A solve that raises, e.g. because the Jacobian is singular, is timed and recorded as not converged.
+        with unittest.mock.patch.object(power_flow_solver.PowerFlowSolver, 'solve',
+                                        side_effect=numpy.linalg.LinAlgError('Singular matrix')):
+            result = benchmark.benchmark_size(10, benchmark.BenchmarkOptions(repeats=1))
+        self.assertFalse(result['converged'])
+        self.assertEqual(result['iterations'], 0)
+        self.assertGreater(result['timings'][benchmark.SOLVE], 0)
+
+    def test_compare_runs(self):
+        baseline = TestBenchmark.run_with_timings('baseline', {benchmark.JACOBIAN: 0.01, benchmark.SOLVE: 0.1,
+                                                               benchmark.MISMATCHES: 0.00001})
+        candidate = TestBenchmark.run_with_timings('candidate', {benchmark.JACOBIAN: 0.0105, benchmark.SOLVE: 0.2,
+                                                                 benchmark.MISMATCHES: 0.00005})
+        candidate['results']['1000'] = candidate['results']['10']
+
+        comparisons = benchmark.compare_runs(baseline, candidate)
+        self.assertEqual([(comparison.size, comparison.phase) for comparison in comparisons],
+                         [(size, phase) for size in (10, 100) for phase in (benchmark.MISMATCHES, benchmark.JACOBIAN,
+                                                                            benchmark.SOLVE)])
+
+        # Only the full solve slowed down by more than the threshold; the mismatches are too fast to compare.
+        self.assertEqual([comparison.phase for comparison in comparisons if comparison.regression],
+                         [benchmark.SOLVE, benchmark.SOLVE])
+        self.assertAlmostEqual(comparisons[2].ratio, 2)
+        self.assertIn('Regression', benchmark.comparison_report(comparisons))
+
+    def test_compare_runs_not_converged(self):
+        timings = {benchmark.JACOBIAN: 0.01, benchmark.SOLVE: 0.1}
+        baseline = TestBenchmark.run_with_timings('baseline', timings)
+        candidate = TestBenchmark.run_with_timings('candidate', {benchmark.JACOBIAN: 0.01, benchmark.SOLVE: 0.05})
+        candidate['results']['100'] = dict(candidate['results']['100'], converged=False)
+
+        # A full solve that no longer converges is a regression, however fast it is.
+        comparisons = benchmark.compare_runs(baseline, candidate)
+        self.assertEqual([(comparison.size, comparison.phase) for comparison in comparisons if comparison.regression],
+                         [(100, benchmark.SOLVE)])
+        self.assertEqual([comparison.converged for comparison in comparisons], [True, True, False, False])
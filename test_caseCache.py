@@ -0,0 +1,56 @@
+import case_cache
+import numpy
+import os
+import power_system_builder
+import shutil
+import tempfile
+import unittest
+
+
+class TestCaseCache(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self._directory)
+
+    def test_build_system(self):
+        expected = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx').build_system()
+        builder = case_cache.CachedPowerSystemBuilder(self._directory, 'data/Data.xlsx')
+        actual = builder.build_system()
+        self.assertTrue(os.path.isdir(builder.path))
+        self.assertListEqual(expected.buses, actual.buses)
+        self.assertListEqual(expected.lines, actual.lines)
+        self.assertEqual(builder.power_base, 100)
+        self.assertIsNone(builder.swing_bus_number)
+
+        # The cached case is memory-mapped, and changes to a loaded system do not reach the cache.
+        cached = case_cache.CachedPowerSystemBuilder(self._directory, 'data/Data.xlsx').build_system()
+        self.assertIsInstance(cached.bus_data.voltage, numpy.memmap)
+        cached.bus_data.voltage[:] = 0
+        cached.update_line(0, in_service=False)
+        reloaded = case_cache.CachedPowerSystemBuilder(self._directory, 'data/Data.xlsx').build_system()
+        self.assertListEqual(expected.buses, reloaded.buses)
+        self.assertListEqual(expected.lines, reloaded.lines)
+
+        # The bus orderings are cached with the case.
+        self.assertIsInstance(reloaded.bus_ordering(), numpy.memmap)
+        numpy.testing.assert_array_equal(reloaded.bus_ordering(), expected.bus_ordering())
+
+    def test_case_key(self):
+        key = case_cache.case_key('data/Data.xlsx')
+        self.assertEqual(key, case_cache.case_key('data/Data.xlsx'))
+        self.assertNotEqual(key, case_cache.case_key('data/Data.xlsx', power_base=50))
+        self.assertNotEqual(key, case_cache.case_key('data/Data.xlsx', start_voltage=1.01))
+        self.assertNotEqual(key, case_cache.case_key('data/Data.xlsx', bus_data_worksheet_name='Buses'))
+
+        # Modifying the input invalidates the entry.
+        filename = os.path.join(self._directory, 'Data.m')
+        shutil.copy('data/Data.m', filename)
+        key = case_cache.case_key(filename)
+        stat = os.stat(filename)
+        os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        self.assertNotEqual(key, case_cache.case_key(filename))
+
+    def test_case_specified_power_base(self):
+        builder = case_cache.CachedPowerSystemBuilder(self._directory, 'data/Data.m', power_base=50)
+        self.assertEqual(builder.power_base, 100)
+        self.assertEqual(builder.swing_bus_number, 1)
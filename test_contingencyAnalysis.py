@@ -0,0 +1,100 @@
+import contingency_analysis
+import numpy
+import power_flow_solver
+import power_system
+import power_system_builder
+import unittest
+import unittest.mock
+
+
+class TestContingencyAnalysis(unittest.TestCase):
+    def test_run_contingency_analysis(self):
+        builder = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx')
+        system = builder.build_system()
+        options = contingency_analysis.ContingencyOptions()
+        converged, _ = contingency_analysis.solve(system, options)
+        self.assertTrue(converged)
+
+        results = contingency_analysis.run_contingency_analysis(system, options, 100, processes=2)
+        self.assertEqual(len(results), len(system.lines))
+        self.assertListEqual([result.line_index for result in results], list(range(len(system.lines))))
+
+        # The two parallel lines between buses 1 and 2 are told apart by their circuit numbers.
+        self.assertListEqual([result.line_name for result in results[:3]], ['1-2 #1', '1-2 #2', '1-5'])
+
+        # The remaining parallel line keeps its base case name when the other is removed.
+        self.assertIn('Line 1-2 #2', [violation.element for violation in results[0].violations])
+        self.assertIn('Line 1-2 #1', [violation.element for violation in results[1].violations])
+
+        # Removing line 2-3 leaves bus 3 fed through a single high resistance line.
+        self.assertListEqual([result.line_name for result in results if not result.converged], ['2-3'])
+
+        # The outage diverges, and is abandoned before the iteration limit.
+        self.assertEqual(results[3].line_name, '2-3')
+        self.assertFalse(results[3].converged)
+        self.assertLess(results[3].iterations, options.max_iterations)
+
+        # Each outage matches a serial solve of the same system with the line removed.
+        result = results[14]
+        self.assertEqual(result.line_name, '7-12')
+        line_data = power_system.LineData(*(numpy.delete(getattr(system.line_data, name), 14)
+                                            for name in contingency_analysis._LINE_FIELDS))
+        bus_data = system.bus_data
+        outage = power_system.PowerSystem.from_data(power_system.BusData(
+            bus_data.number, bus_data.active_power_consumed, bus_data.reactive_power_consumed,
+            bus_data.active_power_generated, bus_data.voltage.copy()), line_data)
+        contingency_analysis.solve(outage, options)
+        self.assertListEqual(contingency_analysis.find_violations(outage, options, 100), result.violations)
+        self.assertSetEqual({violation.element for violation in result.violations if violation.kind ==
+                             contingency_analysis.UNDER_VOLTAGE}, {'Bus 7', 'Bus 8'})
+
+    def test_outage_bus_ordering(self):
+        builder = power_system_builder.SyntheticPowerSystemBuilder(120, 0)
+        system = builder.build_system()
+        options = contingency_analysis.ContingencyOptions(swing_bus_number=builder.swing_bus_number)
+        system.bus_ordering(power_flow_solver.DEFAULT_ORDERING)
+        minimum_degree_ordering = power_system._minimum_degree_ordering
+
+        def islands_only(adjacency):
+            # Islands are ordered on their own, but outages that keep every bus connected reuse the base case ordering.
+            self.assertLess(adjacency.shape[0], len(system.bus_data))
+            return minimum_degree_ordering(adjacency)
+
+        with unittest.mock.patch.object(power_system, '_minimum_degree_ordering', islands_only):
+            results = contingency_analysis.run_contingency_analysis(system, options, 100, processes=2)
+        self.assertTrue(all(result.converged for result in results))
+
+    def test_violation_report(self):
+        violation_1 = contingency_analysis.Violation(contingency_analysis.UNDER_VOLTAGE, 'Bus 2', 0.9, 0.95, 5.2632)
+        violation_2 = contingency_analysis.Violation(contingency_analysis.LINE_OVERLOAD, 'Line 1-2', 60, 50, 20)
+        results = [contingency_analysis.ContingencyResult(0, '1-2', True, 3, [violation_1]),
+                   contingency_analysis.ContingencyResult(1, '2-3', True, 3, [violation_2])]
+
+        rows = contingency_analysis.violation_report(results).splitlines()[2:]
+        self.assertIn('Line 2-3', rows[0])
+        self.assertIn('Line 1-2', rows[1])
+
+    def test_islanding_outage(self):
+        # Add a load at bus 13, fed radially from bus 12.
+        system = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx').build_system()
+        bus_data = system.bus_data
+        line_data = system.line_data
+        system = power_system.PowerSystem.from_data(
+            power_system.BusData(*(numpy.append(getattr(bus_data, name), value) for name, value in (
+                ('number', 13), ('active_power_consumed', 0.05), ('reactive_power_consumed', 0.01),
+                ('active_power_generated', 0), ('voltage', 1)))),
+            power_system.LineData(*(numpy.append(getattr(line_data, name), value) for name, value in zip(
+                contingency_analysis._LINE_FIELDS, (12, 13, 0.01 + 0.1j, 0, numpy.nan, True)))))
+        options = contingency_analysis.ContingencyOptions()
+        converged, _ = contingency_analysis.solve(system, options)
+        self.assertTrue(converged)
+
+        # The outage of line 12-13 de-energizes bus 13 rather than failing to converge.
+        results = contingency_analysis.run_contingency_analysis(system, options, 100, processes=2)
+        result = results[-1]
+        self.assertEqual(result.line_name, '12-13')
+        self.assertTrue(result.converged)
+        self.assertIn(contingency_analysis.Violation(contingency_analysis.DE_ENERGIZED, 'Bus 13', 0.0, 0.95, 100.0),
+                      result.violations)
+        self.assertNotIn('Bus 13', [violation.element for violation in result.violations
+                                    if violation.kind == contingency_analysis.UNDER_VOLTAGE])
@@ -0,0 +1,56 @@
+import continuation_power_flow
+import numpy
+import power_flow_solver
+import power_system_builder
+import unittest
+
+
+class TestContinuationPowerFlow(unittest.TestCase):
+    OPTIONS = continuation_power_flow.ContinuationOptions(max_active_power_error=0.000001,
+                                                          max_reactive_power_error=0.000001)
+
+    @staticmethod
+    def solve(system, max_iterations=30):
+        solver = power_flow_solver.PowerFlowSolver(system, max_active_power_error=0.000001,
+                                                   max_reactive_power_error=0.000001)
+        for _ in range(max_iterations):
+            if solver.has_converged():
+                return True
+            solver.step()
+        return solver.has_converged()
+
+    def test_trace(self):
+        builder = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx')
+        system = builder.build_system()
+        base_loads = system.bus_data.active_power_consumed.copy()
+        result = continuation_power_flow.ContinuationPowerFlow(system, self.OPTIONS).trace()
+
+        # The curves are traced through the nose.
+        load_parameters = [point.load_parameter for point in result.points]
+        self.assertEqual(load_parameters[0], 0)
+        self.assertEqual(result.nose.load_parameter, max(load_parameters))
+        self.assertLess(load_parameters[-1], result.nose.load_parameter)
+        self.assertGreater(result.factorizations_saved, 0)
+
+        # The system is restored to the base case solution.
+        numpy.testing.assert_array_equal(system.bus_data.active_power_consumed, base_loads)
+        numpy.testing.assert_array_equal(system.bus_data.voltage, result.points[0].voltage)
+
+        # Each point is a power flow solution for its loading.
+        point = result.points[3]
+        expected_system = builder.build_system()
+        expected_system.bus_data.active_power_consumed[:] *= 1 + point.load_parameter
+        expected_system.bus_data.reactive_power_consumed[:] *= 1 + point.load_parameter
+        self.assertTrue(TestContinuationPowerFlow.solve(expected_system))
+        numpy.testing.assert_array_almost_equal(point.voltage, expected_system.bus_data.voltage, 5)
+
+    def test_nose(self):
+        builder = power_system_builder.ExcelPowerSystemBuilder('data/Sample-Powell-3.1.xlsx')
+        result = continuation_power_flow.ContinuationPowerFlow(builder.build_system(), self.OPTIONS).trace()
+
+        # A power flow solution exists just below the maximum loading but not above it.
+        for factor, expected in ((0.98, True), (1.02, False)):
+            system = builder.build_system()
+            system.bus_data.active_power_consumed[:] *= 1 + factor * result.nose.load_parameter
+            system.bus_data.reactive_power_consumed[:] *= 1 + factor * result.nose.load_parameter
+            self.assertEqual(TestContinuationPowerFlow.solve(system), expected)
@@ -0,0 +1,21 @@
+import numpy
+import power_system_builder
+import unittest
+
+
+class TestCsvPowerSystemBuilder(unittest.TestCase):
+    def test_system(self):
+        builder = power_system_builder.CsvPowerSystemBuilder('data/Data-Bus.csv', 'data/Data-Line.csv')
+        actual = builder.build_system()
+        expected = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx').build_system()
+
+        self.assertListEqual(expected.buses, actual.buses)
+        self.assertListEqual(expected.lines, actual.lines)
+
+    def test_create_builder(self):
+        builder = power_system_builder.create_builder('data/Data-Bus.csv', line_data_filename='data/Data-Line.csv')
+        self.assertIsInstance(builder, power_system_builder.CsvPowerSystemBuilder)
+        numpy.testing.assert_array_equal(builder.build_bus_data().number, numpy.arange(1, 13))
+
+        with self.assertRaises(ValueError):
+            power_system_builder.create_builder('data/Data-Bus.csv')
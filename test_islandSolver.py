@@ -0,0 +1,77 @@
+import dataclasses
+import island_solver
+import numpy
+import power_flow_solver
+import power_system_builder
+import unittest
+
+
+class TestIslandSolver(unittest.TestCase):
+    OPTIONS = island_solver.IslandOptions(max_active_power_error=0.00001, max_reactive_power_error=0.00001)
+
+    @staticmethod
+    def build_islanded_system():
+        """Builds the Data.xlsx system with bus 3 isolated and buses 10 and 11 forming a separate island."""
+        system = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx').build_system()
+        for index, line in enumerate(system.lines):
+            if (line.source, line.destination) in ((2, 3), (3, 4), (6, 10), (6, 11), (11, 12)):
+                system.update_line(index, in_service=False)
+        return system
+
+    def test_solve_islands(self):
+        system = TestIslandSolver.build_islanded_system()
+        results = island_solver.solve_islands(system, [1], self.OPTIONS)
+
+        self.assertEqual([result.bus_numbers.tolist() for result in results],
+                         [[1, 2, 4, 5, 6, 7, 8, 9, 12], [3], [10, 11]])
+        self.assertEqual([result.swing_bus_number for result in results], [1, 3, 10])
+        self.assertTrue(all(result.converged for result in results))
+
+        # Each island matches a solve of the island on its own.
+        island = TestIslandSolver.build_islanded_system().subsystem(numpy.array([9, 10]))
+        solver = power_flow_solver.PowerFlowSolver(island, 10, 0.00001, 0.00001)
+        self.assertTrue(solver.solve())
+        numpy.testing.assert_array_almost_equal(system.bus_data.voltage[[9, 10]], island.bus_data.voltage, 5)
+
+        report = island_solver.island_report(results)
+        self.assertIn('1-2, 4-9, 12', report)
+        self.assertIn('10-11', report)
+
+    def test_solver_options(self):
+        expected = TestIslandSolver.build_islanded_system()
+        island_solver.solve_islands(expected, [1], self.OPTIONS)
+
+        # Each method and Jacobian reuse converges to the same solution.
+        for options in (dataclasses.replace(self.OPTIONS, fast_decoupled=True),
+                        dataclasses.replace(self.OPTIONS, jacobian_reuse=True, ordering=None, sparse=True)):
+            system = TestIslandSolver.build_islanded_system()
+            results = island_solver.solve_islands(system, [1], options)
+            self.assertTrue(all(result.converged for result in results))
+            numpy.testing.assert_array_almost_equal(system.bus_data.voltage, expected.bus_data.voltage, 4)
+
+    def test_dead_islands(self):
+        system = TestIslandSolver.build_islanded_system()
+        system.bus_data.active_power_generated[9] = 0
+
+        # The island of buses 10 and 11 has no generator, so it is de-energized.
+        results = island_solver.solve_islands(system, [1], self.OPTIONS)
+        self.assertEqual([result.status for result in results],
+                         [island_solver.SOLVED, island_solver.SOLVED, island_solver.DE_ENERGIZED])
+        numpy.testing.assert_array_equal(system.bus_data.voltage[[9, 10]], [0, 0])
+
+        # Without swing bus assignment, the island of bus 3 has a generator but no swing bus.
+        system = TestIslandSolver.build_islanded_system()
+        options = island_solver.IslandOptions(assign_swing_buses=False)
+        results = island_solver.solve_islands(system, [1], options)
+        self.assertEqual([result.status for result in results],
+                         [island_solver.SOLVED, island_solver.NO_SWING_BUS, island_solver.NO_SWING_BUS])
+
+    def test_not_converged(self):
+        system = TestIslandSolver.build_islanded_system()
+        start_voltage = system.bus_data.voltage.copy()
+        system.bus_data.active_power_consumed[10] = 50
+
+        results = island_solver.solve_islands(system, [1], self.OPTIONS)
+        self.assertEqual(results[2].status, island_solver.NOT_CONVERGED)
+        self.assertTrue(results[0].converged)
+        numpy.testing.assert_array_equal(system.bus_data.voltage[[9, 10]], start_voltage[[9, 10]])
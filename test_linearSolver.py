@@ -0,0 +1,69 @@
+import linear_solver
+import numpy
+import scipy.sparse
+import unittest
+
+
+class TestLinearSolver(unittest.TestCase):
+    MATRIX = [[4, -1, 0, -1],
+              [-1, 4, -1, 0],
+              [0, -1, 4, -1],
+              [-1, 0, -1, 4]]
+    RHS = numpy.array([1, 2, 3, 4], dtype=float)
+
+    def test_abstract_solver(self):
+        with self.assertRaises(TypeError):
+            linear_solver.LinearSolver()
+
+    def test_dense_solve(self):
+        actual = linear_solver.DenseLinearSolver().solve(self.MATRIX, self.RHS)
+        expected = numpy.linalg.solve(self.MATRIX, self.RHS)
+        numpy.testing.assert_array_almost_equal(actual, expected)
+
+    def test_dense_factorize(self):
+        factorization = linear_solver.DenseLinearSolver().factorize(scipy.sparse.csr_matrix(self.MATRIX))
+        numpy.testing.assert_array_almost_equal(numpy.matmul(self.MATRIX, factorization.solve(self.RHS)), self.RHS)
+
+    def test_sparse_solve(self):
+        actual = linear_solver.SparseLinearSolver().solve(scipy.sparse.csr_matrix(self.MATRIX), self.RHS)
+        expected = numpy.linalg.solve(self.MATRIX, self.RHS)
+        numpy.testing.assert_array_almost_equal(actual, expected)
+
+    def test_sparse_factorize(self):
+        factorization = linear_solver.SparseLinearSolver().factorize(numpy.array(self.MATRIX, dtype=float))
+        numpy.testing.assert_array_almost_equal(numpy.matmul(self.MATRIX, factorization.solve(self.RHS)), self.RHS)
+
+    def test_sparse_factorize_singular(self):
+        for solver in (linear_solver.SparseLinearSolver(), linear_solver.SparseLinearSolver(symmetric_mode=True)):
+            with self.assertRaises(numpy.linalg.LinAlgError):
+                solver.factorize(numpy.zeros((4, 4)))
+
+    def test_low_rank_update(self):
+        for solver in (linear_solver.DenseLinearSolver(), linear_solver.SparseLinearSolver()):
+            factorization = solver.factorize(numpy.array(self.MATRIX, dtype=float))
+            rows = [1, 3]
+            cols = [0, 1, 3]
+            delta = numpy.array([[0.5, -2, 0], [1, 0, -1.5]])
+            updated = linear_solver.LowRankUpdatedFactorization(factorization, 4, rows, cols, delta)
+
+            matrix = numpy.array(self.MATRIX, dtype=float)
+            matrix[numpy.ix_(rows, cols)] += delta
+            numpy.testing.assert_array_almost_equal(updated.solve(self.RHS), numpy.linalg.solve(matrix, self.RHS))
+
+            # Updates may be stacked.
+            stacked = linear_solver.LowRankUpdatedFactorization(updated, 4, [2], [2], [[3]])
+            matrix[2, 2] += 3
+            numpy.testing.assert_array_almost_equal(stacked.solve(self.RHS), numpy.linalg.solve(matrix, self.RHS))
+
+    def test_permuted_factorize(self):
+        matrix = numpy.array(self.MATRIX, dtype=float)
+        matrix[0, 1] = -2
+        for permuted_matrix in (matrix, scipy.sparse.csr_matrix(matrix)):
+            solver = linear_solver.PermutedLinearSolver([2, 0, 3, 1])
+            numpy.testing.assert_array_almost_equal(solver.solve(permuted_matrix, self.RHS),
+                                                    numpy.linalg.solve(matrix, self.RHS))
+
+            # Several right-hand sides are solved at once, e.g. by a low-rank update.
+            rhs = numpy.column_stack([self.RHS, 2 * self.RHS])
+            factorization = solver.factorize(permuted_matrix)
+            numpy.testing.assert_array_almost_equal(factorization.solve(rhs), numpy.linalg.solve(matrix, rhs))
@@ -0,0 +1,121 @@
+import numpy
+import os
+import power_flow_solver
+import power_system_builder
+import tempfile
+import unittest
+
+
+class TestMatpowerPowerSystemBuilder(unittest.TestCase):
+    CASE = """function mpc = case3
+    mpc.baseMVA = 50;
+    mpc.bus = [
+        1   3   0    0    0  0  1  1.02  0  138  1  1.1  0.9;
+        2   2   20   10   0  0  1  1.00  0  138  1  1.1  0.9;
+        3   1   40   20   0  0  1  1.00  0  138  1  1.1  0.9;
+        4   4   0    0    0  0  1  1.00  0  138  1  1.1  0.9;
+    ];
+    mpc.gen = [
+        1   0    0  100  -100  1.02  100  1  200  0;
+        2   10   0  100  -100  1.03  100  1  200  0;
+        2   15   0  100  -100  1.04  100  1  200  0;
+        3   99   0  100  -100  1.05  100  0  200  0;
+    ];
+    mpc.branch = [
+        1  2  0.01  0.1  0.02  100  0  0  0  0  1  -360  360;
+        2  3  0.02  0.2  0     0    0  0  0  0  0  -360  360;
+        3  4  0.02  0.2  0     0    0  0  0  0  1  -360  360;
+    ];
+    """
+
+    # MATPOWER case9, with its solution.
+    CASE9 = """function mpc = case9
+    mpc.baseMVA = 100;
+    mpc.bus = [
+        1  3  0    0   0  0  1  1  0  345  1  1.1  0.9;
+        2  2  0    0   0  0  1  1  0  345  1  1.1  0.9;
+        3  2  0    0   0  0  1  1  0  345  1  1.1  0.9;
+        4  1  0    0   0  0  1  1  0  345  1  1.1  0.9;
+        5  1  90   30  0  0  1  1  0  345  1  1.1  0.9;
+        6  1  0    0   0  0  1  1  0  345  1  1.1  0.9;
+        7  1  100  35  0  0  1  1  0  345  1  1.1  0.9;
+        8  1  0    0   0  0  1  1  0  345  1  1.1  0.9;
+        9  1  125  50  0  0  1  1  0  345  1  1.1  0.9;
+    ];
+    mpc.gen = [
+        1  72.3  27.03  300  -300  1  100  1  250  10;
+        2  163   6.54   300  -300  1  100  1  300  10;
+        3  85    -10.95 300  -300  1  100  1  270  10;
+    ];
+    mpc.branch = [
+        1  4  0       0.0576  0      250  250  250  0  0  1  -360  360;
+        4  5  0.017   0.092   0.158  250  250  250  0  0  1  -360  360;
+        5  6  0.039   0.17    0.358  150  150  150  0  0  1  -360  360;
+        3  6  0       0.0586  0      300  300  300  0  0  1  -360  360;
+        6  7  0.0119  0.1008  0.209  150  150  150  0  0  1  -360  360;
+        7  8  0.0085  0.072   0.149  250  250  250  0  0  1  -360  360;
+        8  2  0       0.0625  0      250  250  250  0  0  1  -360  360;
+        8  9  0.032   0.161   0.306  250  250  250  0  0  1  -360  360;
+        9  4  0.01    0.085   0.176  250  250  250  0  0  1  -360  360;
+    ];
+    """
+    CASE9_VOLTAGES = [1, 1, 1, 0.987, 0.975, 1.003, 0.986, 0.996, 0.958]
+    CASE9_ANGLES = [0, 9.669, 4.771, -2.407, -4.017, 1.926, 0.622, 3.799, -4.350]
+
+    def build_case(self, case):
+        with tempfile.NamedTemporaryFile('w', suffix='.m', delete=False) as file:
+            file.write(case)
+        self.addCleanup(os.remove, file.name)
+        return power_system_builder.create_builder(file.name)
+
+    def test_system(self):
+        builder = power_system_builder.MatpowerPowerSystemBuilder('data/Data.m')
+        actual = builder.build_system()
+        expected = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx').build_system()
+
+        self.assertEqual(builder.swing_bus_number, 1)
+        self.assertEqual(builder.power_base, 100)
+        self.assertListEqual(expected.buses, actual.buses)
+        self.assertListEqual(expected.lines, actual.lines)
+
+    def test_case(self):
+        builder = self.build_case(self.CASE)
+        self.assertIsInstance(builder, power_system_builder.MatpowerPowerSystemBuilder)
+        system = builder.build_system()
+
+        # The isolated bus and its branch are dropped, generators at the same bus are combined, and the first sets the
+        # voltage. Generators and branches out of service are excluded.
+        numpy.testing.assert_array_equal(system.bus_data.number, [1, 2, 3])
+        numpy.testing.assert_array_almost_equal(system.bus_data.active_power_consumed, [0, 0.4, 0.8])
+        numpy.testing.assert_array_almost_equal(system.bus_data.active_power_generated, [0, 0.5, 0])
+        numpy.testing.assert_array_almost_equal(system.bus_data.voltage, [1.02, 1.03, 1])
+        numpy.testing.assert_array_equal(system.line_data.in_service, [True, False])
+        numpy.testing.assert_array_equal(system.line_data.max_power, [100, numpy.nan])
+        numpy.testing.assert_array_almost_equal(system.line_data.shunt_admittance, [0.01j, 0])
+
+        # The bus types are taken from the case. A PQ bus with a generator out of service remains a PQ bus.
+        bus_types = power_flow_solver.classify_buses(system.bus_data, builder.swing_bus_number)
+        numpy.testing.assert_array_equal(bus_types, [power_flow_solver.BusType.SWING.value,
+                                                     power_flow_solver.BusType.PV.value,
+                                                     power_flow_solver.BusType.PQ.value])
+
+    def test_case9(self):
+        builder = self.build_case(self.CASE9)
+        system = builder.build_system()
+        self.assertTrue(power_flow_solver.PowerFlowSolver(system, builder.swing_bus_number).solve())
+
+        # Buses 4, 6, and 8 have no load or generation, but are PQ buses rather than held at their start voltage.
+        voltages = system.bus_data.voltage
+        numpy.testing.assert_array_almost_equal(numpy.abs(voltages), self.CASE9_VOLTAGES, 3)
+        numpy.testing.assert_array_almost_equal(numpy.degrees(numpy.angle(voltages)), self.CASE9_ANGLES, 3)
+
+    def test_synchronous_condenser(self):
+        # A generator bus with a load and no active power generation is a PV bus.
+        builder = self.build_case(self.CASE.replace('2   10   0', '2   0    0').replace('2   15   0', '2   0    0'))
+        bus_types = power_flow_solver.classify_buses(builder.build_system().bus_data, builder.swing_bus_number)
+        self.assertEqual(bus_types[1], power_flow_solver.BusType.PV.value)
+
+    def test_unsupported(self):
+        case = self.CASE.replace('0.01  0.1  0.02  100  0  0  0  0', '0.01  0.1  0.02  100  0  0  0.95  0')
+        with self.assertWarns(UserWarning):
+            self.build_case(case)
@@ -1,15 +1,17 @@
+import linear_solver
 import numpy
 import power_flow_solver
+import power_system
 import power_system_builder
 import unittest
 
 
 class TestPowerFlowSolver(unittest.TestCase):
     @staticmethod
-    def build_solver(filename, max_active_power_error=0.001, max_reactive_power_error=0.001):
+    def build_solver(filename, max_active_power_error=0.001, max_reactive_power_error=0.001, sparse=False):
         builder = power_system_builder.ExcelPowerSystemBuilder(filename)
         return power_flow_solver.PowerFlowSolver(builder.build_system(), max_active_power_error=max_active_power_error,
-                                                 max_reactive_power_error=max_reactive_power_error)
+                                                 max_reactive_power_error=max_reactive_power_error, sparse=sparse)
 
     def test_errors(self):
         solver = TestPowerFlowSolver.build_solver('data/Data.xlsx')
@@ -43,6 +45,351 @@ class TestPowerFlowSolver(unittest.TestCase):
         actual_angles = [numpy.rad2deg(numpy.angle(i.voltage)) for i in solver._system.buses]
         numpy.testing.assert_array_almost_equal(actual_angles, expected_angles, 2)
 
+    def test_solution_sparse(self):
+        solver = TestPowerFlowSolver.build_solver('data/Data.xlsx', sparse=True)
+        for _ in range(0, 10):
+            solver.step()
+
+        # Reference values taken from PowerWorld simulation.
+        expected_magnitudes = [1.05, 1.04501, 1.01011, 1.03048, 1.03288, 1.02309, 0.99202, 0.98917, 1.00172, 1.05001,
+                               1.02432, 1.05001]
+        actual_magnitudes = [numpy.abs(i.voltage) for i in solver._system.buses]
+        numpy.testing.assert_array_almost_equal(actual_magnitudes, expected_magnitudes, 3)
+
+        # Reference values taken from PowerWorld simulation.
+        expected_angles = [0, -3.27, -10.08, -6.06, -5.17, -7.64, -10.12, -9.99, -8.96, -6.7, -7.92, -8.82]
+        actual_angles = [numpy.rad2deg(numpy.angle(i.voltage)) for i in solver._system.buses]
+        numpy.testing.assert_array_almost_equal(actual_angles, expected_angles, 2)
+
+    def test_corrections_sparse_solver_powell(self):
+        builder = power_system_builder.ExcelPowerSystemBuilder('data/Sample-Powell-3.1.xlsx')
+        solver = power_flow_solver.PowerFlowSolver(builder.build_system(), solver=linear_solver.SparseLinearSolver())
+
+        expected = [-0.040160, -0.039524, -0.059629, -0.044711, -0.041271, -0.041553, -0.061319, -0.042830]
+        actual = solver._compute_corrections(solver.jacobian())
+        numpy.testing.assert_array_almost_equal(actual, expected, 3)
+
+    def test_jacobian_sparse_powell(self):
+        dense_solver = TestPowerFlowSolver.build_solver('data/Sample-Powell-3.1.xlsx')
+        sparse_solver = TestPowerFlowSolver.build_solver('data/Sample-Powell-3.1.xlsx', sparse=True)
+
+        expected = dense_solver.jacobian()
+        actual = sparse_solver.jacobian()
+        numpy.testing.assert_array_almost_equal(actual.toarray(), expected)
+
+    def test_solution_fast_decoupled(self):
+        for variant in (power_flow_solver.XB, power_flow_solver.BX):
+            builder = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx')
+            solver = power_flow_solver.FastDecoupledPowerFlowSolver(
+                builder.build_system(), max_active_power_error=0.00001, max_reactive_power_error=0.00001,
+                variant=variant)
+            for _ in range(0, 50):
+                if solver.has_converged():
+                    break
+                solver.step()
+
+            self.assertTrue(solver.has_converged())
+
+            # Reference values taken from PowerWorld simulation.
+            expected_magnitudes = [1.05, 1.04501, 1.01011, 1.03048, 1.03288, 1.02309, 0.99202, 0.98917, 1.00172,
+                                   1.05001, 1.02432, 1.05001]
+            actual_magnitudes = [numpy.abs(i.voltage) for i in solver._system.buses]
+            numpy.testing.assert_array_almost_equal(actual_magnitudes, expected_magnitudes, 3)
+
+            # Reference values taken from PowerWorld simulation.
+            expected_angles = [0, -3.27, -10.08, -6.06, -5.17, -7.64, -10.12, -9.99, -8.96, -6.7, -7.92, -8.82]
+            actual_angles = [numpy.rad2deg(numpy.angle(i.voltage)) for i in solver._system.buses]
+            numpy.testing.assert_array_almost_equal(actual_angles, expected_angles, 2)
+
+    def test_jacobian_fast_decoupled(self):
+        builder = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx')
+        solver = power_flow_solver.FastDecoupledPowerFlowSolver(builder.build_system())
+        self.assertTrue(solver.solve())
+
+        # The Jacobian is the Newton-Raphson Jacobian at the solution.
+        expected_solver = TestPowerFlowSolver.build_solver('data/Data.xlsx')
+        expected_solver._system.bus_data.voltage[:] = solver._system.bus_data.voltage
+        expected_solver.update_buses()
+        numpy.testing.assert_array_almost_equal(solver.jacobian(), expected_solver.jacobian())
+
+        with self.assertRaises(NotImplementedError):
+            solver.factorize()
+
+    def test_solution_dc(self):
+        builder = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx')
+        system = builder.build_system()
+        solver = power_flow_solver.DcPowerFlowSolver(system)
+        self.assertFalse(solver.has_converged())
+
+        solver.solve()
+        self.assertTrue(solver.has_converged())
+
+        # The net flow out of each non-swing bus matches its active power injection.
+        bus_data = system.bus_data
+        p_specified = bus_data.active_power_generated - bus_data.active_power_consumed
+        p_actual = numpy.zeros(len(bus_data))
+        numpy.add.at(p_actual, system.line_source_indices, solver.line_flows)
+        numpy.add.at(p_actual, system.line_destination_indices, -solver.line_flows)
+        numpy.testing.assert_array_almost_equal(p_actual[1:], p_specified[1:])
+
+        # The angles are written to the system, so they are close to the full solution.
+        expected_angles = [0, -3.27, -10.08, -6.06, -5.17, -7.64, -10.12, -9.99, -8.96, -6.7, -7.92, -8.82]
+        actual_angles = [numpy.rad2deg(numpy.angle(i.voltage)) for i in system.buses]
+        numpy.testing.assert_allclose(actual_angles, expected_angles, atol=1.5)
+        numpy.testing.assert_array_almost_equal(numpy.deg2rad(actual_angles), solver.angles)
+
+    def test_update_line_jacobian_powell(self):
+        for sparse in (False, True):
+            solver = TestPowerFlowSolver.build_solver('data/Sample-Powell-3.1.xlsx', sparse=sparse)
+            solver._compute_corrections(solver.jacobian())
+            solver.update_line(3, distributed_impedance=0.02 + 0.05j)
+            solver.update_line(6, in_service=False)
+
+            # The compensated factorization solves against the Jacobian of the updated system.
+            jacobian = solver.jacobian().toarray() if sparse else solver.jacobian()
+            expected = numpy.linalg.solve(jacobian, solver.mismatches())
+            actual = solver._factorization.solve(solver.mismatches())
+            numpy.testing.assert_array_almost_equal(actual, expected)
+
+    def test_update_line_solution(self):
+        for solver_type in (power_flow_solver.PowerFlowSolver, power_flow_solver.FastDecoupledPowerFlowSolver):
+            builder = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx')
+            system = builder.build_system()
+            solver = solver_type(system, max_active_power_error=0.00001, max_reactive_power_error=0.00001)
+            for _ in range(0, 20):
+                solver.step()
+
+            solver.update_line(14, in_service=False)
+            self.assertFalse(solver.has_converged())
+            for _ in range(0, 50):
+                if solver.has_converged():
+                    break
+                solver.step()
+
+            self.assertTrue(solver.has_converged())
+
+            # Compare against a solver built from scratch for the outage.
+            expected_system = builder.build_system()
+            expected_system.update_line(14, in_service=False)
+            expected_solver = power_flow_solver.PowerFlowSolver(
+                expected_system, max_active_power_error=0.00001, max_reactive_power_error=0.00001)
+            while not expected_solver.has_converged():
+                expected_solver.step()
+
+            numpy.testing.assert_array_almost_equal(system.bus_data.voltage, expected_system.bus_data.voltage, 5)
+
+    def test_update_line_refresh(self):
+        for solver_type, options in ((power_flow_solver.PowerFlowSolver, {'jacobian_reuse': True}),
+                                     (power_flow_solver.FastDecoupledPowerFlowSolver, {})):
+            builder = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx')
+            system = builder.build_system()
+            solver = solver_type(system, max_active_power_error=0.00001, max_reactive_power_error=0.00001, **options)
+            solver.solve(50)
+
+            # Take a line out of service and return it many times. The stacked updates never exceed the rank limit.
+            for _ in range(100):
+                solver.update_line(14, in_service=False)
+                solver.update_line(14, in_service=True)
+                for factorization in (solver._factorization, getattr(solver, '_b_p_factorization', None)):
+                    self.assertLessEqual(power_flow_solver._update_rank(factorization),
+                                         power_flow_solver.MAX_LOW_RANK_UPDATE_RANK)
+
+            solver.update_line(14, in_service=False)
+            self.assertTrue(solver.solve(50))
+
+            expected_system = builder.build_system()
+            expected_system.update_line(14, in_service=False)
+            self.assertTrue(power_flow_solver.PowerFlowSolver(expected_system, max_active_power_error=0.00001,
+                                                              max_reactive_power_error=0.00001).solve())
+            numpy.testing.assert_array_almost_equal(system.bus_data.voltage, expected_system.bus_data.voltage, 5)
+
+    def test_restore_state(self):
+        builder = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx')
+        system = builder.build_system()
+        solver = power_flow_solver.PowerFlowSolver(system, jacobian_reuse=True)
+        self.assertTrue(solver.solve())
+        solver.factorize()
+        state = solver.save_state()
+        admittance_matrix = solver._admittance_matrix.copy()
+
+        solver.update_line(14, in_service=False)
+        self.assertTrue(solver.solve())
+
+        # Once the line is restored in the system, the solver returns to the saved matrices.
+        system.update_line(14, in_service=True)
+        solver.restore_state(state)
+        self.assertIs(solver._factorization, state['_factorization'])
+        numpy.testing.assert_array_equal(solver._admittance_matrix, admittance_matrix)
+        self.assertEqual(solver.factorizations, 2)
+
+    def test_solution_jacobian_reuse(self):
+        expected_solver = TestPowerFlowSolver.build_solver('data/Data.xlsx', 0.00001, 0.00001)
+        while not expected_solver.has_converged():
+            expected_solver.step()
+
+        builder = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx')
+        system = builder.build_system()
+        solver = power_flow_solver.PowerFlowSolver(system, max_active_power_error=0.00001,
+                                                   max_reactive_power_error=0.00001, jacobian_reuse=True)
+        for _ in range(0, 50):
+            if solver.has_converged():
+                break
+            solver.step()
+
+        self.assertTrue(solver.has_converged())
+        self.assertGreater(solver.factorizations_saved, 0)
+        self.assertEqual(expected_solver.factorizations_saved, 0)
+        numpy.testing.assert_array_almost_equal(
+            system.bus_data.voltage, expected_solver._system.bus_data.voltage, 4)
+
+    def test_ordering(self):
+        expected = None
+        fill = {}
+        for ordering in (None,) + power_system.ORDERING_METHODS:
+            system = power_system_builder.SyntheticPowerSystemBuilder(300).build_system()
+            solver = power_flow_solver.PowerFlowSolver(system, max_active_power_error=1e-8,
+                                                       max_reactive_power_error=1e-8, ordering=ordering)
+            self.assertTrue(solver.solve())
+            factorization = solver._factorization if ordering is None else solver._factorization._factorization
+            fill[ordering] = factorization.L.nnz + factorization.U.nnz
+
+            # The solution is returned in the original bus order.
+            if expected is None:
+                expected = system.bus_data.voltage
+            numpy.testing.assert_array_almost_equal(system.bus_data.voltage, expected, 10)
+
+        self.assertLess(fill[power_system.MINIMUM_DEGREE], fill[None])
+
+        solver = power_flow_solver.FastDecoupledPowerFlowSolver(
+            power_system_builder.SyntheticPowerSystemBuilder(300).build_system(), max_active_power_error=1e-8,
+            max_reactive_power_error=1e-8)
+        self.assertTrue(solver.solve(max_iterations=50))
+        numpy.testing.assert_array_almost_equal(solver._system.bus_data.voltage, expected, 6)
+
+    def test_solve_observers(self):
+        solver = TestPowerFlowSolver.build_solver('data/Data.xlsx')
+        observed = []
+        callbacks = []
+        solver.add_observer(observed.append)
+        self.assertTrue(solver.solve(callback=callbacks.append))
+        self.assertTrue(solver.has_converged())
+        self.assertListEqual(observed, callbacks)
+        self.assertListEqual([summary.iteration for summary in observed], list(range(len(observed))))
+        self.assertListEqual([summary.converged for summary in observed], [False] * (len(observed) - 1) + [True])
+
+        # The initial summary matches the largest mismatches of the bus power estimates.
+        initial = observed[0]
+        self.assertEqual(initial.step_norm, 0)
+        self.assertAlmostEqual(initial.max_active_power_error, -0.6560, 4)
+        self.assertEqual(initial.max_active_power_error_bus, 3)
+        self.assertAlmostEqual(initial.max_reactive_power_error, 0.4714, 4)
+        self.assertEqual(initial.max_reactive_power_error_bus, 5)
+        self.assertTrue(all(summary.step_norm > 0 for summary in observed[1:]))
+
+        # Observers that have been removed are not called.
+        solver.remove_observer(observed.append)
+        solver._system.bus_data.active_power_consumed[:] *= 1.05
+        solver.update_buses()
+        self.assertTrue(solver.solve())
+        self.assertEqual(len(observed), len(callbacks))
+
+    def test_solve_max_iterations(self):
+        solver = TestPowerFlowSolver.build_solver('data/Data.xlsx', 1e-12, 1e-12)
+        summaries = []
+        self.assertFalse(solver.solve(max_iterations=2, callback=summaries.append))
+        self.assertEqual(summaries[-1].iteration, 2)
+
+    def test_solve_divergence(self):
+        # The loads are beyond the maximum loadability of the system, so there is no solution.
+        solver = TestPowerFlowSolver.build_solver('data/Data.xlsx', 1e-5, 1e-5)
+        bus_data = solver._system.bus_data
+        bus_data.active_power_consumed[:] *= 5
+        bus_data.reactive_power_consumed[:] *= 5
+        bus_data.active_power_generated[:] *= 5
+        solver.update_buses()
+
+        summaries = []
+        with self.assertRaises(power_flow_solver.DivergenceError) as context:
+            solver.solve(max_iterations=50, callback=summaries.append)
+        self.assertIs(context.exception.summary, summaries[-1])
+        self.assertLess(summaries[-1].iteration, 15)
+
+        # Without divergence detection, the solve runs to the iteration limit.
+        self.assertFalse(solver.solve(max_iterations=5, divergence_window=None, divergence_ratio=None))
+
+    def test_damping(self):
+        expected_solver = TestPowerFlowSolver.build_solver('data/Data.xlsx', 1e-5, 1e-5)
+        self.assertTrue(expected_solver.solve())
+
+        for damping in power_flow_solver.DAMPING_METHODS:
+            builder = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx')
+            solver = power_flow_solver.PowerFlowSolver(builder.build_system(), max_active_power_error=1e-5,
+                                                       max_reactive_power_error=1e-5, damping=damping)
+            summaries = []
+            self.assertTrue(solver.solve(callback=summaries.append))
+            self.assertTrue(all(0 < summary.step_size <= 1 for summary in summaries[1:]))
+            numpy.testing.assert_array_almost_equal(solver._system.bus_data.voltage,
+                                                    expected_solver._system.bus_data.voltage, 5)
+
+        with self.assertRaises(ValueError):
+            power_flow_solver.PowerFlowSolver(builder.build_system(), damping='unknown')
+
+    def test_optimal_multiplier(self):
+        start = numpy.array([1.0, -2.0, 0.5])
+
+        # A full correction that solves the power flow is not damped.
+        self.assertEqual(power_flow_solver._optimal_multiplier(start, numpy.zeros(3), 0.1), 1)
+
+        # If the full correction makes no progress, the modeled mismatches (1 - mu + mu^2) * f(0) are smallest halfway.
+        self.assertAlmostEqual(power_flow_solver._optimal_multiplier(start, start, 0.1), 0.5)
+
+        # Diverging corrections are damped to the smallest step size.
+        self.assertEqual(power_flow_solver._optimal_multiplier(start, numpy.full(3, numpy.nan), 0.1), 0.1)
+
+    def test_classify_buses(self):
+        bus_data = power_system.BusData.from_columns([1, 2, 3, 4], [0, 0.5, 0, 0.2], [0, 0.2, 0, 0], [0.3, 0.4, 0, 0],
+                                                     [1] * 4)
+        bus_types = power_flow_solver.classify_buses(bus_data, 1)
+        self.assertEqual([power_flow_solver.BusType(bus_type) for bus_type in bus_types],
+                         [power_flow_solver.BusType.SWING, power_flow_solver.BusType.PV,
+                          power_flow_solver.BusType.UNKNOWN, power_flow_solver.BusType.PQ])
+
+        # The solver classifies the buses of a system built from data arrays without creating a Bus for each.
+        line_data = power_system.LineData.from_columns([1, 2, 3], [2, 3, 4], [0.1j] * 3, [0] * 3, [None] * 3)
+        system = power_system.PowerSystem.from_data(bus_data, line_data)
+        power_flow_solver.PowerFlowSolver(system)
+        self.assertIsNone(system._buses)
+
+    def test_swing_bus_only(self):
+        # A system of a single swing bus has no power mismatches and is solved as it is.
+        bus_data = power_system.BusData.from_columns([1], [0.5], [0.2], [0], [1])
+        line_data = power_system.LineData.from_columns([], [], [], [], [])
+        solver = power_flow_solver.PowerFlowSolver(power_system.PowerSystem.from_data(bus_data, line_data),
+                                                   jacobian_reuse=True)
+        self.assertEqual(solver._largest_mismatch(), 0)
+        self.assertTrue(solver.solve())
+
+    def test_pv_magnitudes(self):
+        # Corrections never move the voltage magnitude of a PV bus away from its set point, not even by rounding.
+        for solver_class in (power_flow_solver.PowerFlowSolver, power_flow_solver.FastDecoupledPowerFlowSolver):
+            for max_power_error in (0.001, 1e-10):
+                system = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx').build_system()
+                bus_types = power_flow_solver.classify_buses(system.bus_data, 1)
+                pv_indices = numpy.flatnonzero(bus_types == power_flow_solver.BusType.PV.value)
+                set_points = numpy.abs(system.bus_data.voltage[pv_indices])
+                solver = solver_class(system, max_active_power_error=max_power_error,
+                                      max_reactive_power_error=max_power_error)
+                self.assertTrue(solver.solve(50))
+                numpy.testing.assert_array_equal(numpy.abs(system.bus_data.voltage[pv_indices]), set_points)
+
+    def testexact_polar(self):
+        rng = numpy.random.default_rng(0)
+        magnitudes = numpy.round(rng.uniform(0.9, 1.1, 1000), 3)
+        angles = rng.uniform(-numpy.pi, numpy.pi, 1000)
+        voltages = power_flow_solver.exact_polar(magnitudes, angles)
+        numpy.testing.assert_array_almost_equal(voltages, magnitudes * numpy.exp(1j * angles), 15)
+        self.assertGreater(numpy.mean(numpy.abs(voltages) == magnitudes), 0.95)
+
     def test_errors_powell(self):
         solver = TestPowerFlowSolver.build_solver('data/Sample-Powell-3.1.xlsx')
 
@@ -115,7 +462,7 @@ class TestPowerFlowSolver(unittest.TestCase):
                     [4.123711, -10.475198, 2.926829, 0, -9.278350, 23.084060, -6.341464, 0],
                     [0, 2.926829, -7.050541, 4.123711, 0, -6.341464, 15.569814, -9.278350],
                     [4.123711, 0, 4.123711, -12.357011, -9.278350, 0, -9.278350, 29.455605]]
-        actual = solver._jacobian()
+        actual = solver.jacobian()
         numpy.testing.assert_array_almost_equal(actual, expected, 5)
 
     def test_corrections_powell(self):
@@ -123,7 +470,7 @@ class TestPowerFlowSolver(unittest.TestCase):
         solver._compute_estimates()
 
         expected = [-0.040160, -0.039524, -0.059629, -0.044711, -0.041271, -0.041553, -0.061319, -0.042830]
-        actual = solver._compute_corrections(solver._jacobian())
+        actual = solver._compute_corrections(solver.jacobian())
         numpy.testing.assert_array_almost_equal(actual, expected, 3)
 
     def test_step_powell(self):
@@ -138,6 +485,17 @@ class TestPowerFlowSolver(unittest.TestCase):
         actual_angles = [numpy.angle(i.voltage) for i in solver._system.buses]
         numpy.testing.assert_array_almost_equal(actual_angles, expected_angles, 3)
 
+    def test_apply_corrections_powell(self):
+        # A step built from the public accessors matches step().
+        expected = TestPowerFlowSolver.build_solver('data/Sample-Powell-3.1.xlsx')
+        expected.step()
+        solver = TestPowerFlowSolver.build_solver('data/Sample-Powell-3.1.xlsx')
+        solver.apply_corrections(solver.factorize().solve(solver.mismatches()))
+
+        numpy.testing.assert_array_almost_equal(solver._system.bus_data.voltage, expected._system.bus_data.voltage)
+        numpy.testing.assert_array_almost_equal(solver.mismatches(), expected.mismatches())
+        self.assertEqual(len(solver.mismatches()), len(solver.pv_pq_indices) + len(solver.pq_indices))
+
     def test_convergence_powell(self):
         solver = TestPowerFlowSolver.build_solver('data/Sample-Powell-3.1.xlsx', 0.0001, 0.0001)
         self.assertFalse(solver.has_converged())
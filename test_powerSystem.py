@@ -1,6 +1,7 @@
 import numpy
 import power_system
 import power_system_builder
+import scipy.sparse
 import unittest
 
 
@@ -56,3 +57,125 @@ class TestPowerSystem(unittest.TestCase):
             [-0.7692 + 3.8462j, -0.7692 + 3.8462j, -0.4808 + 2.4038j, -0.3846 + 1.9231j, 2.4038 - 11.8942j]])
 
         numpy.testing.assert_almost_equal(actual, expected, 4)
+
+    def test_admittance_matrix_sparse(self):
+        filename = 'data/Data.xlsx'
+        builder = power_system_builder.ExcelPowerSystemBuilder(filename)
+        system = builder.build_system()
+
+        actual = system.admittance_matrix(sparse=True)
+        expected = system.admittance_matrix()
+
+        self.assertTrue(scipy.sparse.issparse(actual))
+        self.assertEqual(actual.nnz, numpy.count_nonzero(expected))
+        numpy.testing.assert_almost_equal(actual.toarray(), expected)
+
+    def test_bus_indices(self):
+        system = power_system.PowerSystem(
+            [power_system.Bus(7, 0, 0, 0, 1), power_system.Bus(3, 0, 0, 0, 1), power_system.Bus(5, 0, 0, 0, 1)],
+            [power_system.Line(3, 7, 0.1j, 0, None), power_system.Line(5, 3, 0.1j, 0, None)])
+
+        self.assertDictEqual(system.bus_indices, {7: 0, 3: 1, 5: 2})
+        numpy.testing.assert_array_equal(system.line_source_indices, [1, 2])
+        numpy.testing.assert_array_equal(system.line_destination_indices, [0, 1])
+
+    def test_bus_views(self):
+        buses = [power_system.Bus(1, 0, 0, 0, 1.05), power_system.Bus(2, 0.5, 0.2, 0, 1)]
+        system = power_system.PowerSystem(buses, [power_system.Line(1, 2, 0.1j, 0, 100)])
+
+        buses[1].voltage = 0.98 - 0.01j
+        self.assertEqual(system.bus_data.voltage[1], 0.98 - 0.01j)
+
+        system.bus_data.active_power_consumed[1] = 0.7
+        self.assertEqual(system.buses[1].active_power_consumed, 0.7)
+        self.assertEqual(system.lines[0].max_power, 100)
+
+    def test_from_data(self):
+        bus_data = power_system.BusData.from_columns([1, 2], [0, 0.5], [0, 0.2], [0, 0], [1.05, 1])
+        line_data = power_system.LineData.from_columns([1], [2], [0.1j], [0], [None])
+        system = power_system.PowerSystem.from_data(bus_data, line_data)
+
+        expected_buses = [power_system.Bus(1, 0, 0, 0, 1.05), power_system.Bus(2, 0.5, 0.2, 0, 1)]
+        expected_lines = [power_system.Line(1, 2, 0.1j, 0, None)]
+        self.assertListEqual(system.buses, expected_buses)
+        self.assertListEqual(system.lines, expected_lines)
+        numpy.testing.assert_almost_equal(system.admittance_matrix(), [[-10j, 10j], [10j, -10j]])
+
+    def test_zero_impedance(self):
+        bus_data = power_system.BusData.from_columns([1, 2, 3], [0] * 3, [0] * 3, [0] * 3, [1] * 3)
+        line_data = power_system.LineData.from_columns([1, 2, 1], [2, 3, 3], [0.1j, 0.05, 0], [0] * 3, [None] * 3)
+        system = power_system.PowerSystem.from_data(bus_data, line_data)
+
+        # A line out of service with zero impedance does not contribute to the admittance matrix.
+        system.update_line(2, in_service=False)
+        numpy.testing.assert_almost_equal(system.admittance_matrix(), [[-10j, 10j, 0], [10j, 20 - 10j, -20],
+                                                                       [0, -20, 20]])
+        numpy.testing.assert_almost_equal(system.line_admittance(2), numpy.zeros((2, 2)))
+
+        # A line in service must have a reactance when resistances are neglected, and an impedance otherwise.
+        with self.assertRaisesRegex(ValueError, 'Line 2-3 has zero reactance'):
+            system.admittance_matrix(ignore_resistance=True)
+        system.update_line(2, in_service=True)
+        with self.assertRaisesRegex(ValueError, 'Line 1-3 has zero impedance'):
+            system.line_admittance(2)
+
+    def test_islands(self):
+        bus_data = power_system.BusData.from_columns([1, 2, 3, 4, 5], [0] * 5, [0] * 5, [0] * 5, [1] * 5)
+        line_data = power_system.LineData.from_columns([1, 4, 2, 3], [2, 5, 5, 1], [0.1j] * 4, [0] * 4, [None] * 4)
+        system = power_system.PowerSystem.from_data(bus_data, line_data)
+        self.assertEqual([island.tolist() for island in system.islands()], [[0, 1, 2, 3, 4]])
+
+        # Taking line 2-5 out of service separates buses 4 and 5.
+        system.update_line(2, in_service=False)
+        self.assertEqual([island.tolist() for island in system.islands()], [[0, 1, 2], [3, 4]])
+
+        subsystem = system.subsystem(system.islands()[1])
+        numpy.testing.assert_array_equal(subsystem.bus_data.number, [4, 5])
+        numpy.testing.assert_array_equal(subsystem.line_data.source, [4])
+        numpy.testing.assert_almost_equal(subsystem.admittance_matrix(), [[-10j, 10j], [10j, -10j]])
+
+        # The subsystem data is a copy.
+        subsystem.bus_data.voltage[:] = 0.9
+        numpy.testing.assert_array_equal(system.bus_data.voltage, [1] * 5)
+
+    def test_bus_ordering(self):
+        # Bus 1 is the hub of a star, so it is eliminated last.
+        bus_data = power_system.BusData.from_columns([1, 2, 3, 4, 5], [0] * 5, [0] * 5, [0] * 5, [1] * 5)
+        line_data = power_system.LineData.from_columns([1, 1, 1, 1], [2, 3, 4, 5], [0.1j] * 4, [0] * 4, [None] * 4)
+        system = power_system.PowerSystem.from_data(bus_data, line_data)
+        order = system.bus_ordering()
+        self.assertEqual(sorted(order.tolist()), [0, 1, 2, 3, 4])
+        self.assertEqual(order[-1], 0)
+        self.assertIs(system.bus_ordering(), order)
+
+        for method in power_system.ORDERING_METHODS:
+            self.assertEqual(sorted(system.bus_ordering(method).tolist()), [0, 1, 2, 3, 4])
+
+        # The ordering is computed again after a change of topology.
+        system.update_line(0, distributed_impedance=0.2j)
+        self.assertIs(system.bus_ordering(), order)
+        system.update_line(0, in_service=False)
+        self.assertIsNot(system.bus_ordering(), order)
+
+        with self.assertRaises(ValueError):
+            system.bus_ordering('natural')
+
+    def test_update_line(self):
+        builder = power_system_builder.ExcelPowerSystemBuilder('data/Sample-Powell-3.1.xlsx')
+        system = builder.build_system()
+        system.update_line(2, distributed_impedance=0.01 + 0.02j, shunt_admittance=0.02j)
+
+        lines = builder.build_lines()
+        lines[2] = power_system.Line(1, 5, 0.01 + 0.02j, 0.02j, None)
+        self.assertEqual(system.lines[2], lines[2])
+
+        expected = power_system.PowerSystem(builder.build_buses(), lines).admittance_matrix()
+        numpy.testing.assert_almost_equal(system.admittance_matrix(), expected)
+
+        system.update_line(2, in_service=False)
+        self.assertFalse(system.lines[2].in_service)
+        numpy.testing.assert_almost_equal(system.line_admittance(2), numpy.zeros((2, 2)))
+
+        del lines[2]
+        expected = power_system.PowerSystem(builder.build_buses(), lines).admittance_matrix()
+        numpy.testing.assert_almost_equal(system.admittance_matrix(), expected)
@@ -0,0 +1,91 @@
+import contextlib
+import io
+import main
+import numpy
+import power_system
+import power_system_reporter
+import sys
+import unittest
+import unittest.mock
+
+
+class TestPowerSystemReporter(unittest.TestCase):
+    def setUp(self):
+        bus_data = power_system.BusData(numpy.array([1, 2, 3]), numpy.zeros(3), numpy.zeros(3), numpy.zeros(3),
+                                        numpy.array([1.05, 0.98 * numpy.exp(-0.05j), 0.94 * numpy.exp(-0.08j)]))
+        line_data = power_system.LineData(
+            numpy.array([1, 2, 1, 1]), numpy.array([2, 3, 3, 2]),
+            numpy.array([0.01 + 0.1j, 0.02 + 0.2j, 0.01 + 0.1j, 0.01 + 0.1j]),
+            numpy.array([0.02j, 0.01j, 0.02j, 0.02j]),
+            numpy.array([60, numpy.nan, 1000, 1]), numpy.array([True, True, True, False]))
+        self.system = power_system.PowerSystem.from_data(bus_data, line_data)
+
+    def test_line_flows(self):
+        flows = power_system_reporter.line_flows(self.system, 100)
+
+        voltage = self.system.bus_data.voltage
+        for index, (src, dst) in enumerate(zip(self.system.line_source_indices, self.system.line_destination_indices)):
+            z = self.system.line_data.distributed_impedance[index]
+            y = self.system.line_data.shunt_admittance[index]
+            in_service = self.system.line_data.in_service[index]
+            s_src = 100 * voltage[src] * numpy.conj((voltage[src] - voltage[dst]) / z + voltage[src] * y) * in_service
+            s_dst = 100 * voltage[dst] * numpy.conj((voltage[dst] - voltage[src]) / z + voltage[dst] * y) * in_service
+            self.assertAlmostEqual(flows.sending_power[index], s_src)
+            self.assertAlmostEqual(flows.receiving_power[index], s_dst)
+            self.assertAlmostEqual(flows.losses[index], s_src + s_dst)
+            self.assertAlmostEqual(flows.loading[index], max(abs(s_src), abs(s_dst)))
+
+        # Ratings are compared against apparent power. Unrated and out of service lines never exceed their rating.
+        self.assertGreater(flows.loading[0], 60)
+        numpy.testing.assert_array_equal(flows.exceeds_rating, [True, False, False, False])
+
+    def test_dc_line_flows(self):
+        flows = power_system_reporter.dc_line_flows(self.system, numpy.array([0.7, -0.2, 0.1, 0.0]), 100)
+        numpy.testing.assert_array_almost_equal(flows.sending_power, [70, -20, 10, 0])
+        numpy.testing.assert_array_almost_equal(flows.losses, numpy.zeros(4))
+        numpy.testing.assert_array_equal(flows.exceeds_rating, [True, False, False, False])
+
+    def test_bus_voltages(self):
+        voltages = power_system_reporter.bus_voltages(self.system, 0.95, 1.05)
+        numpy.testing.assert_array_almost_equal(voltages.magnitude, [1.05, 0.98, 0.94])
+        numpy.testing.assert_array_almost_equal(voltages.angle, numpy.rad2deg([0, -0.05, -0.08]))
+
+        # A bus regulated exactly at a limit is within the limit.
+        numpy.testing.assert_array_equal(voltages.under_voltage, [False, False, True])
+        numpy.testing.assert_array_equal(voltages.over_voltage, [False, False, False])
+        numpy.testing.assert_array_equal(voltages.outside_limits, [False, False, True])
+
+        # By default, limits are compared exactly. A tolerance allows voltages slightly past a limit.
+        self.system.bus_data.voltage[0] = 1.05 + 1e-9
+        self.assertTrue(power_system_reporter.bus_voltages(self.system, 0.95, 1.05).over_voltage[0])
+        self.assertFalse(power_system_reporter.bus_voltages(self.system, 0.95, 1.05, 1e-6).over_voltage[0])
+
+    def test_line_names(self):
+        self.assertEqual(power_system_reporter.line_names(self.system), ['1-2', '2-3', '1-3', '1-2'])
+        self.assertEqual(power_system_reporter.line_names(self.system, circuits=True),
+                         ['1-2 #1', '2-3', '1-3', '1-2 #2'])
+
+    def test_violations_only(self):
+        report = power_system_reporter.bus_voltage_report(self.system, 0.95, 1.05, violations_only=True)
+        self.assertEqual(len(report.splitlines()), 3)
+        self.assertEqual(report.splitlines()[2].split()[0], '3')
+
+        report = power_system_reporter.line_power_report(self.system, 100, violations_only=True)
+        self.assertEqual(len(report.splitlines()), 3)
+        self.assertTrue(report.splitlines()[2].startswith('1-2'))
+        self.assertEqual(len(power_system_reporter.line_power_report(self.system, 100).splitlines()), 6)
+
+    def test_main_bus_voltage_report(self):
+        # PV buses 10 and 12 of the default case are regulated exactly at the upper operating limit of 1.05 pu.
+        output = io.StringIO()
+        with unittest.mock.patch.object(sys, 'argv', ['main.py']), contextlib.redirect_stdout(output):
+            main.main()
+
+        lines = output.getvalue().splitlines()
+        start = next(index for index, line in enumerate(lines) if line.endswith('Outside Operating Limits')) + 2
+        rows = [line.split() for line in lines[start:start + 12]]
+        outside_limits = {int(row[0]): row[3] for row in rows}
+        self.assertEqual(len(outside_limits), 12)
+        self.assertEqual(float(rows[9][1]), 1.05)
+        self.assertEqual(outside_limits[10], 'No')
+        self.assertEqual(outside_limits[12], 'No')
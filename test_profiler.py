@@ -0,0 +1,81 @@
+import contingency_analysis
+import io
+import json
+import numpy
+import power_flow_solver
+import power_system_builder
+import profiler
+import unittest
+import unittest.mock
+
+
+class TestProfiler(unittest.TestCase):
+    def test_phases(self):
+        self.check_phases()
+
+    def test_phases_without_reset_peak(self):
+        # Python 3.8 lacks tracemalloc.reset_peak.
+        with unittest.mock.patch.object(profiler, '_HAS_RESET_PEAK', False):
+            self.check_phases()
+
+    def check_phases(self):
+        with profiler.enable() as active_profiler:
+            self.assertIs(profiler.active_profiler(), active_profiler)
+            for _ in range(2):
+                with profiler.phase('outer'):
+                    with profiler.phase('inner'):
+                        array = numpy.ones(2 ** 20)
+                    del array
+
+        self.assertIsNone(profiler.active_profiler())
+        stats = active_profiler.stats
+        self.assertEqual(stats['outer'].calls, 2)
+        self.assertEqual(stats['inner'].calls, 2)
+        self.assertGreaterEqual(stats['outer'].wall_time, stats['inner'].wall_time)
+
+        # The 8 MiB allocated by the inner phase count towards the peak memory of both phases.
+        self.assertGreaterEqual(stats['inner'].peak_memory, 8 * 2 ** 20)
+        self.assertGreaterEqual(stats['outer'].peak_memory, 8 * 2 ** 20)
+
+    def test_disabled(self):
+        @profiler.profiled('add')
+        def add(a, b):
+            return a + b
+
+        self.assertEqual(add(1, 2), 3)
+        with profiler.enable(profiler.Profiler(trace_memory=False)) as active_profiler:
+            self.assertEqual(add(1, 2), 3)
+
+        self.assertEqual(add(1, 2), 3)
+        self.assertEqual(active_profiler.stats['add'].calls, 1)
+        self.assertEqual(active_profiler.stats['add'].peak_memory, 0)
+
+    def test_solver_phases(self):
+        builder = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx')
+        with profiler.enable() as active_profiler:
+            solver = power_flow_solver.PowerFlowSolver(builder.build_system())
+            solver.solve()
+
+        stats = active_profiler.stats
+        self.assertEqual(stats['admittance_matrix'].calls, 1)
+        self.assertEqual(stats['jacobian'].calls, stats['step'].calls)
+        self.assertEqual(stats['power_mismatches'].calls, stats['step'].calls + 1)
+
+        file = io.StringIO()
+        active_profiler.dump(file)
+        self.assertEqual(json.loads(file.getvalue())['phases']['step']['calls'], stats['step'].calls)
+        self.assertIn('jacobian', active_profiler.report())
+
+    def test_merge_contingency_workers(self):
+        builder = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx')
+        system = builder.build_system()
+        options = contingency_analysis.ContingencyOptions()
+        contingency_analysis.solve(system, options)
+
+        with profiler.enable() as active_profiler:
+            results = contingency_analysis.run_contingency_analysis(system, options, 100, processes=2)
+
+        # Each outage builds its own admittance matrix in a worker process.
+        self.assertEqual(len(results), len(system.line_data))
+        self.assertEqual(active_profiler.stats['admittance_matrix'].calls, len(system.line_data))
+        self.assertEqual(active_profiler.stats['step'].calls, sum(result.iterations for result in results))
@@ -0,0 +1,57 @@
+import numpy
+import os
+import power_system_builder
+import tempfile
+import unittest
+
+
+class TestRawPowerSystemBuilder(unittest.TestCase):
+    def build_case(self, case):
+        with tempfile.NamedTemporaryFile('w', suffix='.raw', delete=False) as file:
+            file.write(case)
+        self.addCleanup(os.remove, file.name)
+        return power_system_builder.create_builder(file.name)
+
+    def test_system(self):
+        builder = power_system_builder.RawPowerSystemBuilder('data/Data.raw')
+        actual = builder.build_system()
+        expected = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx').build_system()
+
+        self.assertEqual(builder.swing_bus_number, 1)
+        self.assertEqual(builder.power_base, 100)
+        self.assertListEqual(expected.buses, actual.buses)
+
+        # Transformers follow the other branches.
+        numpy.testing.assert_array_almost_equal(actual.admittance_matrix(), expected.admittance_matrix())
+        self.assertEqual(len(actual.lines), len(expected.lines))
+
+    def test_transformer_winding_base(self):
+        with open('data/Data.raw') as file:
+            case = file.read()
+
+        # An impedance on a 50 MVA winding base is twice as large on the 100 MVA system base.
+        case = case.replace("0,'1 ',1,1,1,", "0,'1 ',1,2,1,").replace('100.00\n', '50.00\n')
+        system = self.build_case(case).build_system()
+        numpy.testing.assert_array_almost_equal(system.line_data.distributed_impedance[-2:], [1.11236j, 0.50404j])
+
+    def test_transformer_load_loss(self):
+        with open('data/Data.raw') as file:
+            case = file.read()
+
+        # A load loss of 250 kW on a 100 MVA winding base is a resistance of 0.0025 per-unit, and the reactance is found
+        # from the impedance magnitude.
+        case = case.replace("0,'1 ',1,1,1,", "0,'1 ',1,3,1,")
+        case = case.replace('0.00000E+00, 5.56180E-01', '2.50000E+05, 5.56180E-01')
+        system = self.build_case(case).build_system()
+        numpy.testing.assert_array_almost_equal(system.line_data.distributed_impedance[-2:],
+                                                [0.0025 + 1j * numpy.sqrt(0.55618 ** 2 - 0.0025 ** 2), 0.25202j])
+
+        with self.assertRaises(ValueError):
+            self.build_case(case.replace("0,'1 ',1,3,1,", "0,'1 ',1,4,1,"))
+
+    def test_three_winding_transformer(self):
+        with open('data/Data.raw') as file:
+            case = file.read()
+
+        with self.assertRaises(ValueError):
+            self.build_case(case.replace("     7,     0,'1 '", "     7,     9,'1 '"))
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import numpy
+import os
+import power_flow_solver
+import power_system_builder
+import solver_service
+import tempfile
+import unittest
+import unittest.mock
+
+
+class TestSolverService(unittest.TestCase):
+    OPTIONS = solver_service.ServiceOptions(max_active_power_error=0.00001, max_reactive_power_error=0.00001)
+
+    def setUp(self):
+        self.service = solver_service.SolverService(self.OPTIONS)
+        self.case = self.service.load_case('base', 'data/Data.xlsx')
+
+    def tearDown(self):
+        self.service.close()
+
+    def test_solve_deltas(self):
+        deltas = {'loads': [{'bus': 3, 'active_power': 120}], 'generators': [{'bus': 2, 'voltage': 1.03}],
+                  'lines': [{'index': 0, 'in_service': False}]}
+        solution = self.case.solve(deltas)
+        self.assertTrue(solution['converged'])
+        self.assertEqual(solution['bus_numbers'], list(range(1, 13)))
+        self.assertAlmostEqual(solution['voltage_magnitudes'][1], 1.03)
+        self.assertEqual(solution['line_loadings'][0], 0)
+
+        # The solution matches a solve of the changed case from scratch.
+        system = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx').build_system()
+        system.bus_data.active_power_consumed[2] = 1.2
+        system.bus_data.voltage[1] = 1.03
+        system.update_line(0, in_service=False)
+        self.assertTrue(power_flow_solver.PowerFlowSolver(system, 1, 0.00001, 0.00001).solve())
+        numpy.testing.assert_array_almost_equal(solution['voltage_magnitudes'], numpy.abs(system.bus_data.voltage), 5)
+
+        # Deltas apply to the base case rather than accumulating, whichever instance solves them.
+        base = self.case.solve({})
+        self.assertEqual(base['iterations'], 0)
+        numpy.testing.assert_array_almost_equal(base['voltage_magnitudes'],
+                                                numpy.abs(self.case.system.bus_data.voltage))
+        for _ in range(self.OPTIONS.pool_size):
+            numpy.testing.assert_array_almost_equal(self.case.solve(deltas)['voltage_magnitudes'],
+                                                    solution['voltage_magnitudes'])
+
+    def test_solve_islands(self):
+        lines = [index for index, line in enumerate(self.case.system.lines)
+                 if (line.source, line.destination) in ((2, 3), (3, 4))]
+        solution = self.case.solve({'lines': [{'index': index, 'in_service': False} for index in lines]})
+        self.assertTrue(solution['converged'])
+        self.assertEqual([island['buses'] for island in solution['islands']], [[1, 2] + list(range(4, 13)), [3]])
+        self.assertNotIn('islands', self.case.solve({}))
+
+    def test_bus_type_change(self):
+        solution = self.case.solve({'loads': [{'bus': 4, 'active_power': 0, 'reactive_power': 0}]})
+        self.assertTrue(solution['converged'])
+        self.assertTrue(self.case.solve({})['converged'])
+
+    def test_repeated_line_deltas(self):
+        solution = self.case.solve({'lines': [{'index': 14, 'in_service': False}]})
+        for index in (5, 14) * 50:
+            self.assertTrue(self.case.solve({'lines': [{'index': index, 'in_service': False}]})['converged'])
+
+        # Each request starts from the saved base case factorization rather than undoing the last request.
+        for instance in self.case._instances.queue:
+            self.assertLessEqual(power_flow_solver._update_rank(instance._solver._factorization), 4)
+        numpy.testing.assert_array_almost_equal(
+            self.case.solve({'lines': [{'index': 14, 'in_service': False}]})['voltage_magnitudes'],
+            solution['voltage_magnitudes'])
+
+    def test_solver_failure(self):
+        async def solve():
+            return await self.service.handle_request({'id': 1, 'method': 'solve', 'params': {'case': 'base'}})
+
+        # An unexpected error is returned to the client, and the instances it affected start over.
+        with unittest.mock.patch.object(power_flow_solver.PowerFlowSolver, 'restore_state', side_effect=RecursionError(
+                'maximum recursion depth exceeded')):
+            for _ in range(self.OPTIONS.pool_size):
+                self.assertEqual(asyncio.run(solve()),
+                                 {'id': 1, 'error': 'RecursionError: maximum recursion depth exceeded'})
+
+        for _ in range(self.OPTIONS.pool_size):
+            self.assertTrue(asyncio.run(solve())['result']['converged'])
+
+    def test_invalid_deltas(self):
+        for deltas in ({'loads': [{'bus': 99, 'active_power': 1}]}, {'lines': [{'index': 99, 'in_service': False}]},
+                       {'generators': [{'voltage': 1.0}]}):
+            with self.assertRaises(solver_service.ServiceError):
+                self.case.solve(deltas)
+        self.assertTrue(self.case.solve({})['converged'])
+
+    def test_socket(self):
+        requests = [
+            {'id': 1, 'method': 'load_case', 'params': {'case': 'copy', 'filename': 'data/Data.xlsx'}},
+            {'id': 2, 'method': 'solve', 'params': {'case': 'copy', 'loads': [{'bus': 3, 'active_power': 110}]}},
+            {'id': 3, 'method': 'list_cases'},
+            {'id': 4, 'method': 'unload_case', 'params': {'case': 'copy'}},
+            {'id': 5, 'method': 'solve', 'params': {'case': 'copy'}},
+            {'id': 6, 'method': 'unknown'},
+        ]
+
+        async def exchange(socket_path):
+            server = await self.service.start(socket_path)
+            reader, writer = await asyncio.open_unix_connection(socket_path)
+            responses = []
+            for request in requests:
+                writer.write(json.dumps(request).encode() + b'\n')
+                responses.append(json.loads(await reader.readline()))
+
+            writer.close()
+            await writer.wait_closed()
+            server.close()
+            await server.wait_closed()
+            return responses
+
+        with tempfile.TemporaryDirectory() as directory:
+            responses = asyncio.run(exchange(os.path.join(directory, 'service.sock')))
+
+        self.assertEqual([response['id'] for response in responses], [1, 2, 3, 4, 5, 6])
+        self.assertEqual(responses[0]['result']['buses'], 12)
+        self.assertTrue(responses[1]['result']['converged'])
+        self.assertEqual([case['case'] for case in responses[2]['result']], ['base', 'copy'])
+        self.assertEqual(list(self.service.cases), ['base'])
+        self.assertEqual(responses[4]['error'], 'Unknown case: copy')
+        self.assertEqual(responses[5]['error'], 'Unknown method: unknown')
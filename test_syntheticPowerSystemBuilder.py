@@ -0,0 +1,53 @@
+import numpy
+import power_flow_solver
+import power_system_builder
+import scipy.sparse.csgraph
+import unittest
+
+
+class TestSyntheticPowerSystemBuilder(unittest.TestCase):
+    def test_build_system(self):
+        builder = power_system_builder.SyntheticPowerSystemBuilder(500, seed=3)
+        system = builder.build_system()
+        bus_data = system.bus_data
+        self.assertEqual(len(bus_data), 500)
+        numpy.testing.assert_array_equal(bus_data.number, numpy.arange(1, 501))
+        self.assertEqual(builder.swing_bus_number, 1)
+
+        # The network is connected and meshed, and has no more than four lines at any bus.
+        adjacency = abs(system.admittance_matrix(sparse=True)) > 0
+        component_count, _ = scipy.sparse.csgraph.connected_components(adjacency, directed=False)
+        self.assertEqual(component_count, 1)
+        self.assertGreater(len(system.line_data), len(bus_data) - 1)
+        self.assertLessEqual(numpy.bincount(numpy.concatenate([system.line_source_indices,
+                                                               system.line_destination_indices])).max(), 4)
+
+        # Generators share the total load, and no bus both generates and consumes power.
+        generators = bus_data.active_power_generated > 0
+        self.assertAlmostEqual(bus_data.active_power_generated.sum(), bus_data.active_power_consumed.sum())
+        self.assertFalse(numpy.any(generators & (bus_data.active_power_consumed > 0)))
+        self.assertEqual(generators.sum(), int(0.2 * 499))
+
+    def test_seed(self):
+        system_1 = power_system_builder.SyntheticPowerSystemBuilder(200, seed=1).build_system()
+        system_2 = power_system_builder.SyntheticPowerSystemBuilder(200, seed=1).build_system()
+        system_3 = power_system_builder.SyntheticPowerSystemBuilder(200, seed=2).build_system()
+        numpy.testing.assert_array_equal(system_1.bus_data.active_power_consumed,
+                                         system_2.bus_data.active_power_consumed)
+        numpy.testing.assert_array_equal(system_1.line_data.distributed_impedance,
+                                         system_2.line_data.distributed_impedance)
+        self.assertFalse(numpy.array_equal(system_1.bus_data.active_power_consumed,
+                                           system_3.bus_data.active_power_consumed))
+
+    def test_solve(self):
+        for bus_count in (2, 10, 1000):
+            system = power_system_builder.SyntheticPowerSystemBuilder(bus_count).build_system()
+            solver = power_flow_solver.PowerFlowSolver(system, max_active_power_error=1e-5,
+                                                       max_reactive_power_error=1e-5)
+            self.assertTrue(solver.solve())
+            magnitudes = numpy.abs(system.bus_data.voltage)
+            self.assertTrue(numpy.all((magnitudes > 0.95) & (magnitudes < 1.05)))
+
+    def test_invalid_bus_count(self):
+        with self.assertRaises(ValueError):
+            power_system_builder.SyntheticPowerSystemBuilder(1)
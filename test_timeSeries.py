@@ -0,0 +1,91 @@
+import csv
+import io
+import numpy
+import os
+import power_flow_solver
+import power_system_builder
+import tempfile
+import time_series
+import unittest
+
+
+class TestTimeSeries(unittest.TestCase):
+    OPTIONS = time_series.TimeSeriesOptions(max_active_power_error=0.00001, max_reactive_power_error=0.00001)
+
+    def setUp(self):
+        self._builder = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx')
+
+    def test_snapshots(self):
+        system = self._builder.build_system()
+        base_loads = system.bus_data.active_power_consumed.copy()
+        load_factors = numpy.linspace(0.9, 1.1, len(system.bus_data))
+        snapshots = list(time_series.solve_time_series(system, [1.0, 1.0, load_factors], options=self.OPTIONS))
+
+        self.assertEqual([snapshot.index for snapshot in snapshots], [0, 1, 2])
+        self.assertTrue(all(snapshot.converged for snapshot in snapshots))
+
+        # The second snapshot is identical to the first, so it starts from a converged solution.
+        self.assertEqual(snapshots[1].iterations, 0)
+        numpy.testing.assert_array_equal(system.bus_data.active_power_consumed, base_loads)
+
+        expected_system = self._builder.build_system()
+        expected_system.bus_data.active_power_consumed[:] *= load_factors
+        expected_system.bus_data.reactive_power_consumed[:] *= load_factors
+        self.assertTrue(power_flow_solver.PowerFlowSolver(expected_system, 1, 0.00001, 0.00001).solve())
+        numpy.testing.assert_array_almost_equal(snapshots[2].voltage, expected_system.bus_data.voltage, 5)
+        numpy.testing.assert_array_almost_equal(snapshots[2].line_flows, time_series.line_flows(expected_system), 4)
+
+    def test_generation_profile(self):
+        system = self._builder.build_system()
+        snapshot = next(time_series.solve_time_series(system, [1.0], [1.05], self.OPTIONS))
+
+        expected_system = self._builder.build_system()
+        expected_system.bus_data.active_power_generated[:] *= 1.05
+        self.assertTrue(power_flow_solver.PowerFlowSolver(expected_system, 1, 0.00001, 0.00001).solve())
+        numpy.testing.assert_array_almost_equal(snapshot.voltage, expected_system.bus_data.voltage, 5)
+
+    def test_profile_lengths(self):
+        # A longer profile of either kind is an error rather than being truncated, and the base case is restored.
+        for load_profile, generation_profile in (([1.0, 1.0], [1.0]), ([1.0], iter([1.0, 1.0]))):
+            system = self._builder.build_system()
+            with self.assertRaises(ValueError):
+                list(time_series.solve_time_series(system, load_profile, generation_profile, self.OPTIONS))
+            numpy.testing.assert_array_equal(system.bus_data.active_power_consumed,
+                                             self._builder.build_system().bus_data.active_power_consumed)
+
+    def test_diverging_snapshot(self):
+        system = self._builder.build_system()
+        snapshots = list(time_series.solve_time_series(system, [1.0, 50.0, 1.0], options=self.OPTIONS))
+
+        # The snapshot beyond maximum loading is abandoned before the iteration limit, and does not affect the next.
+        self.assertEqual([snapshot.converged for snapshot in snapshots], [True, False, True])
+        self.assertLess(snapshots[1].iterations, self.OPTIONS.max_iterations)
+        numpy.testing.assert_array_almost_equal(snapshots[2].voltage, snapshots[0].voltage, 5)
+
+        damped_options = time_series.TimeSeriesOptions(max_active_power_error=0.00001,
+                                                       max_reactive_power_error=0.00001,
+                                                       damping=power_flow_solver.LINE_SEARCH)
+        snapshot = next(time_series.solve_time_series(self._builder.build_system(), [1.0], options=damped_options))
+        self.assertTrue(snapshot.converged)
+        numpy.testing.assert_array_almost_equal(snapshot.voltage, snapshots[0].voltage, 5)
+
+    def test_write_csv(self):
+        system = self._builder.build_system()
+        file = io.StringIO()
+        time_series.write_csv(time_series.solve_time_series(system, [1.0, 1.02], options=self.OPTIONS), file, system,
+                              100)
+
+        rows = list(csv.reader(io.StringIO(file.getvalue())))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0][:4], ['Snapshot', 'Converged', 'Iterations', 'Bus 1 Voltage (pu)'])
+        self.assertEqual(len(rows[1]), 3 + 2 * len(system.bus_data) + 2 * len(system.line_data))
+        self.assertEqual(rows[2][:2], ['2', 'True'])
+
+    def test_read_profile(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write('1.0\n0.5,1.5\n')
+        self.addCleanup(os.remove, file.name)
+
+        profile = list(time_series.read_profile(file.name))
+        self.assertEqual(profile[0], 1.0)
+        numpy.testing.assert_array_equal(profile[1], [0.5, 1.5])
@@ -0,0 +1,87 @@
+import numpy
+import power_flow_solver
+import power_system_builder
+import tempfile
+import unittest
+import warm_start_store
+
+
+class TestWarmStartStore(unittest.TestCase):
+    def solve(self, system):
+        summaries = []
+        self.assertTrue(power_flow_solver.PowerFlowSolver(system, 1, 0.00001, 0.00001).solve(callback=summaries.append))
+        return summaries[-1].iteration
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._builder = power_system_builder.ExcelPowerSystemBuilder('data/Data.xlsx')
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_lookup_empty(self):
+        store = warm_start_store.WarmStartStore(self._directory.name)
+        self.assertIsNone(store.lookup(self._builder.build_system()))
+        self.assertFalse(store.warm_start(self._builder.build_system(), 1))
+
+    def test_warm_start(self):
+        system = self._builder.build_system()
+        flat_start_iterations = self.solve(system)
+        warm_start_store.WarmStartStore(self._directory.name).record(system)
+
+        # A new store instance reads the solution recorded by the previous one.
+        store = warm_start_store.WarmStartStore(self._directory.name)
+        warm_system = self._builder.build_system()
+        warm_system.bus_data.active_power_consumed[:] *= 1.01
+        start_magnitudes = numpy.abs(warm_system.bus_data.voltage)
+        self.assertTrue(store.warm_start(warm_system, 1))
+        self.assertEqual(warm_system.bus_data.voltage[0], system.bus_data.voltage[0])
+
+        # Only PQ buses take their magnitudes from the stored solution. The others keep their specified magnitudes,
+        # including bus 12, which is a PV bus without active power generation.
+        pq = power_flow_solver.classify_buses(warm_system.bus_data, 1) == power_flow_solver.BusType.PQ.value
+        self.assertFalse(pq[11])
+        magnitudes = numpy.abs(warm_system.bus_data.voltage)
+        numpy.testing.assert_array_equal(magnitudes[~pq], start_magnitudes[~pq])
+        numpy.testing.assert_array_almost_equal(magnitudes[pq], numpy.abs(system.bus_data.voltage[pq]))
+        self.assertLess(self.solve(warm_system), flat_start_iterations)
+
+    def test_network_key(self):
+        system = self._builder.build_system()
+        self.solve(system)
+        store = warm_start_store.WarmStartStore(self._directory.name)
+        store.record(system)
+
+        outage_system = self._builder.build_system()
+        outage_system.update_line(0, in_service=False)
+        self.assertNotEqual(warm_start_store.network_key(system), warm_start_store.network_key(outage_system))
+        self.assertIsNone(store.lookup(outage_system))
+
+    def test_nearest(self):
+        store = warm_start_store.WarmStartStore(self._directory.name)
+        for scale in (0.8, 1.0, 1.2):
+            system = self._builder.build_system()
+            system.bus_data.active_power_consumed[:] *= scale
+            system.bus_data.voltage[:] = scale
+            store.record(system)
+
+        system = self._builder.build_system()
+        system.bus_data.active_power_consumed[:] *= 1.15
+        numpy.testing.assert_array_equal(store.lookup(system), numpy.full(len(system.bus_data), 1.2))
+
+    def test_eviction(self):
+        store = warm_start_store.WarmStartStore(self._directory.name, max_entries=2)
+        systems = []
+        for scale in (0.8, 1.0, 1.2):
+            system = self._builder.build_system()
+            system.bus_data.active_power_consumed[:] *= scale
+            system.bus_data.voltage[:] = scale
+            store.record(system)
+            systems.append(system)
+
+            # Recording the same case again replaces the existing solution.
+            store.record(system)
+
+        self.assertEqual(len(store), 2)
+        numpy.testing.assert_array_equal(store.lookup(systems[0]), systems[1].bus_data.voltage)
+
@@ -0,0 +1,245 @@
+"""A program that solves a sequence of power flow snapshots, e.g. for an 8,760-hour load profile study.
+
+The base case is read from an Excel file once. Each snapshot scales the base case loads and generation by a row of a
+profile, and is solved starting from the solution of the previous snapshot with a solver that keeps the admittance
+matrix of the base case. Snapshots are produced by a generator and written to a CSV file one row at a time, and profiles
+are read one row at a time, so memory use does not grow with the length of the study.
+
+A profile is a CSV file without a header. Each row is a snapshot, and contains either a single factor applied to every
+bus or one factor for each bus, in bus order. The load profile scales active and reactive power consumption, while the
+optional generation profile scales active power generation.
+
+    python time_series.py --input_workbook data/Data.xlsx --load_profile loads.csv --output results.csv
+"""
+
+import argparse
+import csv
+import dataclasses
+import itertools
+import numpy
+import power_flow_solver
+import power_system_builder
+import power_system_reporter
+import sys
+
+# Input data constants.
+DEFAULT_INPUT_WORKBOOK = 'data/Data.xlsx'
+DEFAULT_BUS_DATA_WORKSHEET_NAME = 'Bus data'
+DEFAULT_LINE_DATA_WORKSHEET_NAME = 'Line data'
+
+# Power flow constants.
+DEFAULT_SWING_BUS_NUMBER = 1
+DEFAULT_POWER_BASE = 100
+DEFAULT_MAX_ACTIVE_POWER_ERROR = 0.1
+DEFAULT_MAX_REACTIVE_POWER_ERROR = 0.1
+DEFAULT_MAX_ITERATIONS = 20
+
+# Marks the end of the shorter of the load and generation profiles.
+_END_OF_PROFILE = object()
+
+
+@dataclasses.dataclass(frozen=True)
+class TimeSeriesOptions:
+    """Options used to solve each snapshot. Power quantities are in per-unit."""
+    swing_bus_number: int = DEFAULT_SWING_BUS_NUMBER
+    max_active_power_error: float = DEFAULT_MAX_ACTIVE_POWER_ERROR / DEFAULT_POWER_BASE
+    max_reactive_power_error: float = DEFAULT_MAX_REACTIVE_POWER_ERROR / DEFAULT_POWER_BASE
+    max_iterations: int = DEFAULT_MAX_ITERATIONS
+    jacobian_reuse: bool = False
+    damping: str = None
+
+
+@dataclasses.dataclass(frozen=True)
+class Snapshot:
+    """The solution of a single snapshot. Line flows are the complex power leaving the source bus, in per-unit."""
+    index: int
+    converged: bool
+    iterations: int
+    voltage: numpy.ndarray
+    line_flows: numpy.ndarray
+
+
+def line_flows(system):
+    """Computes the complex power flowing into each line from its source bus, in per-unit.
+
+    Args:
+        system: A solved power system.
+
+    Returns:
+        An array containing the power flow of each line. Lines out of service carry no power.
+    """
+    return power_system_reporter.line_flows(system, 1).sending_power
+
+
+def solve_time_series(system, load_profile, generation_profile=None, options=TimeSeriesOptions()):
+    """Solves the power flow for each snapshot of a profile.
+
+    Each snapshot starts from the solution of the last snapshot that converged. The loads and generation of the system
+    are restored once the generator is exhausted or closed.
+
+    Args:
+        system: The base case power system.
+        load_profile: An iterable with one row per snapshot. Each row is a factor, or an array of factors for each bus,
+            by which the base case loads are scaled.
+        generation_profile: An iterable of the same form and length by which the base case generation is scaled. If
+            unspecified, generation is not scaled.
+        options: The time series options.
+
+    Yields:
+        The solution of each snapshot, in order.
+
+    Raises:
+        ValueError: If the load and generation profiles have different lengths. Since the profiles may be read as they
+            are solved, this is raised once the shorter profile is exhausted.
+    """
+    bus_data = system.bus_data
+    base_active_power_consumed = bus_data.active_power_consumed.copy()
+    base_reactive_power_consumed = bus_data.reactive_power_consumed.copy()
+    base_active_power_generated = bus_data.active_power_generated.copy()
+    if generation_profile is None:
+        rows = zip(load_profile, itertools.repeat(1))
+    else:
+        rows = itertools.zip_longest(load_profile, generation_profile, fillvalue=_END_OF_PROFILE)
+
+    solver = power_flow_solver.PowerFlowSolver(system, options.swing_bus_number, options.max_active_power_error,
+                                               options.max_reactive_power_error, jacobian_reuse=options.jacobian_reuse,
+                                               damping=options.damping)
+    last_converged_voltage = bus_data.voltage.copy()
+    try:
+        for index, (load_factors, generation_factors) in enumerate(rows):
+            if load_factors is _END_OF_PROFILE or generation_factors is _END_OF_PROFILE:
+                raise ValueError('The load and generation profiles have different lengths.')
+
+            bus_data.active_power_consumed[:] = base_active_power_consumed * load_factors
+            bus_data.reactive_power_consumed[:] = base_reactive_power_consumed * load_factors
+            bus_data.active_power_generated[:] = base_active_power_generated * generation_factors
+            solver.update_buses()
+
+            converged, iterations = _solve(solver, options.max_iterations)
+            yield Snapshot(index, converged, iterations, bus_data.voltage.copy(), line_flows(system))
+
+            # Start the next snapshot from the last good solution rather than from a diverged one.
+            if converged:
+                last_converged_voltage[:] = bus_data.voltage
+            else:
+                bus_data.voltage[:] = last_converged_voltage
+    finally:
+        bus_data.active_power_consumed[:] = base_active_power_consumed
+        bus_data.reactive_power_consumed[:] = base_reactive_power_consumed
+        bus_data.active_power_generated[:] = base_active_power_generated
+
+
+def write_csv(snapshots, file, system, power_base):
+    """Writes snapshots to a CSV file as they are produced.
+
+    Each row contains the snapshot number, whether it converged, the number of iterations, the voltage magnitude and
+    phase angle of each bus, and the active and reactive power flow of each line.
+
+    Args:
+        snapshots: An iterable of snapshots.
+        file: A writable text file.
+        system: The power system the snapshots were solved for.
+        power_base: The power base in MVA.
+    """
+    writer = csv.writer(file)
+    header = ['Snapshot', 'Converged', 'Iterations']
+    for number in system.bus_data.number:
+        header += ['Bus {} Voltage (pu)'.format(number), 'Bus {} Phase (deg)'.format(number)]
+    for source, destination in zip(system.line_data.source, system.line_data.destination):
+        header += ['Line {}-{} P (MW)'.format(source, destination), 'Line {}-{} Q (Mvar)'.format(source, destination)]
+    writer.writerow(header)
+
+    for snapshot in snapshots:
+        voltages = numpy.column_stack([numpy.abs(snapshot.voltage), numpy.rad2deg(numpy.angle(snapshot.voltage))])
+        flows = power_base * numpy.column_stack([snapshot.line_flows.real, snapshot.line_flows.imag])
+        writer.writerow([snapshot.index + 1, snapshot.converged, snapshot.iterations] + voltages.ravel().tolist() +
+                        flows.ravel().tolist())
+
+
+def read_profile(filename):
+    """Reads a profile from a CSV file one row at a time.
+
+    Args:
+        filename: The name of the CSV file.
+
+    Yields:
+        An array containing the factors of each row.
+    """
+    with open(filename, newline='') as file:
+        for row in csv.reader(file):
+            if row:
+                factors = numpy.array(row, dtype=float)
+                yield factors[0] if len(factors) == 1 else factors
+
+
+def _solve(solver, max_iterations):
+    """Solves a snapshot until it converges, diverges, or reaches the iteration limit.
+
+    Returns:
+        A tuple containing whether the power flow converged and the number of iterations executed.
+    """
+    summaries = []
+    try:
+        converged = solver.solve(max_iterations, callback=summaries.append)
+    except power_flow_solver.SOLVE_ERRORS:
+        # The power flow diverged or the Jacobian is singular, e.g. because the snapshot is beyond maximum loading.
+        converged = False
+
+    return converged, summaries[-1].iteration if summaries else 0
+
+
+def parse_arguments():
+    """Parses command line arguments.
+
+    Returns:
+        An object containing program arguments.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--input_workbook', default=DEFAULT_INPUT_WORKBOOK,
+                        help='An Excel workbook containing bus and line data for the base case.')
+    parser.add_argument('--bus_data_worksheet', default=DEFAULT_BUS_DATA_WORKSHEET_NAME,
+                        help='The name of the worksheet containing bus data.')
+    parser.add_argument('--line_data_worksheet', default=DEFAULT_LINE_DATA_WORKSHEET_NAME,
+                        help='The name of the worksheet containing line data.')
+    parser.add_argument('--load_profile', required=True,
+                        help='A CSV file containing the factors by which loads are scaled in each snapshot.')
+    parser.add_argument('--generation_profile',
+                        help='A CSV file containing the factors by which generation is scaled in each snapshot.')
+    parser.add_argument('--output', help='The CSV file to which results are written (default: standard output).')
+    parser.add_argument('--swing_bus_number', type=int, default=DEFAULT_SWING_BUS_NUMBER, help='The swing bus number.')
+    parser.add_argument('--power_base', type=float, default=DEFAULT_POWER_BASE, help='The base power quantity in MVA.')
+    parser.add_argument('--max_active_power_error', type=float, default=DEFAULT_MAX_ACTIVE_POWER_ERROR,
+                        help='The maximum allowed mismatch between computed and actual megawatts at each bus.')
+    parser.add_argument('--max_reactive_power_error', type=float, default=DEFAULT_MAX_REACTIVE_POWER_ERROR,
+                        help='The maximum allowed mismatch between computed and actual megavars at each bus.')
+    parser.add_argument('--max_iterations', type=int, default=DEFAULT_MAX_ITERATIONS,
+                        help='The maximum number of iterations before a snapshot is considered not to converge.')
+    parser.add_argument('--jacobian_reuse', action='store_true',
+                        help='Reuse the factorized Jacobian across iterations and snapshots until convergence stalls.')
+    parser.add_argument('--damping', choices=power_flow_solver.DAMPING_METHODS,
+                        help='The method used to damp each Newton-Raphson correction (default: no damping).')
+    return parser.parse_args()
+
+
+def main():
+    """Reads a base case and profiles from input files and solves each snapshot."""
+    args = parse_arguments()
+    builder = power_system_builder.ExcelPowerSystemBuilder(
+        args.input_workbook, args.bus_data_worksheet, args.line_data_worksheet, power_base=args.power_base)
+    system = builder.build_system()
+    options = TimeSeriesOptions(args.swing_bus_number, args.max_active_power_error / args.power_base,
+                                args.max_reactive_power_error / args.power_base, args.max_iterations,
+                                args.jacobian_reuse, args.damping)
+
+    load_profile = read_profile(args.load_profile)
+    generation_profile = read_profile(args.generation_profile) if args.generation_profile else None
+    snapshots = solve_time_series(system, load_profile, generation_profile, options)
+    if args.output:
+        with open(args.output, 'w', newline='') as file:
+            write_csv(snapshots, file, system, args.power_base)
+    else:
+        write_csv(snapshots, sys.stdout, system, args.power_base)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""A module containing a persistent store of converged power flow solutions used to warm-start new solves.
+
+Most of the iterations of a power flow started from a flat voltage profile are spent approaching the neighborhood of the
+solution. When nearly identical cases are solved repeatedly, starting from a previous solution instead typically
+reduces a solve to one or two iterations.
+
+Solutions are keyed by a hash of the network: the bus numbers, the line connections, and the line parameters. Within a
+key, the solution whose bus power injections are nearest to those of the new case is used. The store is a directory
+containing one file per solution and an index listing the solutions from least to most recently used. When the store
+grows beyond its size bound, the least recently used solutions are evicted.
+
+    store = WarmStartStore('warm_start')
+    store.warm_start(system, swing_bus_number)
+    ... solve the power flow ...
+    store.record(system)
+"""
+
+import hashlib
+import json
+import numpy
+import os
+import power_flow_solver
+import uuid
+
+DEFAULT_MAX_ENTRIES = 64
+INDEX_FILENAME = 'index.json'
+
+
+class WarmStartStore:
+    """A least recently used store of converged bus voltages."""
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+        """Initializes the store, creating its directory if it does not exist.
+
+        Args:
+            path: The directory containing the store.
+            max_entries: The maximum number of solutions kept in the store.
+        """
+        self._path = path
+        self._max_entries = max_entries
+        os.makedirs(path, exist_ok=True)
+        self._entries = self._read_index()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, system):
+        """Finds the stored solution nearest to a power system and marks it as recently used.
+
+        Args:
+            system: The power system.
+
+        Returns:
+            The stored bus voltages, or None if no solution has been recorded for the network of the system.
+        """
+        entry = self._nearest_entry(system)
+        if entry is None:
+            return None
+
+        self._entries.remove(entry)
+        self._entries.append(entry)
+        self._write_index()
+        with numpy.load(self._entry_path(entry)) as solution:
+            return solution['voltage']
+
+    def warm_start(self, system, swing_bus_number):
+        """Sets the bus voltages of a power system to the nearest stored solution.
+
+        The voltage of the swing bus and the voltage magnitudes of PV buses, including buses of unknown type, which are
+        solved like PV buses, are specified by the system and are left unchanged; only the phase angles of PV buses are
+        taken from the stored solution.
+
+        Args:
+            system: The power system.
+            swing_bus_number: The swing bus number.
+
+        Returns:
+            True if a stored solution was found, false otherwise.
+        """
+        voltage = self.lookup(system)
+        if voltage is None:
+            return False
+
+        bus_data = system.bus_data
+        bus_types = power_flow_solver.classify_buses(bus_data, swing_bus_number)
+        magnitudes = numpy.where(bus_types == power_flow_solver.BusType.PQ.value, numpy.abs(voltage),
+                                 numpy.abs(bus_data.voltage))
+        non_swing = bus_types != power_flow_solver.BusType.SWING.value
+        angles = numpy.angle(voltage)
+        bus_data.voltage[non_swing] = power_flow_solver.exact_polar(magnitudes[non_swing], angles[non_swing])
+        return True
+
+    def record(self, system):
+        """Records the bus voltages of a solved power system.
+
+        A solution recorded for the same network and bus power injections as an existing solution replaces it. The
+        least recently used solutions are evicted if the store exceeds its size bound.
+
+        Args:
+            system: The solved power system.
+        """
+        key = network_key(system)
+        injections = _injections(system)
+        entry = self._nearest_entry(system)
+        if entry is not None and numpy.array_equal(self._entry_injections(entry), injections):
+            self._entries.remove(entry)
+        else:
+            entry = {'key': key, 'file': '{}.npz'.format(uuid.uuid4().hex)}
+
+        numpy.savez(self._entry_path(entry), injections=injections, voltage=system.bus_data.voltage)
+        self._entries.append(entry)
+        while len(self._entries) > self._max_entries:
+            os.remove(self._entry_path(self._entries.pop(0)))
+        self._write_index()
+
+    def _nearest_entry(self, system):
+        """Returns the entry for the network of a system whose bus power injections are nearest, or None."""
+        key = network_key(system)
+        candidates = [entry for entry in self._entries if entry['key'] == key]
+        if not candidates:
+            return None
+
+        injections = _injections(system)
+        return min(candidates, key=lambda entry: numpy.linalg.norm(self._entry_injections(entry) - injections))
+
+    def _entry_injections(self, entry):
+        """Reads the bus power injections of a stored solution."""
+        with numpy.load(self._entry_path(entry)) as solution:
+            return solution['injections']
+
+    def _entry_path(self, entry):
+        return os.path.join(self._path, entry['file'])
+
+    def _read_index(self):
+        """Reads the index of stored solutions, ignoring any whose file is missing."""
+        try:
+            with open(os.path.join(self._path, INDEX_FILENAME)) as index:
+                entries = json.load(index)
+        except FileNotFoundError:
+            return []
+        return [entry for entry in entries if os.path.exists(self._entry_path(entry))]
+
+    def _write_index(self):
+        """Writes the index of stored solutions. The index is replaced atomically so that it is never left corrupt."""
+        filename = os.path.join(self._path, INDEX_FILENAME)
+        with open(filename + '.tmp', 'w') as index:
+            json.dump(self._entries, index)
+        os.replace(filename + '.tmp', filename)
+
+
+def network_key(system):
+    """Computes a hash of the buses, line connections, and line parameters of a power system.
+
+    Args:
+        system: The power system.
+
+    Returns:
+        A hexadecimal digest identifying the network.
+    """
+    digest = hashlib.sha256()
+    line_data = system.line_data
+    for array in (system.bus_data.number, line_data.source, line_data.destination, line_data.distributed_impedance,
+                  line_data.shunt_admittance, line_data.in_service):
+        digest.update(numpy.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def _injections(system):
+    """Returns the specified active and reactive power injection at each bus."""
+    bus_data = system.bus_data
+    return numpy.concatenate([bus_data.active_power_generated - bus_data.active_power_consumed,
+                              -bus_data.reactive_power_consumed])